@@ -1,4 +1,8 @@
 #!/bin/sh
 
 python3 manage.py wait_for_migrations
+# Метрики дочерних процессов воркера собираются через общий каталог.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
 celery -A ryazan_ddro worker --beat -l info
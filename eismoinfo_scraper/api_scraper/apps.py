@@ -8,3 +8,5 @@ class ApiScraperConfig(AppConfig):
     def ready(self):
         import api_scraper.stations
         import api_scraper.weather_data_service
+        import api_scraper.signals
+        import api_scraper.instrumentation
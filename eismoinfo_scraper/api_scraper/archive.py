@@ -0,0 +1,207 @@
+import datetime as dt
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from .models import WeatherData, WeatherDataArchive
+from .loggers import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class ArchiveException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class DownsampleReport(NamedTuple):
+    """Результат сжатия погодных данных в почасовой архив."""
+    archived: int  # Количество сохраненных строк архива.
+    merged: int  # Количество строк архива, дополненных отчетами за уже сжатые часы.
+    deleted: int  # Количество удаленных сырых отчетов.
+
+
+class WeatherDataArchiveService:
+    """
+    Класс для сжатия погодных данных в почасовой архив(WeatherDataArchive).
+    Отчеты WeatherData старше raw_retention_days дней агрегируются одним
+    запросом INSERT ... SELECT ... GROUP BY(станция, час UTC) и удаляются
+    в той же транзакции, по суткам от самых старых. Отчеты, загруженные
+    за уже сжатый час(бэкфилл, догрузка после простоя станции), при
+    следующем сжатии объединяются со строкой архива этого часа, до него
+    читаются из WeatherData вместе с архивом. Граница архива - конец
+    последнего сжатого часа: запросы за более ранний период читаются
+    из архива, за более поздний - из WeatherData.
+    """
+
+    # Показатели: в архиве хранится среднее, min, max, последнее непустое
+    # значение и количество непустых значений.
+    METRICS = (
+        'temperature_air', 'surface_temp', 'visibility', 'wind_m_s_avg',
+        'wind_m_s_max', 'precipitation_amount', 'dew_point', 'frost_point'
+    )
+    # Коды явлений: в архиве хранится самое частое значение.
+    CODES = ('surface_cond', 'wind_degree', 'precipitation_type')
+    BUCKET = dt.timedelta(hours=1)
+    # Период, сжимаемый в одной транзакции.
+    STEP = dt.timedelta(days=1)
+
+    def __init__(self, model=WeatherDataArchive, raw_retention_days: int = None):
+        self.model = model
+        # Срок хранения сырых отчетов в днях, 0 - отчеты не сжимаются.
+        if raw_retention_days is None:
+            raw_retention_days = settings.WEATHER_DATA_RAW_RETENTION_DAYS
+        self.raw_retention_days = raw_retention_days
+
+    @staticmethod
+    def quote(name: str) -> str:
+        return connection.ops.quote_name(name)
+
+    def check_database(self):
+        if connection.vendor != 'postgresql':
+            raise ArchiveException('Weather data downsampling is supported on PostgreSQL only.')
+
+    def get_cutoff(self, now: dt.datetime = None) -> dt.datetime:
+        """Вернуть начало часа, отчеты раньше которого сжимаются в архив."""
+        now = now or dt.datetime.now(dt.timezone.utc)
+        cutoff = now.astimezone(dt.timezone.utc) - dt.timedelta(days=self.raw_retention_days)
+        return cutoff.replace(minute=0, second=0, microsecond=0)
+
+    def get_horizon(self) -> dt.datetime | None:
+        """
+        Вернуть границу архива: конец последнего сжатого часа.
+        None - архив пуст, все данные читаются из WeatherData.
+        """
+        last = self.model.objects.aggregate(last=Max('UTC'))['last']
+        return last + self.BUCKET if last is not None else None
+
+    def get_merge_columns(self) -> dict[str, str]:
+        """
+        Выражения ON CONFLICT DO UPDATE, объединяющие строку архива(archive)
+        с агрегатами отчетов, загруженных за тот же час позже(EXCLUDED).
+        Среднее пересчитывается по количеству значений, min и max - точно.
+        Самое частое и последнее значение часа остаются из архива, если
+        не пусты: без исходных отчетов их нельзя пересчитать.
+        """
+        columns = {
+            'local': 'LEAST(archive.{0}, EXCLUDED.{0})'.format(self.quote('local')),
+            'reports_count': 'archive.reports_count + EXCLUDED.reports_count',
+        }
+        for code in self.CODES:
+            columns[code] = f'COALESCE(archive.{code}, EXCLUDED.{code})'
+        for metric in self.METRICS:
+            count = f'{metric}_count'
+            columns[metric] = (
+                f'(COALESCE(archive.{metric} * archive.{count}, 0) '
+                f'+ COALESCE(EXCLUDED.{metric} * EXCLUDED.{count}, 0)) '
+                f'/ NULLIF(archive.{count} + EXCLUDED.{count}, 0)'
+            )
+            # LEAST и GREATEST пропускают NULL.
+            columns[f'{metric}_min'] = f'LEAST(archive.{metric}_min, EXCLUDED.{metric}_min)'
+            columns[f'{metric}_max'] = f'GREATEST(archive.{metric}_max, EXCLUDED.{metric}_max)'
+            columns[f'{metric}_last'] = f'COALESCE(archive.{metric}_last, EXCLUDED.{metric}_last)'
+            columns[count] = f'archive.{count} + EXCLUDED.{count}'
+        return columns
+
+    def get_downsample_sql(self) -> str:
+        """
+        Запрос, сжимающий отчеты с UTC в [%s, %s) в строки архива
+        и удаляющий сжатые отчеты. Час, уже сохраненный в архиве,
+        объединяется с новыми отчетами(get_merge_columns).
+        Возвращает количество сохраненных и дополненных строк архива
+        и удаленных отчетов.
+        """
+        source = self.quote(WeatherData._meta.db_table)
+        utc = self.quote('UTC')
+        hour = f"date_trunc('hour', {utc})"
+        columns = {
+            'station_id': 'station_id',
+            'unix': f'extract(epoch FROM {hour})::integer',
+            'local': f"min(date_trunc('hour', {self.quote('local')}))",
+            'UTC': hour,
+            'time_zone_offset': 'max(time_zone_offset)',
+            'created': 'now()',
+            'reports_count': 'count(*)',
+        }
+        for code in self.CODES:
+            columns[code] = f'mode() WITHIN GROUP (ORDER BY {code})'
+        for metric in self.METRICS:
+            columns[metric] = f'avg({metric})'
+            columns[f'{metric}_min'] = f'min({metric})'
+            columns[f'{metric}_max'] = f'max({metric})'
+            columns[f'{metric}_last'] = (
+                f'(array_agg({metric} ORDER BY unix DESC) FILTER (WHERE {metric} IS NOT NULL))[1]'
+            )
+            columns[f'{metric}_count'] = f'count({metric})'
+        merge_columns = ', '.join(
+            f'{self.quote(column)} = {expression}'
+            for column, expression in self.get_merge_columns().items()
+        )
+        return (
+            f'WITH archived AS ('
+            f'INSERT INTO {self.quote(self.model._meta.db_table)} AS archive '
+            f'({", ".join(self.quote(column) for column in columns)}) '
+            f'SELECT {", ".join(columns.values())} FROM {source} '
+            f'WHERE {utc} >= %s AND {utc} < %s '
+            f'GROUP BY station_id, {hour} '
+            f'ON CONFLICT (station_id, {utc}) DO UPDATE SET {merge_columns} '
+            # xmax = 0 только у вставленной, а не обновленной строки.
+            f'RETURNING station_id, {utc}, xmax = 0 AS inserted), '
+            f'deleted AS ('
+            f'DELETE FROM {source} USING archived '
+            f'WHERE {source}.station_id = archived.station_id '
+            f'AND {source}.{utc} >= archived.{utc} '
+            f"AND {source}.{utc} < archived.{utc} + interval '1 hour' "
+            f'AND {source}.{utc} >= %s AND {source}.{utc} < %s '
+            f'RETURNING 1) '
+            f'SELECT (SELECT count(*) FILTER (WHERE inserted) FROM archived), '
+            f'(SELECT count(*) FILTER (WHERE NOT inserted) FROM archived), '
+            f'(SELECT count(*) FROM deleted)'
+        )
+
+    def downsample_period(self, start: dt.datetime, end: dt.datetime) -> DownsampleReport:
+        """Сжать отчеты с UTC в [start, end) и удалить их из WeatherData."""
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(self.get_downsample_sql(), [start, end, start, end])
+            archived, merged, deleted = cursor.fetchone()
+        return DownsampleReport(archived=archived, merged=merged, deleted=deleted)
+
+    def get_first_hour(self, start: dt.datetime | None, end: dt.datetime) -> dt.datetime | None:
+        """
+        Вернуть начало часа первого отчета с UTC в [start, end),
+        None - отчетов нет. start=None - без нижней границы.
+        """
+        queryset = WeatherData.objects.filter(UTC__lt=end)
+        if start is not None:
+            queryset = queryset.filter(UTC__gte=start)
+        first = queryset.aggregate(first=Min('UTC'))['first']
+        if first is None:
+            return None
+        hour = first.astimezone(dt.timezone.utc).replace(minute=0, second=0, microsecond=0)
+        return max(hour, start) if start is not None else hour
+
+    def downsample(self, now: dt.datetime = None) -> DownsampleReport:
+        """Сжать в архив все отчеты старше срока хранения сырых данных."""
+        if not self.raw_retention_days:
+            return DownsampleReport(archived=0, merged=0, deleted=0)
+        self.check_database()
+        cutoff = self.get_cutoff(now)
+        archived = merged = deleted = 0
+        start = self.get_first_hour(None, cutoff)
+        while start is not None:
+            end = min(start + self.STEP, cutoff)
+            report = self.downsample_period(start, end)
+            archived += report.archived
+            merged += report.merged
+            deleted += report.deleted
+            # Сутки без отчетов пропускаются.
+            start = self.get_first_hour(end, cutoff)
+        logger.info(
+            f'Weather data downsampled before {cutoff}: archive rows {archived}, '
+            f'merged {merged}, reports deleted {deleted}.'
+        )
+        return DownsampleReport(archived=archived, merged=merged, deleted=deleted)
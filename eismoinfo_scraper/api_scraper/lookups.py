@@ -0,0 +1,260 @@
+import math
+import time
+from typing import NamedTuple
+
+from django.core.cache import cache
+
+from .models import Station
+from .loggers import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class VersionedLookup:
+    """
+    In-memory index of a model shared by all services of the process.
+    The index is rebuilt when the model version stored in the shared cache
+    changes, so changes made by any process reach every worker without
+    a restart. Subclasses define how the index is loaded.
+    """
+
+    _lookups: dict = {}
+
+    def __init__(self, model: type):
+        self.model = model
+        self.version = None
+
+    @classmethod
+    def for_model(cls, model: type):
+        """Return the process-wide index of the model."""
+        key = (cls, model)
+        if key not in cls._lookups:
+            cls._lookups[key] = cls(model)
+        return cls._lookups[key]
+
+    @staticmethod
+    def get_version_key(model: type) -> str:
+        return f'lookup_version:{model._meta.label_lower}'
+
+    @classmethod
+    def bump_version(cls, model: type):
+        """Mark the indexes of the model stale in every process."""
+        cache.set(cls.get_version_key(model), time.time_ns(), timeout=None)
+
+    def load(self):
+        raise NotImplementedError
+
+    def refresh(self, force: bool = False):
+        """Rebuild the index if the model has changed since the last build."""
+        version_key = self.get_version_key(self.model)
+        # Версия отсутствует в кэше(первый запуск, очистка кэша) - задать ее.
+        cache.add(version_key, time.time_ns(), timeout=None)
+        version = cache.get(version_key)
+        if force or version != self.version or version is None:
+            self.load()
+            self.version = version
+            logger.info(f'{self.model.__name__}: {type(self).__name__} rebuilt.')
+
+
+class ParsingModelLookup(VersionedLookup):
+    """
+    value_api -> code index of a parsing model. The version is bumped
+    by the model's post_save and post_delete signals.
+    """
+
+    def __init__(self, model: type):
+        super().__init__(model)
+        self.codes: dict[str, int | None] = {}
+
+    def load(self):
+        self.codes = dict(self.model.objects.values_list('value_api', 'code'))
+
+
+class StationLookup(VersionedLookup):
+    """
+    eismo_station_id -> Station index. The version is bumped by Station
+    signals and by StationQueryService.update_stations_db.
+    """
+
+    def __init__(self, model: type = Station):
+        super().__init__(model)
+        self.stations: dict[int, Station] = {}
+
+    def load(self):
+        self.stations = {
+            station.eismo_station_id: station
+            for station in self.model.objects.all()
+        }
+
+    def get(self, eismo_station_id: int) -> Station:
+        """
+        Вернуть станцию по eismo_station_id. Если станции нет в индексе,
+        индекс перестраивается один раз(станция могла быть только что
+        добавлена). Station.DoesNotExist, если станции нет и в БД.
+        """
+        eismo_station_id = int(eismo_station_id)
+        if eismo_station_id not in self.stations:
+            self.refresh(force=True)
+        try:
+            return self.stations[eismo_station_id]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                f'Station {eismo_station_id} does not exist.'
+            )
+
+
+class StationGrid(NamedTuple):
+    """Ячейки сетки со станциями и границы занятых ячеек(None - станций нет)."""
+    cells: dict[tuple[int, int], list[Station]]
+    extent: tuple[int, int, int, int] | None
+
+
+class StationSpatialIndex(VersionedLookup):
+    """
+    Grid index of station coordinates: stations are bucketed into cells
+    of CELL_SIZE degrees, so nearest and bounding box queries only look
+    at stations of the cells around the point. Shares the Station version
+    with StationLookup, so it is rebuilt when update_stations_db moves
+    or adds stations. The grid is replaced by a single assignment, so
+    a request thread never sees cells and extent of different builds.
+    """
+
+    # Размер ячейки сетки [градусы].
+    CELL_SIZE = 0.1
+    # Длина дуги одного градуса меридиана [км].
+    KM_PER_DEGREE = 6371.0088 * math.pi / 180
+
+    def __init__(self, model: type = Station):
+        super().__init__(model)
+        self.grid = StationGrid(cells={}, extent=None)
+
+    def get_cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.CELL_SIZE), math.floor(longitude / self.CELL_SIZE)
+
+    def load(self):
+        cells = {}
+        for station in self.model.objects.all():
+            cells.setdefault(self.get_cell(station.latitude, station.longitude), []).append(station)
+        # Границы занятых ячеек: за ними поиск не продолжается.
+        extent = None
+        if cells:
+            rows = [row for row, _ in cells]
+            columns = [column for _, column in cells]
+            extent = (min(rows), min(columns), max(rows), max(columns))
+        self.grid = StationGrid(cells=cells, extent=extent)
+
+    @classmethod
+    def get_distance(cls, latitude: float, longitude: float, station: Station) -> float:
+        """Расстояние от точки до станции по большому кругу(haversine) [км]."""
+        phi1, phi2 = math.radians(latitude), math.radians(station.latitude)
+        d_phi = phi2 - phi1
+        d_lambda = math.radians(station.longitude - longitude)
+        a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+        return 2 * math.degrees(math.asin(min(1.0, math.sqrt(a)))) * cls.KM_PER_DEGREE
+
+    @staticmethod
+    def iter_cells(grid: StationGrid, first: tuple[int, int], last: tuple[int, int]):
+        """Станции ячеек прямоугольника first - last, ограниченного занятыми ячейками."""
+        if grid.extent is None:
+            return
+        min_row, min_column, max_row, max_column = grid.extent
+        rows = range(max(first[0], min_row), min(last[0], max_row) + 1)
+        columns = range(max(first[1], min_column), min(last[1], max_column) + 1)
+        # Большой прямоугольник дешевле проверить по занятым ячейкам.
+        if len(rows) * len(columns) > len(grid.cells):
+            for (row, column), stations in grid.cells.items():
+                if row in rows and column in columns:
+                    yield from stations
+            return
+        for row in rows:
+            for column in columns:
+                yield from grid.cells.get((row, column), ())
+
+    def iter_ring(self, grid: StationGrid, row: int, column: int, ring: int):
+        """Станции ячеек на расстоянии ring ячеек от ячейки(row, column)."""
+        if ring == 0:
+            yield from self.iter_cells(grid, (row, column), (row, column))
+            return
+        yield from self.iter_cells(grid, (row - ring, column - ring), (row - ring, column + ring))
+        yield from self.iter_cells(grid, (row + ring, column - ring), (row + ring, column + ring))
+        yield from self.iter_cells(grid, (row - ring + 1, column - ring), (row + ring - 1, column - ring))
+        yield from self.iter_cells(grid, (row - ring + 1, column + ring), (row + ring - 1, column + ring))
+
+    def get_nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        count: int,
+        max_distance: float = None
+    ) -> list[tuple[Station, float]]:
+        """
+        Вернуть count ближайших к точке станций с расстоянием [км]
+        в порядке удаления, не дальше max_distance [км], если задано.
+        Кольца ячеек вокруг точки просматриваются, пока не найдено count
+        станций, затем - все ячейки в радиусе count-й найденной станции.
+        """
+        grid = self.grid
+        if grid.extent is None or count <= 0:
+            return []
+        row, column = self.get_cell(latitude, longitude)
+        min_row, min_column, max_row, max_column = grid.extent
+        # Кольца ближе занятых ячеек пусты.
+        ring = max(0, min_row - row, row - max_row, min_column - column, column - max_column)
+        max_ring = max(row - min_row, max_row - row, column - min_column, max_column - column)
+        distances = []
+        while ring <= max_ring and len(distances) < count:
+            distances.extend(
+                self.get_distance(latitude, longitude, station)
+                for station in self.iter_ring(grid, row, column, ring)
+            )
+            ring += 1
+        distances.sort()
+        radius = distances[min(count, len(distances)) - 1]
+        if max_distance is not None:
+            radius = min(radius, max_distance)
+        # Станции не дальше radius могут лежать и за пределами просмотренных колец.
+        candidates = sorted(
+            (distance, station.eismo_station_id, station)
+            for distance, station in (
+                (self.get_distance(latitude, longitude, station), station)
+                for station in self.iter_radius(grid, latitude, longitude, radius)
+            )
+            if distance <= radius
+        )
+        return [(station, distance) for distance, _, station in candidates[:count]]
+
+    def iter_radius(self, grid: StationGrid, latitude: float, longitude: float, radius: float):
+        """Станции ячеек, покрывающих круг радиуса radius [км] вокруг точки."""
+        d_latitude = radius / self.KM_PER_DEGREE
+        if abs(latitude) + d_latitude >= 90.0:
+            d_longitude = 180.0
+        else:
+            d_longitude = math.degrees(math.asin(min(
+                1.0, math.sin(math.radians(d_latitude)) / math.cos(math.radians(latitude))
+            )))
+        return self.iter_cells(
+            grid,
+            self.get_cell(latitude - d_latitude, longitude - d_longitude),
+            self.get_cell(latitude + d_latitude, longitude + d_longitude)
+        )
+
+    def get_in_bbox(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float
+    ) -> list[Station]:
+        """Вернуть станции внутри прямоугольника координат в порядке eismo_station_id."""
+        stations = [
+            station
+            for station in self.iter_cells(
+                self.grid,
+                self.get_cell(min_latitude, min_longitude),
+                self.get_cell(max_latitude, max_longitude)
+            )
+            if min_latitude <= station.latitude <= max_latitude
+            and min_longitude <= station.longitude <= max_longitude
+        ]
+        return sorted(stations, key=lambda station: station.eismo_station_id)
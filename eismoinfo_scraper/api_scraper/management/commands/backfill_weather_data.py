@@ -0,0 +1,46 @@
+import datetime as dt
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_scraper.weather_data_service import WeatherDataService
+
+
+class Command(BaseCommand):
+    help = (
+        'Load weather data for a date range(UTC) through COPY into a staging table '
+        'and merge it into api_scraper_weatherdata, skipping existing (station, unix) rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', type=str, help='First day of the range, format: 2024-12-23')
+        parser.add_argument('end', type=str, help='Last day of the range(inclusive), format: 2024-12-24')
+        parser.add_argument(
+            '--stations', type=int, nargs='+', default=None,
+            help='eismo_station_id of the stations to load, all stations by default'
+        )
+        parser.add_argument(
+            '--source', type=str, default=None,
+            help='JSON file with eismo reports to load instead of requesting the API'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = dt.datetime.strptime(options['start'], '%Y-%m-%d').replace(tzinfo=dt.timezone.utc)
+            end = dt.datetime.strptime(options['end'], '%Y-%m-%d').replace(tzinfo=dt.timezone.utc)
+        except ValueError:
+            raise CommandError('Required date format: 2024-12-23')
+        if start > end:
+            raise CommandError('start is later than end.')
+
+        service = WeatherDataService(mode='retrospective')
+        result = service.backfill_weather_data(
+            start=start,
+            end=end + dt.timedelta(days=1),
+            station_ids=options['stations'],
+            source=options['source']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Stations: {result.stations}, rows copied: {result.copied}, '
+            f'inserted: {result.inserted}, skipped: {result.copied - result.inserted}, '
+            f'time: {result.seconds:.2f} s, throughput: {result.rows_per_second:.0f} rows/s.'
+        ))
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from api_scraper.requests import HttpClient
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark HttpClient against a local stub HTTP server: '
+        'a new session per request vs the pooled session.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests per run')
+        parser.add_argument('--concurrency', type=int, default=20, help='Simultaneous requests')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run_benchmark(
+            requests_count=options['requests'],
+            concurrency=options['concurrency']
+        ))
+
+    async def run_benchmark(self, requests_count: int, concurrency: int):
+        # Клиентские порты, с которых пришли запросы: один порт - одно TCP соединение.
+        connections = set()
+
+        async def handler(request):
+            connections.add(request.transport.get_extra_info('peername'))
+            return web.json_response([{'id': '1'}])
+
+        app = web.Application()
+        app.router.add_get('/', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f'http://127.0.0.1:{port}/'
+
+        async def fresh_session_request():
+            # Поведение до пула: новая сессия на каждый запрос.
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url) as response:
+                    return await response.json()
+
+        client = HttpClient(limit_per_host=concurrency)
+
+        async def pooled_request():
+            return await client.make_request(url=url)
+
+        try:
+            for name, request in (
+                ('fresh session', fresh_session_request),
+                ('pooled session', pooled_request)
+            ):
+                connections.clear()
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def limited():
+                    async with semaphore:
+                        return await request()
+
+                start = time.perf_counter()
+                await asyncio.gather(*(limited() for _ in range(requests_count)))
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{name:>15}: {requests_count} requests in {elapsed:.3f} s '
+                    f'({requests_count / elapsed:.0f} req/s), '
+                    f'TCP connections opened: {len(connections)}'
+                )
+        finally:
+            await client.close()
+            await runner.cleanup()
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api_scraper.archive import ArchiveException, WeatherDataArchiveService
+
+
+class Command(BaseCommand):
+    help = (
+        'Compact api_scraper_weatherdata reports older than the raw retention period into '
+        'the hourly archive(api_scraper_weatherdataarchive) and delete them. Each day is '
+        'compacted in its own transaction, from the oldest one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Compact reports older than this number of days, '
+                 'WEATHER_DATA_RAW_RETENTION_DAYS by default'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] <= 0:
+            raise CommandError('--days must be positive.')
+        service = WeatherDataArchiveService(raw_retention_days=options['days'])
+        if not service.raw_retention_days:
+            raise CommandError('Downsampling is disabled: WEATHER_DATA_RAW_RETENTION_DAYS is 0.')
+        try:
+            report = service.downsample()
+        except ArchiveException as e:
+            raise CommandError(e.message)
+        self.stdout.write(self.style.SUCCESS(
+            f'Archive rows saved: {report.archived}, merged with late reports: {report.merged}, '
+            f'reports deleted: {report.deleted}.'
+        ))
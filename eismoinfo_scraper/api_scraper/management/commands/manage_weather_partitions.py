@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api_scraper.partitions import PartitionException, WeatherDataPartitionService
+
+
+class Command(BaseCommand):
+    help = (
+        'Maintain monthly range partitions of api_scraper_weatherdata on "UTC": create '
+        'partitions for the current and the following months and drop partitions past '
+        'the retention period. With --convert, turn the plain table into a partitioned '
+        'one first(copies all rows and locks the table, run it in a maintenance window).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', action='store_true',
+            help='Convert the plain table into a partitioned one'
+        )
+        parser.add_argument(
+            '--months-ahead', type=int, default=None,
+            help='Number of months after the current one to create partitions for, '
+                 'WEATHER_DATA_PARTITIONS_AHEAD by default'
+        )
+        parser.add_argument(
+            '--retention-months', type=int, default=None,
+            help='Drop partitions older than this number of months(0 - keep all), '
+                 'WEATHER_DATA_RETENTION_MONTHS by default'
+        )
+
+    def handle(self, *args, **options):
+        service = WeatherDataPartitionService(
+            months_ahead=options['months_ahead'],
+            retention_months=options['retention_months']
+        )
+        try:
+            if options['convert']:
+                report = service.convert()
+                self.stdout.write(self.style.SUCCESS(
+                    f'Converted: partitions created: {len(report.created)}, rows copied: {report.moved}.'
+                ))
+            report = service.maintain()
+        except PartitionException as e:
+            raise CommandError(e.message)
+        self.stdout.write(self.style.SUCCESS(
+            f'Partitions created: {report.created or "none"}, rows moved: {report.moved}, '
+            f'dropped: {report.dropped or "none"}.'
+        ))
@@ -0,0 +1,56 @@
+import datetime as dt
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_scraper.models import Station
+from api_scraper.rollups import WeatherDataRollupService
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute hourly and daily weather data rollups for a date range(UTC) '
+        'from api_scraper_weatherdata, and from the hourly archive(api_scraper_weatherdataarchive) '
+        'for hours that were downsampled. Days are processed from the newest to the oldest, '
+        'so the rolled-up range stays contiguous if the command is interrupted. '
+        'Rollups are read from a station\'s coverage start on, which moves back only '
+        'when the rebuilt range reaches the station\'s newest reports or its current coverage.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', type=str, help='First day of the range, format: 2024-12-23')
+        parser.add_argument('end', type=str, help='Last day of the range(inclusive), format: 2024-12-24')
+        parser.add_argument(
+            '--stations', type=int, nargs='+', default=None,
+            help='eismo_station_id of the stations to roll up, all stations by default'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = dt.datetime.strptime(options['start'], '%Y-%m-%d').replace(tzinfo=dt.timezone.utc)
+            end = dt.datetime.strptime(options['end'], '%Y-%m-%d').replace(tzinfo=dt.timezone.utc)
+        except ValueError:
+            raise CommandError('Required date format: 2024-12-23')
+        if start > end:
+            raise CommandError('start is later than end.')
+
+        station_pks = None
+        if options['stations']:
+            station_pks = list(Station.objects.filter(
+                eismo_station_id__in=options['stations']
+            ).values_list('pk', flat=True))
+
+        service = WeatherDataRollupService()
+        started = time.perf_counter()
+        saved = 0
+        day = end
+        while day >= start:
+            saved += service.update(
+                start=day,
+                end=day + dt.timedelta(days=1) - dt.timedelta(microseconds=1),
+                station_pks=station_pks
+            )
+            day -= dt.timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rollup rows saved: {saved}, time: {time.perf_counter() - started:.2f} s.'
+        ))
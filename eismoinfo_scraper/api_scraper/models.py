@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 import datetime as dt
 
@@ -14,6 +15,23 @@ class Station(models.Model):
     position_change_counter = models.IntegerField(default=0)
     position_change_time = models.DateTimeField(default=None, null=True)
     height = models.FloatField(default=None, null=True)
+    height_updated = models.DateTimeField(default=None, null=True)  # Время получения высоты.
+
+
+class Elevation(models.Model):
+    """Высота над уровнем моря по координатам(кэш ответов сервиса высот)."""
+    created = models.DateTimeField(auto_now_add=True)
+    latitude = models.FloatField()  # Округлены как в запросе к сервису высот.
+    longitude = models.FloatField()
+    height = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['latitude', 'longitude'],
+                name='elevation_coordinates_unique_constraint'
+            )
+        ]
 
 
 class StationRequestResult(models.Model):
@@ -48,6 +66,12 @@ class StationRequestResult(models.Model):
     latest_report_time = models.DateTimeField(blank=True, null=True, max_length=200)
     reports_count = models.PositiveSmallIntegerField(default=0, null=True)
 
+    class Meta:
+        indexes = [
+            # Результаты опроса и метрики за период с фильтром по статусу.
+            models.Index(fields=['request_time', 'status'], name='api_scraper_srr_time_stat_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.request_time_unix:
             self.request_time_unix = int(dt.datetime.now().timestamp())
@@ -111,7 +135,8 @@ class WindDegree(BaseCondition):
 class WeatherData(models.Model):
     station = models.ForeignKey(
         Station, on_delete=models.DO_NOTHING,
-        related_name='weather_data'
+        related_name='weather_data',
+        db_index=False  # Покрывается индексом (station, UTC).
     )
     unix = models.PositiveIntegerField()  # По UTC, приходит от API.
     local = models.DateTimeField()  # Меняется с UTC +2 на UTC +3 30 марта 2025 до последнего воскр октября в контексте приложения автоматически.
@@ -132,8 +157,171 @@ class WeatherData(models.Model):
 
     class Meta:
         constraints = [
+            # UTC определяется unix, но входит в ограничение: уникальные
+            # ограничения секционированной таблицы содержат ключ секционирования.
             models.UniqueConstraint(
-                fields=['station', 'unix'],
+                fields=['station', 'unix', 'UTC'],
                 name='station_unix_unique_constraint'
             )
         ]
+        indexes = [
+            # Выборка get-weather-data по станции за период.
+            models.Index(fields=['station', 'UTC'], name='api_scraper_wd_station_utc_idx'),
+            # Выборка всех станций за период: таблица пополняется по времени,
+            # поэтому BRIN по UTC компактен и отсекает лишние блоки.
+            BrinIndex(fields=['UTC'], name='api_scraper_wd_utc_brin_idx'),
+        ]
+
+
+class WeatherDataRollup(models.Model):
+    """
+    Агрегаты погодных данных станции за час или сутки по UTC.
+    Для каждого показателя хранятся min, max, сумма и количество
+    непустых значений(среднее = сумма / количество). Строки
+    пересчитываются из WeatherData после каждой записи отчетов.
+    """
+    class Bucket(models.TextChoices):
+        HOUR = 'hour'
+        DAY = 'day'
+
+    station = models.ForeignKey(
+        Station, on_delete=models.DO_NOTHING,
+        related_name='weather_data_rollups',
+        db_index=False  # Покрывается ограничением уникальности (station, bucket, bucket_start).
+    )
+    bucket = models.CharField(choices=Bucket.choices, max_length=10)
+    bucket_start = models.DateTimeField()  # Начало интервала по UTC.
+    reports_count = models.PositiveIntegerField()
+    temperature_air_min = models.FloatField(null=True)
+    temperature_air_max = models.FloatField(null=True)
+    temperature_air_sum = models.FloatField(null=True)
+    temperature_air_count = models.PositiveIntegerField(default=0)
+    surface_temp_min = models.FloatField(null=True)
+    surface_temp_max = models.FloatField(null=True)
+    surface_temp_sum = models.FloatField(null=True)
+    surface_temp_count = models.PositiveIntegerField(default=0)
+    wind_m_s_max_min = models.FloatField(null=True)
+    wind_m_s_max_max = models.FloatField(null=True)
+    wind_m_s_max_sum = models.FloatField(null=True)
+    wind_m_s_max_count = models.PositiveIntegerField(default=0)
+    precipitation_amount_min = models.FloatField(null=True)
+    precipitation_amount_max = models.FloatField(null=True)
+    precipitation_amount_sum = models.FloatField(null=True)
+    precipitation_amount_count = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['station', 'bucket', 'bucket_start'],
+                name='station_bucket_start_unique_constraint'
+            )
+        ]
+        indexes = [
+            # Выборка агрегатов всех станций за период.
+            models.Index(fields=['bucket', 'bucket_start'], name='api_scraper_wdr_bucket_idx'),
+        ]
+
+
+class WeatherDataRollupCoverage(models.Model):
+    """
+    Начало периода, с которого агрегаты станции ведутся без пропусков:
+    все интервалы bucket станции начиная со start есть в WeatherDataRollup.
+    Интервалы раньше start рассчитываются при чтении из исходных данных.
+    """
+    station = models.ForeignKey(
+        Station, on_delete=models.CASCADE,
+        related_name='weather_data_rollup_coverages',
+        db_index=False  # Покрывается ограничением уникальности (station, bucket).
+    )
+    bucket = models.CharField(choices=WeatherDataRollup.Bucket.choices, max_length=10)
+    start = models.DateTimeField()  # Начало первого интервала по UTC.
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['station', 'bucket'],
+                name='rollup_coverage_station_bucket_unique_constraint'
+            )
+        ]
+
+
+class WeatherDataArchive(models.Model):
+    """
+    Почасовой архив погодных данных: отчеты WeatherData старше срока
+    хранения сырых данных сжимаются в одну строку на станцию и час UTC.
+    Поля с именами полей WeatherData содержат среднее(коды явлений - самое
+    частое значение), поэтому архив читается теми же запросами API.
+    Для показателей также хранятся min, max, последнее непустое значение
+    и количество непустых значений(для точного пересчета агрегатов).
+    """
+    station = models.ForeignKey(
+        Station, on_delete=models.DO_NOTHING,
+        related_name='weather_data_archive',
+        db_index=False  # Покрывается ограничением уникальности (station, UTC).
+    )
+    unix = models.PositiveIntegerField()  # Начало часа по UTC.
+    local = models.DateTimeField()  # Начало часа по Литве.
+    UTC = models.DateTimeField()  # Начало часа.
+    time_zone_offset = models.IntegerField()  # = local - utc [minutes]
+    created = models.DateTimeField(auto_now_add=True)
+    reports_count = models.PositiveIntegerField()  # Количество сжатых отчетов.
+    # Самое частое значение кода явления за час.
+    surface_cond = models.IntegerField(null=True)
+    wind_degree = models.IntegerField(null=True)
+    precipitation_type = models.IntegerField(null=True)
+    # Среднее, min, max, последнее непустое значение
+    # и количество непустых значений показателя за час.
+    temperature_air = models.FloatField(null=True)
+    temperature_air_min = models.FloatField(null=True)
+    temperature_air_max = models.FloatField(null=True)
+    temperature_air_last = models.FloatField(null=True)
+    temperature_air_count = models.PositiveIntegerField(default=0)
+    surface_temp = models.FloatField(null=True)
+    surface_temp_min = models.FloatField(null=True)
+    surface_temp_max = models.FloatField(null=True)
+    surface_temp_last = models.FloatField(null=True)
+    surface_temp_count = models.PositiveIntegerField(default=0)
+    visibility = models.FloatField(null=True)
+    visibility_min = models.IntegerField(null=True)
+    visibility_max = models.IntegerField(null=True)
+    visibility_last = models.IntegerField(null=True)
+    visibility_count = models.PositiveIntegerField(default=0)
+    wind_m_s_avg = models.FloatField(null=True)
+    wind_m_s_avg_min = models.FloatField(null=True)
+    wind_m_s_avg_max = models.FloatField(null=True)
+    wind_m_s_avg_last = models.FloatField(null=True)
+    wind_m_s_avg_count = models.PositiveIntegerField(default=0)
+    wind_m_s_max = models.FloatField(null=True)
+    wind_m_s_max_min = models.FloatField(null=True)
+    wind_m_s_max_max = models.FloatField(null=True)
+    wind_m_s_max_last = models.FloatField(null=True)
+    wind_m_s_max_count = models.PositiveIntegerField(default=0)
+    precipitation_amount = models.FloatField(null=True)
+    precipitation_amount_min = models.FloatField(null=True)
+    precipitation_amount_max = models.FloatField(null=True)
+    precipitation_amount_last = models.FloatField(null=True)
+    precipitation_amount_count = models.PositiveIntegerField(default=0)
+    dew_point = models.FloatField(null=True)
+    dew_point_min = models.FloatField(null=True)
+    dew_point_max = models.FloatField(null=True)
+    dew_point_last = models.FloatField(null=True)
+    dew_point_count = models.PositiveIntegerField(default=0)
+    frost_point = models.FloatField(null=True)
+    frost_point_min = models.FloatField(null=True)
+    frost_point_max = models.FloatField(null=True)
+    frost_point_last = models.FloatField(null=True)
+    frost_point_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['station', 'UTC'],
+                name='archive_station_utc_unique_constraint'
+            )
+        ]
+        indexes = [
+            # Граница архива(последний сжатый час) и выборка всех станций за период.
+            models.Index(fields=['UTC'], name='api_scraper_wda_utc_idx'),
+        ]
@@ -1,8 +1,10 @@
 import math
+import time
 import datetime as dt
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import QuerySet
+from functools import lru_cache
+from operator import itemgetter
 from typing import NamedTuple
 
 from .models import (
@@ -10,6 +12,8 @@ from .models import (
     SurfaceCondition, WindDegree
 )
 
+from .instrumentation import batch_parse_duration, batch_parse_rows, report_parse_duration
+from .lookups import ParsingModelLookup, StationLookup
 from .loggers import get_logger
 
 logger = get_logger(__name__)
@@ -18,11 +22,11 @@ logger = get_logger(__name__)
 class ParsingModelTuple(NamedTuple):
     """
     A tuple that contains a parsing model class,
-    its existing queryset and a collection of unknown API values
+    its value_api -> code index and a collection of unknown API values
     obtained during the last parsing, that have to be assigned with a code.
     """
     model: type
-    queryset: QuerySet
+    lookup: ParsingModelLookup
     unregistered_values: set
 
 
@@ -36,27 +40,28 @@ class DataComplianceTuple(NamedTuple):
     target_type: callable
 
 
+# Формат времени отчета(по Литве) в ответе API.
+LOCAL_TIME_FORMAT = '%Y-%m-%d %H:%M'
+
+
+@lru_cache(maxsize=100_000)
+def parse_local_time(value: str) -> dt.datetime:
+    """
+    Преобразовать время отчета из формата API. Отчеты станций
+    снимаются в одни и те же моменты, поэтому результат кэшируется.
+    """
+    return dt.datetime.strptime(value, LOCAL_TIME_FORMAT)  # ValueError, TypeError
+
+
 class WeatherDictParser:
     """
     Класс для парсинга словаря от API в формат БД.
     """
 
-    PARSING_MODELS_DICT = {
-        'precipitation_type': ParsingModelTuple(
-            model=PrecipitationType,
-            queryset=PrecipitationType.objects.all(),
-            unregistered_values=set()
-        ),
-        'surface_cond': ParsingModelTuple(
-            model=SurfaceCondition,
-            queryset=SurfaceCondition.objects.all(),
-            unregistered_values=set()
-        ),
-        'wind_degree': ParsingModelTuple(
-            model=WindDegree,
-            queryset=WindDegree.objects.all(),
-            unregistered_values=set()
-        )
+    PARSING_MODELS = {
+        'precipitation_type': PrecipitationType,
+        'surface_cond': SurfaceCondition,
+        'wind_degree': WindDegree
     }
 
     DATA_COMPLIANCE = [
@@ -80,7 +85,8 @@ class WeatherDictParser:
             self,
             mode: str,
             data_compliance_arr: list[DataComplianceTuple] = None,
-            parsing_models_dict: dict[ParsingModelTuple] = None
+            parsing_models_dict: dict[ParsingModelTuple] = None,
+            station_lookup: StationLookup = None
             ):
         self.mode = mode
         if data_compliance_arr is None:
@@ -88,9 +94,21 @@ class WeatherDictParser:
         self.data_compliance_arr = data_compliance_arr
 
         if parsing_models_dict is None:
-            parsing_models_dict = self.PARSING_MODELS_DICT
+            parsing_models_dict = {
+                db_fieldname: ParsingModelTuple(
+                    model=model,
+                    lookup=ParsingModelLookup.for_model(model),
+                    unregistered_values=set()
+                )
+                for db_fieldname, model in self.PARSING_MODELS.items()
+            }
         self.parsing_models_dict = parsing_models_dict
 
+        # Индекс станций по eismo_station_id для текущих погодных данных.
+        if station_lookup is None:
+            station_lookup = StationLookup.for_model(Station)
+        self.station_lookup = station_lookup
+
         # Станции, которые повторно опрашиваем,
         # когда от них пришли неизвестные значения.
         self.stations_to_refetch = set()
@@ -105,9 +123,36 @@ class WeatherDictParser:
             else:
                 logger.warning(f'{db_fieldname}: unregistered values: {parsing_model_tuple.unregistered_values}')
                 for unregistered_value in parsing_model_tuple.unregistered_values:
-                    parsing_model_tuple.model.objects.create(value_api=unregistered_value)
+                    parsing_model_tuple.model.objects.get_or_create(value_api=unregistered_value)
+                parsing_model_tuple.unregistered_values.clear()
         logger.info('Adding unregistered values to the parsing models completed.')
 
+    def get_unregistered_values(self) -> dict[str, list]:
+        """
+        Вернуть неизвестные значения API по полям в виде, пригодном
+        для передачи между задачами Celery(JSON).
+        """
+        return {
+            db_fieldname: sorted(parsing_model_tuple.unregistered_values, key=str)
+            for db_fieldname, parsing_model_tuple in self.parsing_models_dict.items()
+        }
+
+    def add_unregistered_values(self, unregistered_values: dict[str, list]):
+        """
+        Добавить неизвестные значения, полученные другим парсером
+        (см. get_unregistered_values).
+        """
+        for db_fieldname, values in unregistered_values.items():
+            self.parsing_models_dict[db_fieldname].unregistered_values.update(values)
+
+    def refresh_parsing_models(self):
+        """
+        Перестроить индексы парсинговых моделей, измененные с момента
+        последнего построения.
+        """
+        for parsing_model_tuple in self.parsing_models_dict.values():
+            parsing_model_tuple.lookup.refresh()
+
     def parse_value(self, db_fieldname, target_type, value, station):
         """
         Преобразовать значение, полученное от api в ожидаемый тип данных
@@ -118,15 +163,12 @@ class WeatherDictParser:
         if value is None:
             return None
         elif target_type is None:
-            # Получить объекты соответствующей парсинговой модели.
-            queryset = self.parsing_models_dict[db_fieldname].queryset
-
+            # Получить индекс value_api -> code соответствующей парсинговой модели.
+            codes = self.parsing_models_dict[db_fieldname].lookup.codes
 
-            # Вернуть код первого совпадения с парсинговой моделью или None.
-            matching_entry = next((entry for entry in queryset if entry.value_api == value), None)
-
-            if matching_entry:
-                return matching_entry.code
+            # Вернуть код совпадения с парсинговой моделью.
+            if value in codes:
+                return codes[value]
             elif db_fieldname == 'wind_degree':
                 try:
                     parsed_value = int(value)
@@ -150,7 +192,7 @@ class WeatherDictParser:
                 return None
 
         elif target_type == dt.datetime:
-            parsed_value = dt.datetime.strptime(value, "%Y-%m-%d %H:%M")  # ValueError, TypeError
+            parsed_value = parse_local_time(value)  # ValueError, TypeError
             return parsed_value
         else:
             parsed_value = target_type(value)  # ValueError, TypeError
@@ -182,11 +224,9 @@ class WeatherDictParser:
         от api, в словарь формата базы данных.
         """
         parsed_report = {}
+        station = self.station_lookup.get(eismo_report['id'])  # KeyError, ValueError
         # ValueError, TypeError
         for data_compliance_tuple in self.data_compliance_arr:
-            station = Station.objects.get(
-                eismo_station_id=eismo_report['id']
-            )
             value = eismo_report[data_compliance_tuple.eismo_key]  # KeyError
             parsed_report[data_compliance_tuple.db_fieldname] = self.parse_value(
                 data_compliance_tuple.db_fieldname,
@@ -205,11 +245,9 @@ class WeatherDictParser:
         от api, в словарь формата базы данных.
         """
         parsed_report = {}
+        station = self.station_lookup.get(eismo_report['id'])  # KeyError, ValueError
         # ValueError, TypeError
         for data_compliance_tuple in self.data_compliance_arr:
-            station = Station.objects.get(
-                eismo_station_id=eismo_report['id']
-            )
             value = eismo_report[data_compliance_tuple.eismo_key]  # KeyError
             parsed_report[data_compliance_tuple.db_fieldname] = self.parse_value(
                 data_compliance_tuple.db_fieldname,
@@ -239,8 +277,13 @@ class WeatherDictParser:
         """
         Преобразовать массив словарей в формат базы данных.
         """
+        self.refresh_parsing_models()
+        if self.mode != 'retrospective':
+            self.station_lookup.refresh()
         parsed_weather_reports = []
+        parse_duration = report_parse_duration.labels(mode=self.mode)
         for eismo_report in eismo_reports:
+            start = time.perf_counter()
             if self.mode == 'retrospective':
                 parsed_report = self.parse_retrospective_report(
                     station=station,
@@ -256,4 +299,97 @@ class WeatherDictParser:
                     eismo_report=eismo_report
                 )
                 parsed_weather_reports.append(parsed_report)
+            parse_duration.observe(time.perf_counter() - start)
         return parsed_weather_reports
+
+    def parse_column(
+        self,
+        db_fieldname: str,
+        target_type: callable,
+        values: tuple,
+        eismo_station_ids: list[int]
+    ) -> list:
+        """
+        Преобразовать колонку значений, полученных от api, так же, как
+        parse_value, но одним проходом по колонке.
+        """
+        if target_type is None:
+            parsing_model_tuple = self.parsing_models_dict[db_fieldname]
+            codes = parsing_model_tuple.lookup.codes
+            column = []
+            for value, eismo_station_id in zip(values, eismo_station_ids):
+                if value is None:
+                    column.append(None)
+                elif value in codes:
+                    # Значение, которому код еще не присвоен, сохраняется как null.
+                    column.append(codes[value])
+                else:
+                    # Добавить неизвестное значение в список для присвоения кода.
+                    parsing_model_tuple.unregistered_values.add(value)
+                    # Добавить станцию в список для повторного опроса.
+                    self.stations_to_refetch.add(eismo_station_id)
+                    column.append(None)
+            return column
+
+        if target_type == dt.datetime:
+            target_type = parse_local_time
+        if None in values:
+            return [None if value is None else target_type(value) for value in values]
+        return list(map(target_type, values))  # ValueError, TypeError
+
+    def get_parsed_weather_columns(
+        self,
+        eismo_reports: list[dict],
+        station: Station = None,
+        start: dt.datetime = None,
+        end: dt.datetime = None
+    ) -> dict[str, list]:
+        """
+        Преобразовать массив словарей от api в колонки значений формата БД
+        (db_fieldname -> список значений). Если задан период [start, end),
+        остаются только отчеты, время сбора которых(unix) в этом периоде.
+        Без станции(текущая погода) станции определяются по id отчетов.
+        """
+        start_time = time.perf_counter()
+        self.refresh_parsing_models()
+        if station is None:
+            self.station_lookup.refresh()
+
+        db_fieldnames = [t.db_fieldname for t in self.data_compliance_arr]
+        # Строки значений в порядке DATA_COMPLIANCE.
+        rows = list(map(
+            itemgetter(*(t.eismo_key for t in self.data_compliance_arr)),
+            eismo_reports
+        ))  # KeyError
+        if start is not None:
+            unix_index = db_fieldnames.index('unix')
+            start_unix, end_unix = start.timestamp(), end.timestamp()
+            rows = [row for row in rows if start_unix <= int(row[unix_index]) < end_unix]
+        raw_columns = dict(zip(db_fieldnames, zip(*rows))) if rows else {
+            db_fieldname: () for db_fieldname in db_fieldnames
+        }
+
+        if station is None:
+            stations = [
+                self.station_lookup.get(eismo_station_id)  # KeyError, ValueError
+                for eismo_station_id in raw_columns['eismo_station_id']
+            ]
+        else:
+            stations = [station] * len(rows)
+        eismo_station_ids = [station.eismo_station_id for station in stations]
+
+        columns = {
+            t.db_fieldname: self.parse_column(
+                t.db_fieldname, t.target_type, raw_columns[t.db_fieldname], eismo_station_ids
+            )
+            for t in self.data_compliance_arr
+        }
+        columns['station'] = [station.pk for station in stations]  # ForeignKey на Station.
+        columns['UTC'] = [dt.datetime.fromtimestamp(unix) for unix in columns['unix']]
+        columns['time_zone_offset'] = [
+            math.ceil((local - utc).total_seconds() / 60)
+            for local, utc in zip(columns['local'], columns['UTC'])
+        ]
+        batch_parse_duration.labels(mode=self.mode).observe(time.perf_counter() - start_time)
+        batch_parse_rows.labels(mode=self.mode).observe(len(rows))
+        return columns
@@ -1,11 +1,15 @@
-# import time
+import time
 
 import aiohttp
 import asyncio
 import math
 
+from django.conf import settings
 from requests import Response
 
+from .instrumentation import (
+    http_backoff_seconds, http_request_duration, http_request_retries
+)
 from .loggers import get_logger
 
 
@@ -13,6 +17,87 @@ logger = get_logger(__name__)
 
 
 class HttpClient:
+    """
+    Asynchronous HTTP client with a long-lived pooled session.
+    The session is created lazily inside the running event loop and
+    reused by every request (and every retry) made in that loop.
+    """
+
+    # Upstream label of the request metrics.
+    UPSTREAM = 'default'
+
+    def __init__(
+        self,
+        limit: int = None,
+        limit_per_host: int = None,
+        keepalive_timeout: float = None,
+        dns_cache_ttl: int = None
+    ):
+        self.limit = (
+            settings.HTTP_CLIENT_LIMIT if limit is None else limit
+        )
+        self.limit_per_host = (
+            settings.HTTP_CLIENT_LIMIT_PER_HOST
+            if limit_per_host is None else limit_per_host
+        )
+        self.keepalive_timeout = (
+            settings.HTTP_CLIENT_KEEPALIVE_TIMEOUT
+            if keepalive_timeout is None else keepalive_timeout
+        )
+        self.dns_cache_ttl = (
+            settings.HTTP_CLIENT_DNS_CACHE_TTL
+            if dns_cache_ttl is None else dns_cache_ttl
+        )
+        self._session = None
+        self._session_loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the pooled session of the running event loop.
+        A session can't outlive its event loop, so a new one is opened
+        when the client is used from another loop.
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Close the pooled session and release its connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    def run(self, coro):
+        """
+        Run a coroutine in a new event loop and close the pooled session
+        before the loop is torn down.
+        """
+        async def run_and_close():
+            try:
+                return await coro
+            finally:
+                await self.close()
+        return asyncio.run(run_and_close())
 
     async def make_request(self, url: str, params: dict = None,
                            max_retries=3, backoff_factor=1, logging=True) -> Response | None:
@@ -22,38 +107,51 @@ class HttpClient:
         :return: The response object if the request is successful;
         None otherwise.
         """
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(max_retries + 2):  # 0, 1, 2, 3, 4
-                if attempt > max_retries and logging:
-                    logger.error(f'Max retries exceeded for url {url}')
-                    return None
-                try:
-                    async with session.get(url=url, params=params) as response:
-                        response.raise_for_status()  # Raise an error for bad responses (4xx or 5xx)
-                        if response.status == 200:
-                            return await response.json()
-                        elif response.status < 400:  # 1xx and 3xx
-                            logger.error(
-                                f'Http request error: '
-                                f'recieved informational or redirectional '
-                                f'response status code: {response.status}'
-                            )
-                            raise aiohttp.http_exceptions.HttpProcessingError
-                except (
-                    aiohttp.ClientError,
-                    aiohttp.http_exceptions.HttpProcessingError
-                ) as err:
-                    logger.error(f'Http request error: {err}')
-
-                    # Calculate wait time using exponential backoff
-                    wait_time = backoff_factor * (2 ** attempt)
-                    if attempt <= max_retries and logging:
-                        logger.info(f'Retrying in {wait_time} seconds...')
-                    await asyncio.sleep(wait_time)  # Non-blocking sleep
+        session = await self.get_session()
+        for attempt in range(max_retries + 2):  # 0, 1, 2, 3, 4
+            if attempt > max_retries and logging:
+                logger.error(f'Max retries exceeded for url {url}')
+                return None
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                async with session.get(url=url, params=params) as response:
+                    response.raise_for_status()  # Raise an error for bad responses (4xx or 5xx)
+                    if response.status == 200:
+                        result = await response.json()
+                        outcome = 'success'
+                        return result
+                    elif response.status < 400:  # 1xx and 3xx
+                        logger.error(
+                            f'Http request error: '
+                            f'recieved informational or redirectional '
+                            f'response status code: {response.status}'
+                        )
+                        raise aiohttp.http_exceptions.HttpProcessingError
+            except (
+                aiohttp.ClientError,
+                aiohttp.http_exceptions.HttpProcessingError
+            ) as err:
+                logger.error(f'Http request error: {err}')
+            else:
+                continue  # Other 2xx statuses are retried without backoff.
+            finally:
+                http_request_duration.labels(
+                    upstream=self.UPSTREAM, outcome=outcome
+                ).observe(time.perf_counter() - start)
+
+            # Calculate wait time using exponential backoff
+            wait_time = backoff_factor * (2 ** attempt)
+            if attempt <= max_retries and logging:
+                logger.info(f'Retrying in {wait_time} seconds...')
+            http_request_retries.labels(upstream=self.UPSTREAM).inc()
+            http_backoff_seconds.labels(upstream=self.UPSTREAM).inc(wait_time)
+            await asyncio.sleep(wait_time)  # Non-blocking sleep
 
 
 class WeatherDataHttpClient(HttpClient):
     BASE_URL = 'http://eismoinfo.lt'
+    UPSTREAM = 'eismoinfo'
 
     def get_current_weather(self):
         url = f'{self.BASE_URL}/weather-conditions-service/'
@@ -82,22 +180,36 @@ class WeatherDataHttpClient(HttpClient):
 
 
 class StationDataHttpClient(HttpClient):
-    def fetch_station_height(
+    UPSTREAM = 'elevation'
+    # Number of decimal places of the coordinates sent to the elevation service.
+    COORDINATE_PRECISION = 3
+
+    @classmethod
+    def truncate_coordinates(cls, latitude: float, longitude: float) -> tuple[float, float]:
+        """
+        Truncate coordinates to the precision of the elevation request.
+        Stations with equal truncated coordinates share one elevation.
+        """
+        multiplier = 10 ** cls.COORDINATE_PRECISION
+        return (
+            math.floor(latitude * multiplier) / multiplier,
+            math.floor(longitude * multiplier) / multiplier
+        )
+
+    async def fetch_station_height(
             self, station_id, latitude: float, longitude: float
             ):
         url = 'https://elevation.gismeteo.dev/'
-        multiplier = 10 ** 3
-        latitude = math.floor(latitude * multiplier) / multiplier
-        latitude = math.floor(latitude * multiplier) / multiplier
+        latitude, longitude = self.truncate_coordinates(latitude, longitude)
         params = {
             'lat': latitude,
             'lng': longitude
         }
-        resp = self.make_request(
+        resp = await self.make_request(
             url=url, params=params,
             max_retries=0, logging=False
             )
-        if resp:
+        if resp is not None:  # 0 is a valid height.
             return resp
         logger.error(
             f'Station {station_id}: max retries exceeded. Get station height failed.'
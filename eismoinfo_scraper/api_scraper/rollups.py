@@ -0,0 +1,344 @@
+import datetime as dt
+import heapq
+import itertools
+
+from django.db.models import Count, Exists, F, FloatField, Max, Min, OuterRef, QuerySet, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .archive import WeatherDataArchiveService
+from .models import Station, WeatherData, WeatherDataArchive, WeatherDataRollup, WeatherDataRollupCoverage
+from .loggers import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class WeatherDataRollupService:
+    """
+    Класс для ведения и чтения агрегатов погодных данных(WeatherDataRollup).
+    После записи отчетов станции интервалы, в которые они попали, целиком
+    пересчитываются из WeatherData одним запросом GROUP BY и сохраняются
+    через INSERT ... ON CONFLICT DO UPDATE, поэтому повторная запись
+    отчетов не искажает агрегаты. Для каждой станции хранится начало
+    периода, с которого агрегаты ведутся без пропусков
+    (WeatherDataRollupCoverage). Интервалы станции раньше него(данные
+    до внедрения агрегатов, см. команду rebuild_weather_rollups)
+    агрегируются из WeatherData при чтении.
+    Часы до границы почасового архива агрегируются из WeatherDataArchive
+    вместе с отчетами, загруженными за эти часы после сжатия.
+    """
+
+    # Агрегируемые показатели.
+    METRICS = ('temperature_air', 'surface_temp', 'wind_m_s_max', 'precipitation_amount')
+    # Агрегаты показателя, хранимые в таблице.
+    AGGREGATES = {'min': Min, 'max': Max, 'sum': Sum, 'count': Count}
+    # Длительность интервала.
+    BUCKET_STEPS = {
+        WeatherDataRollup.Bucket.HOUR: dt.timedelta(hours=1),
+        WeatherDataRollup.Bucket.DAY: dt.timedelta(days=1),
+    }
+    UNIQUE_FIELDS = ['station', 'bucket', 'bucket_start']
+    BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        model=WeatherDataRollup,
+        batch_size: int = None,
+        archive_service=WeatherDataArchiveService(),
+        coverage_model=WeatherDataRollupCoverage
+    ):
+        self.model = model
+        self.coverage_model = coverage_model
+        self.archive_service = archive_service
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.aggregate_fields = [
+            f'{metric}_{aggregate}'
+            for metric in self.METRICS
+            for aggregate in self.AGGREGATES
+        ]
+
+    @staticmethod
+    def to_utc(moment: dt.datetime) -> dt.datetime:
+        """
+        Привести время к UTC. Наивное время, как и при записи
+        отчетов, считается заданным в текущем часовом поясе.
+        """
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, timezone.get_current_timezone())
+        return moment.astimezone(dt.timezone.utc)
+
+    def truncate(self, bucket: str, moment: dt.datetime) -> dt.datetime:
+        """Вернуть начало интервала bucket, содержащего момент времени."""
+        moment = self.to_utc(moment).replace(minute=0, second=0, microsecond=0)
+        if bucket == WeatherDataRollup.Bucket.DAY:
+            moment = moment.replace(hour=0)
+        return moment
+
+    def get_raw_aggregates(
+        self,
+        bucket: str,
+        start: dt.datetime,
+        end: dt.datetime,
+        station_pks: list[int] = None
+    ) -> QuerySet:
+        """
+        Агрегировать отчеты WeatherData с UTC в [start, end)
+        по станциям и интервалам bucket одним запросом GROUP BY.
+        """
+        queryset = WeatherData.objects.filter(UTC__gte=start, UTC__lt=end)
+        if station_pks is not None:
+            queryset = queryset.filter(station__in=station_pks)
+        return queryset.annotate(
+            bucket_start=Trunc('UTC', bucket, tzinfo=dt.timezone.utc)
+        ).values('station', 'bucket_start').annotate(
+            reports_count=Count('id'),
+            **{
+                f'{metric}_{aggregate}': function(metric)
+                for metric in self.METRICS
+                for aggregate, function in self.AGGREGATES.items()
+            }
+        ).order_by()
+
+    def get_archive_aggregates(
+        self,
+        bucket: str,
+        start: dt.datetime,
+        end: dt.datetime,
+        station_pks: list[int] = None
+    ) -> QuerySet:
+        """
+        Агрегировать строки почасового архива с UTC в [start, end)
+        по станциям и интервалам bucket. Сумма показателя
+        восстанавливается как среднее часа * количество значений.
+        """
+        queryset = WeatherDataArchive.objects.filter(UTC__gte=start, UTC__lt=end)
+        if station_pks is not None:
+            queryset = queryset.filter(station__in=station_pks)
+        aggregates = {}
+        for metric in self.METRICS:
+            aggregates[f'{metric}_min'] = Min(f'{metric}_min')
+            aggregates[f'{metric}_max'] = Max(f'{metric}_max')
+            aggregates[f'{metric}_sum'] = Sum(
+                F(metric) * F(f'{metric}_count'), output_field=FloatField()
+            )
+            aggregates[f'{metric}_count'] = Sum(f'{metric}_count')
+        return queryset.annotate(
+            bucket_start=Trunc('UTC', bucket, tzinfo=dt.timezone.utc)
+        ).values('station', 'bucket_start').annotate(
+            reports_count=Sum('reports_count'),
+            **aggregates
+        ).order_by()
+
+    def get_source_aggregates(
+        self,
+        bucket: str,
+        start: dt.datetime,
+        end: dt.datetime,
+        station_pks: list[int] = None
+    ):
+        """
+        Вернуть генератор агрегатов интервалов bucket за [start, end)
+        в порядке станции и времени: часы до границы архива агрегируются
+        из WeatherDataArchive, отчеты WeatherData - за весь период(в том
+        числе загруженные за уже сжатые часы). Агрегаты интервала из обоих
+        источников объединяются.
+        """
+        horizon = self.archive_service.get_horizon()
+        sources = [self.get_raw_aggregates(bucket=bucket, start=start, end=end, station_pks=station_pks)]
+        if horizon is not None and start < horizon:
+            sources.append(self.get_archive_aggregates(
+                bucket=bucket, start=start, end=min(end, horizon), station_pks=station_pks
+            ))
+        rows = heapq.merge(
+            *(
+                source.order_by('station', 'bucket_start').iterator(chunk_size=self.batch_size)
+                for source in sources
+            ),
+            key=lambda row: (row['station'], row['bucket_start'])
+        )
+        for _, group in itertools.groupby(rows, key=lambda row: (row['station'], row['bucket_start'])):
+            yield self.combine(list(group))
+
+    def combine(self, rows: list[dict]) -> dict:
+        """Объединить агрегаты одного интервала, рассчитанные по разным источникам."""
+        if len(rows) == 1:
+            return rows[0]
+        combined = {
+            'station': rows[0]['station'],
+            'bucket_start': rows[0]['bucket_start'],
+            'reports_count': sum(row['reports_count'] for row in rows),
+        }
+        for metric in self.METRICS:
+            for aggregate, function in (('min', min), ('max', max), ('sum', sum)):
+                values = [row[f'{metric}_{aggregate}'] for row in rows if row[f'{metric}_{aggregate}'] is not None]
+                combined[f'{metric}_{aggregate}'] = function(values) if values else None
+            combined[f'{metric}_count'] = sum(row[f'{metric}_count'] for row in rows)
+        return combined
+
+    def update(
+        self,
+        start: dt.datetime,
+        end: dt.datetime,
+        station_pks: list[int] = None
+    ) -> int:
+        """
+        Пересчитать агрегаты всех интервалов, содержащих моменты
+        времени из [start, end], для станций station_pks(всех по умолчанию)
+        и расширить период покрытия станций.
+        Вернуть количество сохраненных строк агрегатов.
+        """
+        saved = 0
+        for bucket, step in self.BUCKET_STEPS.items():
+            bucket_start = self.truncate(bucket, start)
+            bucket_end = self.truncate(bucket, end) + step
+            rows = self.get_source_aggregates(
+                bucket=bucket,
+                start=bucket_start,
+                end=bucket_end,
+                station_pks=station_pks
+            )
+            batch = []
+            for row in rows:
+                batch.append(self.model(bucket=bucket, station_id=row.pop('station'), **row))
+                if len(batch) == self.batch_size:
+                    saved += self.save(batch)
+                    batch = []
+            saved += self.save(batch)
+            self.extend_coverage(bucket, bucket_start, bucket_end, station_pks)
+        return saved
+
+    def save(self, rollups: list[WeatherDataRollup]) -> int:
+        """Вставить агрегаты, заменяя уже сохраненные для тех же интервалов."""
+        if rollups:
+            self.model.objects.bulk_create(
+                rollups,
+                update_conflicts=True,
+                unique_fields=self.UNIQUE_FIELDS,
+                update_fields=['reports_count', *self.aggregate_fields, 'updated']
+            )
+        return len(rollups)
+
+    def get_coverage(self, bucket: str, station_pks: list[int] = None) -> dict[int, dt.datetime]:
+        """
+        Вернуть начало периода покрытия станций(pk -> начало интервала bucket):
+        агрегаты станции ведутся для всех интервалов начиная с него.
+        Станций без покрытия в словаре нет.
+        """
+        queryset = self.coverage_model.objects.filter(bucket=bucket)
+        if station_pks is not None:
+            queryset = queryset.filter(station__in=station_pks)
+        return dict(queryset.values_list('station', 'start'))
+
+    def extend_coverage(
+        self,
+        bucket: str,
+        start: dt.datetime,
+        end: dt.datetime,
+        station_pks: list[int] = None
+    ):
+        """
+        Расширить покрытие станций после пересчета интервалов [start, end).
+        Покрытие станции сдвигается на start, только если пересчитанный
+        период примыкает к нему: иначе между ними остались бы интервалы
+        без агрегатов(бэкфилл старых дат). Станции без покрытия оно
+        назначается, если у станции нет отчетов позже end.
+        """
+        coverage = self.get_coverage(bucket, station_pks)
+        stations = Station.objects.all()
+        if station_pks is not None:
+            stations = stations.filter(pk__in=station_pks)
+        stations = stations.annotate(
+            has_later_reports=Exists(WeatherData.objects.filter(station=OuterRef('pk'), UTC__gte=end))
+        ).values_list('pk', 'has_later_reports')
+        coverages = []
+        for station_pk, has_later_reports in stations:
+            current = coverage.get(station_pk)
+            if current is None and has_later_reports:
+                continue
+            if current is None or start < current <= end:
+                coverages.append(self.coverage_model(station_id=station_pk, bucket=bucket, start=start))
+        if coverages:
+            self.coverage_model.objects.bulk_create(
+                coverages,
+                update_conflicts=True,
+                unique_fields=['station', 'bucket'],
+                update_fields=['start', 'updated']
+            )
+
+    def get_aggregates(
+        self,
+        bucket: str,
+        start: dt.datetime,
+        end: dt.datetime,
+        metrics: list[str] = None,
+        station_pks: list[int] = None
+    ) -> list[dict]:
+        """
+        Вернуть агрегаты показателей metrics по станциям и интервалам
+        bucket, начинающимся в [start, end], в порядке станции и времени.
+        Каждый показатель представлен полями <показатель>_min, _max, _avg.
+        Интервалы станции раньше начала ее покрытия рассчитываются
+        из WeatherData и почасового архива.
+        """
+        metrics = list(metrics or self.METRICS)
+        start = self.truncate(bucket, start)
+        end = self.to_utc(end)
+        coverage = self.get_coverage(bucket, station_pks)
+        if station_pks is None and coverage:
+            station_pks = list(Station.objects.values_list('pk', flat=True))
+
+        # Станции, часть интервалов которых не покрыта агрегатами.
+        uncovered_pks = None if station_pks is None else [
+            station_pk for station_pk in station_pks
+            if coverage.get(station_pk) is None or start < coverage[station_pk]
+        ]
+        rows = []
+        if uncovered_pks is None or uncovered_pks:
+            raw_end = self.truncate(bucket, end) + self.BUCKET_STEPS[bucket]
+            if uncovered_pks is not None and all(station_pk in coverage for station_pk in uncovered_pks):
+                raw_end = min(raw_end, max(coverage[station_pk] for station_pk in uncovered_pks))
+            rows.extend(
+                row for row in self.get_source_aggregates(
+                    bucket=bucket, start=start, end=raw_end, station_pks=uncovered_pks
+                )
+                if row['station'] not in coverage or row['bucket_start'] < coverage[row['station']]
+            )
+            logger.info(f'Weather data aggregated on the fly: {bucket} buckets {start} - {raw_end}.')
+
+        covered_pks = [station_pk for station_pk, coverage_start in coverage.items() if coverage_start <= end]
+        if covered_pks:
+            queryset = self.model.objects.filter(
+                bucket=bucket,
+                station__in=covered_pks,
+                bucket_start__gte=max(start, min(coverage[station_pk] for station_pk in covered_pks)),
+                bucket_start__lte=end
+            )
+            rollups = [
+                row for row in queryset.values(
+                    'station', 'bucket_start', 'reports_count',
+                    *(f'{metric}_{aggregate}' for metric in metrics for aggregate in self.AGGREGATES)
+                ).order_by('station', 'bucket_start')
+                if row['bucket_start'] >= coverage[row['station']]
+            ]
+            if rows and rollups:
+                rows.extend(rollups)
+                rows.sort(key=lambda row: (row['station'], row['bucket_start']))
+            else:
+                rows.extend(rollups)
+
+        return [self.get_output_row(row, metrics) for row in rows]
+
+    def get_output_row(self, row: dict, metrics: list[str]) -> dict:
+        """Преобразовать сохраненные агрегаты интервала в min, max и среднее."""
+        output = {
+            'station': row['station'],
+            'bucket_start': row['bucket_start'],
+            'reports_count': row['reports_count'],
+        }
+        for metric in metrics:
+            count = row[f'{metric}_count']
+            output[f'{metric}_min'] = row[f'{metric}_min']
+            output[f'{metric}_max'] = row[f'{metric}_max']
+            output[f'{metric}_avg'] = row[f'{metric}_sum'] / count if count else None
+        return output
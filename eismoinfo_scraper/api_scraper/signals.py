@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    PrecipitationType, Station, StationRequestResult,
+    SurfaceCondition, WindDegree
+)
+from .lookups import ParsingModelLookup, StationLookup
+from .station_request_result import StationRequestResultCounter
+
+
+@receiver(post_save, sender=PrecipitationType)
+@receiver(post_save, sender=SurfaceCondition)
+@receiver(post_save, sender=WindDegree)
+@receiver(post_delete, sender=PrecipitationType)
+@receiver(post_delete, sender=SurfaceCondition)
+@receiver(post_delete, sender=WindDegree)
+def invalidate_parsing_model_lookup(sender, **kwargs):
+    """Сбросить индексы парсинговой модели во всех процессах."""
+    ParsingModelLookup.bump_version(sender)
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_station_lookup(sender, **kwargs):
+    """Сбросить индексы станций во всех процессах."""
+    StationLookup.bump_version(sender)
+
+
+@receiver(post_save, sender=StationRequestResult)
+def count_station_request_result(sender, instance, created, **kwargs):
+    """Увеличить счетчик результатов опроса станций за сутки."""
+    if created:
+        StationRequestResultCounter().increment(instance.status, instance.request_time)
@@ -1,3 +1,9 @@
+import datetime as dt
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
 
 from .models import StationRequestResult
 
@@ -19,3 +25,82 @@ class StationRequestResultQueryService:
 
         queryset = StationRequestResult.objects.filter(**filter_params)
         return queryset
+
+
+class StationRequestResultCounter:
+    """
+    Класс для подсчета результатов опроса станций за сутки по статусам.
+    Счетчики хранятся в общем кэше и увеличиваются при записи каждого
+    результата(сигнал post_save), поэтому чтение не обращается к БД.
+    Раз в SEED_TIMEOUT секунд счетчики сверяются с БД одним запросом
+    GROUP BY status: так исправляются пропуски инкрементов(перезапуск
+    Redis, запись в обход сигналов).
+    """
+
+    KEY_PREFIX = 'station_request_result_count'
+    # Срок хранения счетчиков суток [сек].
+    COUNTER_TIMEOUT = 2 * 24 * 60 * 60
+
+    def __init__(self, seed_timeout: int = None):
+        # Период сверки счетчиков с БД [сек].
+        self.seed_timeout = seed_timeout or settings.STATION_REQUEST_COUNTER_SEED_TIMEOUT
+        self.statuses: list[str] = StationRequestResult.Status.get_status_values()
+
+    def get_day_range(self, day: dt.date) -> tuple[dt.datetime, dt.datetime]:
+        """Вернуть границы суток [начало, начало следующих суток) в текущем часовом поясе."""
+        tz = timezone.get_current_timezone()
+        start = dt.datetime.combine(day, dt.time.min, tzinfo=tz)
+        return start, start + dt.timedelta(days=1)
+
+    def get_counter_key(self, day: dt.date, status: str) -> str:
+        return f'{self.KEY_PREFIX}:{day.isoformat()}:{status}'
+
+    def get_seed_key(self, day: dt.date) -> str:
+        return f'{self.KEY_PREFIX}:{day.isoformat()}:seeded'
+
+    def count_from_db(self, day: dt.date) -> dict[str, int]:
+        """Посчитать результаты за сутки по статусам одним запросом."""
+        start, end = self.get_day_range(day)
+        rows = StationRequestResult.objects.filter(
+            request_time__gte=start,
+            request_time__lt=end
+        ).values('status').annotate(count=Count('id')).order_by()
+        counts = dict.fromkeys(self.statuses, 0)
+        counts.update({row['status']: row['count'] for row in rows})
+        return counts
+
+    def seed(self, day: dt.date) -> dict[str, int]:
+        """Записать в кэш счетчики суток, посчитанные по БД."""
+        counts = self.count_from_db(day)
+        cache.set_many(
+            {self.get_counter_key(day, status): count for status, count in counts.items()},
+            timeout=self.COUNTER_TIMEOUT
+        )
+        cache.set(self.get_seed_key(day), True, timeout=self.seed_timeout)
+        return counts
+
+    def increment(self, status: str, request_time: dt.datetime):
+        """
+        Учесть новый результат опроса. Если счетчики суток не сверены
+        с БД, инкремент не нужен: сверка посчитает и этот результат.
+        """
+        day = timezone.localdate(request_time)
+        if not cache.get(self.get_seed_key(day)):
+            return
+        key = self.get_counter_key(day, status)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Счетчик истек или удален: учесть результат при следующей сверке.
+            cache.delete(self.get_seed_key(day))
+
+    def get_counts(self, day: dt.date = None) -> dict[str, int]:
+        """Вернуть количество результатов опроса за сутки(по умолчанию сегодня) по статусам."""
+        day = day or timezone.localdate()
+        if not cache.get(self.get_seed_key(day)):
+            return self.seed(day)
+        keys = {self.get_counter_key(day, status): status for status in self.statuses}
+        values = cache.get_many(list(keys))
+        if len(values) != len(keys):
+            return self.seed(day)
+        return {keys[key]: value for key, value in values.items()}
@@ -1,11 +1,17 @@
-import math
 import asyncio
+import math
 import datetime as dt
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from typing import NamedTuple
 
 from .requests import WeatherDataHttpClient, StationDataHttpClient
 from .loggers import get_logger
-from .models import Station
+from .models import Elevation, Station
+from .lookups import StationLookup
 
 # Логгирование.
 logger = get_logger(__name__)
@@ -16,6 +22,14 @@ class StationException(Exception):
         super().__init__(message)
 
 
+class StationChangeReport(NamedTuple):
+    """Результат сверки станций БД со станциями текущего отчета погоды."""
+    added: list[int]  # eismo_station_id добавленных станций.
+    moved: list[int]  # eismo_station_id станций с обновленными координатами.
+    unchanged: int  # Количество станций без изменений.
+    absent: list[int]  # eismo_station_id станций БД, отсутствующих в отчете.
+
+
 class StationHttpService:
     """A class to get station data(ids, coordinates) from API."""
     def __init__(
@@ -30,7 +44,14 @@ class StationHttpService:
         Return each station's id, coordinates and location name(in a dict)
         from the current weather report.
         """
-        resp_array = asyncio.run(self.weatherdata_http_client.get_current_weather())
+        return self.weatherdata_http_client.run(self.aget_stations_current_weather())
+
+    async def aget_stations_current_weather(self) -> list[dict]:
+        """
+        Asynchronous version of get_stations_current_weather() to be awaited
+        in the event loop of the caller.
+        """
+        resp_array = await self.weatherdata_http_client.get_current_weather()
         # resp_array = resp.json()  # JSONDecodeError
         if resp_array == []:
             logger.error('Current weather reports: empty report array!')
@@ -48,21 +69,58 @@ class StationHttpService:
         logger.info('List of stations from current weather report obtained.')
         return stations_current_weather
 
-    def get_station_height(
-            self, station_id: int,
-            latitude: float, longitude: float) -> float | None:
-        resp = asyncio.run(self.stationdata_http_client.fetch_station_height(
-            station_id=station_id,
-            latitude=latitude,
-            longitude=longitude
-            )
-        )
-        return resp
+    def get_station_heights(
+            self, coordinates: dict[tuple[float, float], int],
+            concurrency: int) -> dict[tuple[float, float], float]:
+        """
+        Fetch heights for (latitude, longitude) keys concurrently,
+        at most `concurrency` requests at a time. The key values are the
+        station ids used in logs. Return heights of successful requests only.
+        """
+        client = self.stationdata_http_client
+
+        async def fetch_height(semaphore, key, station_id):
+            async with semaphore:
+                height = await client.fetch_station_height(
+                    station_id=station_id,
+                    latitude=key[0],
+                    longitude=key[1]
+                )
+            return key, height
+
+        async def fetch_all():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(
+                fetch_height(semaphore, key, station_id)
+                for key, station_id in coordinates.items()
+            ))
+
+        heights = {}
+        for key, height in client.run(fetch_all()):
+            if isinstance(height, (int, float)) and not isinstance(height, bool):
+                heights[key] = float(height)
+            elif height is not None:
+                logger.error(f'Station {coordinates[key]}: unexpected height {height!r}.')
+        return heights
+
+
+class HeightUpdateReport(NamedTuple):
+    """Результат обновления высот станций."""
+    stations: int  # Количество станций, которым требовалась высота.
+    cached: int  # Высоты, взятые из кэша высот.
+    fetched: int  # Высоты, полученные от сервиса высот.
+    failed: int  # Станции, высоту которых получить не удалось.
 
 
 class StationQueryService:
     """Класс для работы с данными станций в БД."""
 
+    # Поля, обновляемые при смещении станции.
+    STATION_UPDATE_FIELDS = [
+        'latitude', 'longitude', 'city_name', 'road_name', 'road_number',
+        'position_change_counter', 'position_change_time', 'updated'
+    ]
+
     def __init__(self, station_http_service=StationHttpService):
         self.station_http_service = station_http_service()
 
@@ -74,87 +132,170 @@ class StationQueryService:
         logger.info('List of stations from the database obtained.')
         return stations_db
 
-    def update_heights(self):
-        logger.info('Updating station heights started.')
-        stations = self.get_stations_from_db()
-        for station in stations:
-            station.height = self.station_http_service.get_station_height(
-                station_id=station.eismo_station_id,
-                latitude=station.latitude,
-                longitude=station.longitude
-            )
-            station.save()
-        logger.info('Updating station heights completed.')
+    def get_stations_without_height(self) -> list[Station]:
+        """
+        Вернуть станции без высоты и станции, сместившиеся после
+        получения высоты.
+        """
+        return list(Station.objects.filter(
+            Q(height__isnull=True)
+            | Q(height_updated__isnull=True)
+            | Q(position_change_time__gt=F('height_updated'))
+        ))
 
-    def update_stations_db(self):
+    def update_heights(self) -> HeightUpdateReport:
         """
-        Обновить список станций БД, обновить координаты всех станции.
+        Обновить высоты станций, которым она требуется. Высоты берутся
+        из кэша высот(Elevation) по округленным координатам, отсутствующие
+        в кэше запрашиваются у сервиса высот конкурентно. Станции
+        обновляются одним bulk_update.
         """
-        # Получить станции из БД.
-        stations_db: list[Station] = self.get_stations_from_db()
+        logger.info('Updating station heights started.')
+        stations = self.get_stations_without_height()
+        station_coordinates = {
+            station.eismo_station_id: StationDataHttpClient.truncate_coordinates(
+                station.latitude, station.longitude
+            )
+            for station in stations
+        }
 
-        # Получить список станций из текущего отчета погоды.
-        stations_current: list[Station] = [
-            Station(**data)
-            for data
-            in self.station_http_service.get_stations_current_weather()
-        ]
+        # Высоты из кэша по координатам станций.
+        keys = set(station_coordinates.values())
+        heights: dict[tuple[float, float], float] = {
+            (elevation.latitude, elevation.longitude): elevation.height
+            for elevation in Elevation.objects.filter(
+                latitude__in={latitude for latitude, _ in keys},
+                longitude__in={longitude for _, longitude in keys}
+            )
+            if (elevation.latitude, elevation.longitude) in keys
+        }
+        cached = len(heights)
+
+        # Запросить у сервиса высоты координат, отсутствующих в кэше.
+        missing = {
+            key: eismo_station_id
+            for eismo_station_id, key in station_coordinates.items()
+            if key not in heights
+        }
+        fetched: dict[tuple[float, float], float] = {}
+        if missing:
+            fetched = self.station_http_service.get_station_heights(
+                coordinates=missing,
+                concurrency=settings.ELEVATION_FETCH_CONCURRENCY
+            )
+            heights.update(fetched)
+
+        now = dt.datetime.now(dt.timezone.utc)
+        stations_to_update = []
+        for station in stations:
+            height = heights.get(station_coordinates[station.eismo_station_id])
+            if height is None:
+                continue
+            station.height = height
+            station.height_updated = now
+            stations_to_update.append(station)
+
+        with transaction.atomic():
+            Elevation.objects.bulk_create(
+                [
+                    Elevation(latitude=latitude, longitude=longitude, height=height)
+                    for (latitude, longitude), height in fetched.items()
+                ],
+                ignore_conflicts=True
+            )
+            Station.objects.bulk_update(
+                stations_to_update, fields=['height', 'height_updated']
+            )
+        # Пакетные запросы не вызывают сигналы: сбросить индексы станций явно.
+        if stations_to_update:
+            StationLookup.bump_version(Station)
 
-        # Сделать множества eismo_station_id(только уникальные значения)
-        # из полученных списков станций.
-        stations_db_set: set[int] = set(
-            station.eismo_station_id for station in stations_db
+        report = HeightUpdateReport(
+            stations=len(stations),
+            cached=cached,
+            fetched=len(fetched),
+            failed=len(stations) - len(stations_to_update)
         )
-        stations_current_set: set[int] = set(
-            station.eismo_station_id for station in stations_current
+        logger.info(f'Updating station heights completed: {report}.')
+        return report
+
+    async def aupdate_stations_db(self) -> StationChangeReport:
+        """
+        Асинхронная версия update_stations_db(): текущий отчет погоды
+        запрашивается в цикле событий вызывающего, работа с БД выполняется
+        в отдельном потоке.
+        """
+        stations_current_weather = await self.station_http_service.aget_stations_current_weather()
+        return await sync_to_async(self.update_stations_db, thread_sensitive=True)(
+            stations_current_weather=stations_current_weather
         )
 
+    def update_stations_db(self, stations_current_weather: list[dict] = None) -> StationChangeReport:
+        """
+        Сверить станции БД со станциями текущего отчета погоды: обновить
+        координаты сместившихся станций и добавить новые. Все изменения
+        записываются двумя пакетными запросами в одной транзакции.
+        Данные станций из текущего отчета запрашиваются, если не переданы.
+        """
+        if stations_current_weather is None:
+            stations_current_weather = self.station_http_service.get_stations_current_weather()
+        # Станции из БД и из текущего отчета погоды по eismo_station_id.
+        stations_db: dict[int, Station] = {
+            station.eismo_station_id: station
+            for station in self.get_stations_from_db()
+        }
+        stations_current: dict[int, Station] = {
+            data['eismo_station_id']: Station(**data)
+            for data in stations_current_weather
+        }
+
         # Для тех станций, которые есть и в базе и в текущем отчете,
         # обновить координаты в базе при несовпадении.
-        intersection = stations_current_set.intersection(stations_db_set)
-        for id in intersection:
-            #  Получить объекты станций.
-            station_current = [
-                station for station in stations_current if station.eismo_station_id == id
-                ][0]  # поменять на next()
-            station_db = [
-                station for station in stations_db if station.eismo_station_id == id
-                ][0]
-
-            # Если координаты станции из текущего отчета погоды не совпадают
-            # с координатами в базе, то обновляем их.
-            if (station_db.latitude != station_current.latitude or station_db.longitude != station_current.longitude):
-                # Увеличить счетчик изменения координат для данной станции.
-                station_db.position_change_counter += 1
-                # Сохранить Время изменения.
-                station_db.position_change_time = dt.datetime.now(dt.timezone.utc)
-
-                # Обновить широту и долготу.
-                station_db.latitude = station_current.latitude
-                station_db.longitude = station_current.longitude
-
-                # Обновить название города и дороги.
-                station_db.city_name = station_current.city_name
-                station_db.road_name = station_current.road_name
-                station_db.road_number = station_current.road_number
-                station_db.save()
-
-        # Получить станции, отстуствующие в БД.
-        difference: set[int] = stations_current_set.difference(stations_db_set)
+        now = dt.datetime.now(dt.timezone.utc)
+        stations_to_update: list[Station] = []
+        stations_to_add: list[Station] = []
+        for eismo_station_id, station_current in stations_current.items():
+            station_db = stations_db.get(eismo_station_id)
+            if station_db is None:
+                stations_to_add.append(station_current)
+                continue
+            if (
+                station_db.latitude == station_current.latitude
+                and station_db.longitude == station_current.longitude
+            ):
+                continue
+            # Увеличить счетчик изменения координат и сохранить время изменения.
+            station_db.position_change_counter += 1
+            station_db.position_change_time = now
+            # Обновить координаты, название города и дороги.
+            station_db.latitude = station_current.latitude
+            station_db.longitude = station_current.longitude
+            station_db.city_name = station_current.city_name
+            station_db.road_name = station_current.road_name
+            station_db.road_number = station_current.road_number
+            # bulk_update не обновляет поля auto_now.
+            station_db.updated = now
+            stations_to_update.append(station_db)
+
+        with transaction.atomic():
+            Station.objects.bulk_update(
+                stations_to_update, fields=self.STATION_UPDATE_FIELDS
+            )
+            # IntegrityError, DatabaseError
+            Station.objects.bulk_create(stations_to_add)
+        # Пакетные запросы не вызывают сигналы: сбросить индексы станций явно.
+        if stations_to_update or stations_to_add:
+            StationLookup.bump_version(Station)
+
+        report = StationChangeReport(
+            added=sorted(station.eismo_station_id for station in stations_to_add),
+            moved=sorted(station.eismo_station_id for station in stations_to_update),
+            unchanged=len(stations_current) - len(stations_to_add) - len(stations_to_update),
+            absent=sorted(stations_db.keys() - stations_current.keys())
+        )
         logger.info(
-            f'Stations abscent in database: {list(difference)}, '
-            f'amount: {len(difference)}'
+            f'Stations abscent in database: {report.added}, '
+            f'amount: {len(report.added)}'
             )
-        # Станции к добавлению в базу.
-        stations_difference: list[Station] = [
-            station for station
-            in stations_current
-            if station.eismo_station_id in difference
-        ]
-        # Присвоить станциям высоту.
-        stations_to_add = []
-        for station in stations_difference:
-            stations_to_add.append(station)
-        # Создать новые объекты станций в базе.
-        Station.objects.bulk_create(stations_to_add)  # IntegrityError, DatabaseError
-        logger.info('Updating station database completed.')
+        logger.info(f'Updating station database completed: {report}.')
+        return report
@@ -1,7 +1,10 @@
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
 
+from .archive import WeatherDataArchiveService
+from .partitions import WeatherDataPartitionService
 from .stations import StationQueryService
-from .weather_data_service import WeatherDataService
+from .weather_data_service import ShardResult, WeatherDataService
 from .loggers import get_logger
 
 
@@ -23,34 +26,104 @@ def update_station_heights():
     station_service.update_heights()
 
 
+@shared_task
+def maintain_weather_data_partitions():
+    service = WeatherDataPartitionService()
+    # До преобразования таблицы(manage_weather_partitions --convert)
+    # и на других СУБД обслуживать нечего.
+    if not service.is_partitioned():
+        logger.warning(
+            f'{service.table} is not partitioned, partition maintenance skipped. '
+            f'Run manage_weather_partitions --convert to enable it.'
+        )
+        return
+    report = service.maintain()
+    logger.info(
+        f'Weather data partitions maintained: created {report.created}, '
+        f'rows moved: {report.moved}, dropped {report.dropped}.'
+    )
+
+
+@shared_task
+def downsample_weather_data():
+    WeatherDataArchiveService().downsample()
+
+
 @shared_task
 def save_current_weather_data():
     weather_data_service = WeatherDataService(mode='current')
-    # Расследование...
-    wind_degree_queryset = weather_data_service.parsing_service.parsing_models_dict['wind_degree'].queryset
-    for e in wind_degree_queryset:
-        logger.info('PRINTING WIND DEGREE QUERYSET')
-        logger.info(f'code = {e.code}', f'value_api = {e.value_api}')
     weather_data_service.save_current_weather()
     logger.info('Current weather saved successfully.')
 
 
 @shared_task
 def save_weather_data_last_hour():
+    save_retrospective_weather(period='last_hour')
+
+
+@shared_task
+def save_weather_data_last_day():
+    save_retrospective_weather(period='last_day')
+
+
+def save_retrospective_weather(period: str):
+    """
+    Сохранить архивные погодные данные за период. При WEATHER_SHARD_SIZE > 0
+    станции разбиваются на шарды, которые опрашиваются параллельно задачами
+    save_weather_data_shard(chord) в очереди WEATHER_SHARD_QUEUE, по завершении
+    всех шардов задача complete_weather_data_shards вносит новые значения
+    в парсинговые модели.
+    """
     weather_data_service = WeatherDataService(mode='retrospective')
+    if not settings.WEATHER_SHARD_SIZE:
+        weather_data_service.save_retrospective_weather(period=period)
+        logger.info(f'Saving weather data {period.replace("_", " ")} completed.')
+        return
 
-    # Расследование...
-    wind_degree_queryset = weather_data_service.parsing_service.parsing_models_dict['wind_degree'].queryset
-    for e in wind_degree_queryset:
-        logger.info('PRINTING WIND DEGREE QUERYSET')
-        logger.info(f'code = {e.code}', f'value_api = {e.value_api}')
+    shards = weather_data_service.get_station_shards(shard_size=settings.WEATHER_SHARD_SIZE)
+    if not shards:
+        logger.warning(f'Saving weather data {period.replace("_", " ")}: no stations.')
+        return
+    chord(
+        save_weather_data_shard.s(period=period, station_pks=station_pks).set(
+            queue=settings.WEATHER_SHARD_QUEUE
+        )
+        for station_pks in shards
+    )(complete_weather_data_shards.s(period=period))
+    logger.info(
+        f'Saving weather data {period.replace("_", " ")}: '
+        f'{sum(map(len, shards))} stations dispatched in {len(shards)} shards.'
+    )
 
-    weather_data_service.save_retrospective_weather(period='last_hour')
-    logger.info('Saving weather data last hour completed.')
+
+@shared_task
+def save_weather_data_shard(period: str, station_pks: list[int]) -> dict:
+    """
+    Опросить группу станций(шард). Ошибка шарда не прерывает chord:
+    результаты остальных шардов обрабатываются завершающей задачей.
+    """
+    weather_data_service = WeatherDataService(mode='retrospective')
+    try:
+        shard_result = weather_data_service.save_retrospective_weather_shard(
+            period=period, station_pks=station_pks
+        )
+    except Exception as e:
+        logger.error(f'Shard of {len(station_pks)} stations failed: {e!r}', exc_info=True)
+        shard_result = ShardResult(
+            stations=len(station_pks),
+            unregistered_values={},
+            stations_to_refetch=[]
+        )
+    return shard_result._asdict()
 
 
 @shared_task
-def save_weather_data_last_day():
+def complete_weather_data_shards(shard_results: list[dict], period: str):
     weather_data_service = WeatherDataService(mode='retrospective')
-    weather_data_service.save_retrospective_weather(period='last_day')
-    logger.info('Saving weather data last day completed.')
+    shard_results = [ShardResult(**shard_result) for shard_result in shard_results]
+    weather_data_service.complete_retrospective_weather(shard_results=shard_results)
+    logger.info(
+        f'Saving weather data {period.replace("_", " ")} completed: '
+        f'{sum(shard_result.stations for shard_result in shard_results)} stations '
+        f'in {len(shard_results)} shards.'
+    )
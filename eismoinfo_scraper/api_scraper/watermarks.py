@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from .models import Station, WeatherData
+
+
+class WeatherDataWatermarks:
+    """
+    Класс для работы с отметками станций: максимальным unix временем
+    отчета станции, сохраненного в БД. Отметки хранятся в общем кэше,
+    отсутствующие в кэше считываются из БД одним запросом GROUP BY station.
+    Отчеты станций сохраняются по возрастанию времени, поэтому отчеты
+    не позже отметки уже есть в БД и повторно не запрашиваются.
+    """
+
+    KEY_PREFIX = 'weather_data_watermark'
+    # Значение в кэше для станции без отчетов в БД.
+    NO_REPORTS = 0
+
+    def __init__(self, timeout: int = None):
+        # Время хранения отметки в кэше, после которого она сверяется с БД [сек].
+        self.timeout = timeout or settings.WEATHER_DATA_WATERMARK_TIMEOUT
+
+    def get_key(self, station_pk: int) -> str:
+        return f'{self.KEY_PREFIX}:{station_pk}'
+
+    def get_from_db(self, station_pks: list[int]) -> dict[int, int]:
+        """Получить максимальное unix время отчетов станций одним запросом."""
+        rows = WeatherData.objects.filter(station__in=station_pks).values(
+            'station'
+        ).annotate(max_unix=Max('unix')).order_by()
+        return {row['station']: row['max_unix'] for row in rows}
+
+    def get_watermarks(self, stations: list[Station]) -> dict[int, int | None]:
+        """
+        Вернуть отметки станций по pk. None - у станции нет отчетов в БД.
+        """
+        keys = {self.get_key(station.pk): station.pk for station in stations}
+        cached = cache.get_many(keys)
+        watermarks = {keys[key]: value for key, value in cached.items()}
+
+        missing = [pk for key, pk in keys.items() if key not in cached]
+        if missing:
+            from_db = self.get_from_db(missing)
+            seeded = {pk: from_db.get(pk, self.NO_REPORTS) for pk in missing}
+            cache.set_many(
+                {self.get_key(pk): value for pk, value in seeded.items()},
+                timeout=self.timeout
+            )
+            watermarks.update(seeded)
+        return {
+            pk: None if value == self.NO_REPORTS else value
+            for pk, value in watermarks.items()
+        }
+
+    def advance(self, station: Station, unix: int):
+        """
+        Сдвинуть отметку станции после записи ее отчетов. Отметка,
+        отсутствующая в кэше, не создается: ее значение считается из БД.
+        """
+        key = self.get_key(station.pk)
+        watermark = cache.get(key)
+        if watermark is not None and unix > watermark:
+            cache.set(key, unix, timeout=self.timeout)
+
+    def forget(self, stations: list[Station]):
+        """Удалить отметки станций: при следующем чтении они сверятся с БД."""
+        cache.delete_many([self.get_key(station.pk) for station in stations])
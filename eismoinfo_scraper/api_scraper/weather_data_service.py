@@ -1,17 +1,28 @@
 import asyncio
 import datetime as dt
+import json
+import math
+import time
 
-from rest_framework.exceptions import ValidationError
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from json.decoder import JSONDecodeError
-from requests import Response
+from typing import NamedTuple
 from zoneinfo import ZoneInfo
 
-from .serializers import ApiScraperWeatherDataSerializer
 from .requests import WeatherDataHttpClient
 from .stations import StationQueryService
 from .parsing import WeatherDictParser
+from .rollups import WeatherDataRollupService
 from .models import Station, StationRequestResult
 from .station_request_result import StationRequestResultQueryService
+from .watermarks import WeatherDataWatermarks
+from .weather_data_writer import (
+    WeatherDataBulkWriter, WeatherDataCopyWriter,
+    WeatherDataWriteException, WriteResult
+)
 from .loggers import get_logger
 
 
@@ -25,10 +36,41 @@ class WeatherDataException(Exception):
         self.message = message
 
 
+class ShardResult(NamedTuple):
+    """
+    Результат опроса группы станций(шарда) отдельной задачей Celery:
+    неизвестные значения API по полям и станции для повторного опроса.
+    """
+    stations: int
+    unregistered_values: dict[str, list]
+    stations_to_refetch: list[int]
+
+
+class BackfillResult(NamedTuple):
+    """Результат загрузки погодных данных за период."""
+    stations: int
+    copied: int
+    inserted: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.copied / self.seconds if self.seconds else 0.0
+
+
+class FetchWindow(NamedTuple):
+    """Период [start, end) отчетов станции, которые нужно сохранить, и размер запроса."""
+    start: dt.datetime
+    end: dt.datetime
+    number_of_reports: int
+
+
 class WeatherDataService:
     """Класс для получения, преобразования и сохраниения погодных данных."""
 
     TIMEZONE_API = 'Europe/Vilnius'
+    # Периодичность отчетов станций.
+    REPORT_INTERVAL = dt.timedelta(minutes=10)
 
     def __init__(
         self,
@@ -37,6 +79,12 @@ class WeatherDataService:
         station_query_service=StationQueryService(),
         parsing_service=WeatherDictParser,
         station_result_query_service=StationRequestResultQueryService(),
+        weatherdata_writer=WeatherDataBulkWriter(),
+        weatherdata_copy_writer=WeatherDataCopyWriter(),
+        watermarks=WeatherDataWatermarks(),
+        rollup_service=WeatherDataRollupService(),
+        concurrency: int = None,
+        queue_size: int = None,
     ):
         self.weatherdata_http_client = weatherdata_http_client
         self.station_query_service = station_query_service
@@ -48,156 +96,580 @@ class WeatherDataService:
             self.parsing_service = parsing_service(mode='current_weather_parsing')
 
         self.station_result_query_service = station_result_query_service
+        self.weatherdata_writer = weatherdata_writer
+        self.weatherdata_copy_writer = weatherdata_copy_writer
+        self.watermarks = watermarks
+        self.rollup_service = rollup_service
+
+        # Максимальное количество одновременных запросов к станциям.
+        if concurrency is None:
+            concurrency = settings.WEATHER_FETCH_CONCURRENCY
+        self.concurrency = concurrency
+        # Размер очереди ответов станций, ожидающих преобразования и записи.
+        self.queue_size = settings.WEATHER_PIPELINE_QUEUE_SIZE if queue_size is None else queue_size
 
     def fetch_current_weather(self):
         """
         Вернуть текущие показания станций в формате БД.
         """
+        return self.weatherdata_http_client.run(self.afetch_current_weather())
+
+    async def afetch_current_weather(self):
+        """
+        Асинхронная версия fetch_current_weather(): запросы к API выполняются
+        в одном цикле событий, работа с БД - в отдельном потоке.
+        """
         # Обновить список станций в БД.
-        self.station_query_service.update_stations_db()
+        await self.station_query_service.aupdate_stations_db()
 
         # Вернуть массив словарей Python(декодированную json строку).
-        resp = asyncio.run(self.weatherdata_http_client.get_current_weather())
+        resp = await self.weatherdata_http_client.get_current_weather()
 
-        # Преобразовать в формат БД.
-        parsed_reports: list[dict] = self.parsing_service.get_parsed_weather_reports(
-            eismo_reports=resp
-        )
+        # Преобразовать в формат БД(индексы станций и парсинговых моделей читаются из БД).
+        parsed_reports: list[dict] = await sync_to_async(
+            self.parsing_service.get_parsed_weather_reports, thread_sensitive=True
+        )(eismo_reports=resp)
         return parsed_reports
 
     def save_current_weather(self):
         parsed_reports: list[dict] = self.fetch_current_weather()
         self.save_weather_data(parsed_reports=parsed_reports)
 
-    def save_retrospective_weather(self, period: str):
+    def save_retrospective_weather(self, period: str, concurrent: bool = True):
         """
         Получить, перобразовать в формат БД и сохранить погодные данные
         от каждой станций из БД за прошедший час или сутки по Литве.
+        У станции запрашиваются только отчеты новее ее отметки(см. get_fetch_windows),
+        станции, все отчеты которых за период уже в БД, не опрашиваются.
+        В конкурентном режиме станции опрашиваются в одном цикле событий
+        с ограничением числа одновременных запросов.
+        """
+        # В последовательном режиме станции опрашиваются по одной.
+        concurrency = self.concurrency if concurrent else 1
+        self.weatherdata_http_client.run(self.asave_retrospective_weather(
+            period=period, concurrency=concurrency
+        ))
+        self.complete_retrospective_weather()
+
+    def get_station_shards(self, shard_size: int) -> list[list[int]]:
+        """
+        Обновить список станций в БД и разбить станции на группы(шарды)
+        не более shard_size станций для опроса отдельными задачами Celery.
+        Вернуть pk станций каждого шарда.
         """
-        # Обновить список станций в БД.
         self.station_query_service.update_stations_db()
+        station_pks = [station.pk for station in self.get_stations()]
+        return [
+            station_pks[i:i + shard_size]
+            for i in range(0, len(station_pks), shard_size)
+        ]
 
-        stations = self.get_stations()
+    def save_retrospective_weather_shard(
+        self,
+        period: str,
+        station_pks: list[int],
+        concurrent: bool = True
+    ) -> ShardResult:
+        """
+        Получить и сохранить погодные данные группы станций(шарда), как
+        save_retrospective_weather(). Список станций в БД не обновляется,
+        новые значения в парсинговые модели не вносятся: это делает
+        завершающая задача по результатам всех шардов
+        (см. complete_retrospective_weather).
+        """
+        concurrency = self.concurrency if concurrent else 1
+        self.weatherdata_http_client.run(self.asave_retrospective_weather(
+            period=period, concurrency=concurrency, station_pks=station_pks
+        ))
+        return ShardResult(
+            stations=len(station_pks),
+            unregistered_values=self.parsing_service.get_unregistered_values(),
+            stations_to_refetch=sorted(self.parsing_service.stations_to_refetch)
+        )
+
+    def complete_retrospective_weather(self, shard_results: list[ShardResult] = ()):
+        """
+        Внести в парсинговые модели неизвестные значения, полученные
+        при опросе станций этим сервисом и задачами шардов.
+        """
+        for shard_result in shard_results:
+            self.parsing_service.add_unregistered_values(shard_result.unregistered_values)
+            self.parsing_service.stations_to_refetch.update(shard_result.stations_to_refetch)
+
+        logger.info(
+            'Stations to request again(respose contains unknown parsing values): '
+            f'{self.parsing_service.stations_to_refetch}.'
+        )
+        # Добавить новые литовские значения в базу.
+        self.parsing_service.update_parsing_models()
+
+    async def asave_retrospective_weather(
+        self,
+        period: str,
+        concurrency: int,
+        station_pks: list[int] = None
+    ):
+        """
+        Асинхронная часть save_retrospective_weather(): все запросы к API
+        выполняются в одном цикле событий, работа с БД - в отдельном потоке.
+        Если переданы station_pks, опрашиваются только эти станции
+        без обновления списка станций в БД.
+        """
+        if station_pks is None:
+            # Обновить список станций в БД.
+            await self.station_query_service.aupdate_stations_db()
+
+        stations = await sync_to_async(self.get_stations, thread_sensitive=True)(
+            station_pks=station_pks
+        )
         match period:
             case 'last_hour':
                 number_of_reports = 50
             case 'last_day':
                 number_of_reports = 1000
 
-        # Опрос каждой станции.
+        windows = await sync_to_async(self.get_fetch_windows, thread_sensitive=True)(
+            stations=stations, period=period, max_reports=number_of_reports
+        )
+        stations_to_fetch = [
+            station for station in stations
+            if windows[station.pk].start < windows[station.pk].end
+        ]
+        # Все отчеты остальных станций за период уже в БД.
+        await sync_to_async(self.save_up_to_date_results, thread_sensitive=True)(
+            stations=[station for station in stations if station not in stations_to_fetch]
+        )
+        logger.info(
+            f'Stations to request: {len(stations_to_fetch)}, '
+            f'up to date: {len(stations) - len(stations_to_fetch)}, '
+            f'reports requested: {sum(windows[station.pk].number_of_reports for station in stations_to_fetch)}.'
+        )
+
+        await self.process_stations_concurrently(
+            stations=stations_to_fetch,
+            period=period,
+            windows=windows,
+            concurrency=concurrency
+        )
+
+    def save_up_to_date_results(self, stations: list[Station]):
+        """Сохранить результат опроса станций, все отчеты которых за период уже в БД."""
         for station in stations:
-            try:
-                status = StationRequestResult.Status.SUCCESS
-                error_message = None
-                earliest_report_time, latest_report_time, reports_count = (
-                    None, None, None
-                )
-                # Получить ответ от станции JSON -> list[dict]
-                resp = self.get_station_reports(
-                    station=station, number_of_reports=number_of_reports
-                    )
+            StationRequestResult.objects.create(
+                station=station,
+                status=StationRequestResult.Status.SUCCESS,
+                reports_count=0
+            )
 
-                # Отфильтровать отчеты за указанный период времени.
-                timely_filtered_reports = self.get_timely_filtered_reports(
-                    period=period,
-                    resp=resp
-                )
+    def get_fetch_windows(
+        self,
+        stations: list[Station],
+        period: str,
+        max_reports: int
+    ) -> dict[int, FetchWindow]:
+        """
+        Вернуть для каждой станции(по pk) период отчетов, которые нужно
+        сохранить, и количество запрашиваемых отчетов. Для станции
+        с отметкой период начинается сразу после отметки(в том числе
+        раньше начала period, если станция пропустила предыдущие опросы),
+        но не раньше самого раннего отчета, который вернет запрос на
+        max_reports отчетов. Без отметки - весь period, max_reports отчетов.
+        """
+        start, end = self.get_period_bounds(period=period)
+        watermarks = self.watermarks.get_watermarks(stations)
+        utc_now = dt.datetime.now(dt.timezone.utc)
+        # Время самого раннего отчета, который вернет запрос на max_reports отчетов.
+        reachable = utc_now - (max_reports - 1) * self.REPORT_INTERVAL
 
-                # Преобразовать данные в отчетах в формат БД.
-                parsed_reports = self.parsing_service.get_parsed_weather_reports(
-                    station=station,
-                    eismo_reports=timely_filtered_reports
-                )
+        windows = {}
+        for station in stations:
+            watermark = watermarks.get(station.pk)
+            if watermark is None:
+                windows[station.pk] = FetchWindow(start, end, max_reports)
+                continue
+            watermark_time = dt.datetime.fromtimestamp(watermark, dt.timezone.utc)
+            if watermark_time + self.REPORT_INTERVAL >= end:
+                # Следующий отчет станции будет не раньше конца периода.
+                windows[station.pk] = FetchWindow(end, end, 0)
+                continue
+            window_start = max(watermark_time + dt.timedelta(seconds=1), reachable)
+            number_of_reports = min(
+                max_reports,
+                math.ceil((utc_now - window_start) / self.REPORT_INTERVAL) + 1
+            )
+            windows[station.pk] = FetchWindow(window_start, end, number_of_reports)
+        return windows
 
-                #  Если станция в списке станций, от которых получены неизвестные парсинговым моделям значения.
-                if station.eismo_station_id in self.parsing_service.stations_to_refetch:
-                    raise WeatherDataException(
-                        error='unknown_parsing_values'
-                    )
+    async def process_stations_concurrently(
+        self,
+        stations: list[Station],
+        period: str,
+        windows: dict[int, FetchWindow],
+        concurrency: int
+    ):
+        """
+        Опросить станции конкурентно(не более concurrency запросов
+        одновременно) и передавать ответ каждой станции на преобразование
+        и сохранение по мере его получения.
+        """
+        # Работа с БД синхронная, поэтому выполняется в отдельном потоке,
+        # общем для всех станций, чтобы не блокировать цикл событий.
+        process_station_response = sync_to_async(
+            self.process_station_response, thread_sensitive=True
+        )
+
+        async def consume(station: Station, resp: list[dict] | Exception | None):
+            await process_station_response(
+                station=station, period=period, window=windows[station.pk], resp=resp
+            )
+
+        await self.run_stations_pipeline(
+            stations=stations,
+            number_of_reports={
+                station.pk: windows[station.pk].number_of_reports for station in stations
+            },
+            concurrency=concurrency,
+            consume=consume
+        )
 
-                # Сохранить преобразованные погодные отчеты в БД.
-                self.save_weather_data(
-                    parsed_reports=parsed_reports
+    async def run_stations_pipeline(
+        self,
+        stations: list[Station],
+        number_of_reports: int | dict[int, int],
+        concurrency: int,
+        consume
+    ):
+        """
+        Опросить станции и обработать их ответы конвейером: concurrency
+        задач запрашивают станции и кладут пары (станция, ответ) в очередь
+        ограниченного размера, одна задача забирает их из очереди и передает
+        в consume(корутина). Пока очередь заполнена, новые станции
+        не запрашиваются. Исключение JSONDecodeError передается вместо ответа.
+        number_of_reports - общее для всех станций или по pk станции.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Общий итератор: каждая задача запроса берет следующую станцию.
+        pending_stations = iter(stations)
+
+        async def fetch_worker():
+            for station in pending_stations:
+                try:
+                    resp = await self.weatherdata_http_client.get_retrospective_weather(
+                        station_id=station.eismo_station_id,
+                        number_of_reports=(
+                            number_of_reports[station.pk]
+                            if isinstance(number_of_reports, dict) else number_of_reports
+                        )
+                    )
+                except JSONDecodeError as de:
+                    resp = de
+                await queue.put((station, resp))
+
+        async def consume_worker():
+            # None в очереди - все станции опрошены.
+            while (item := await queue.get()) is not None:
+                await consume(*item)
+
+        fetch_workers = [
+            asyncio.create_task(fetch_worker())
+            for _ in range(min(concurrency, len(stations)))
+        ]
+        consumer = asyncio.create_task(consume_worker())
+        fetching = asyncio.gather(*fetch_workers)
+        try:
+            # Обработчик до получения None завершается только с исключением.
+            await asyncio.wait([fetching, consumer], return_when=asyncio.FIRST_COMPLETED)
+            if consumer.done():
+                consumer.result()
+            await fetching
+            await queue.put(None)
+            await consumer
+        finally:
+            # При ошибке обработчика остановить опрос станций(отмена
+            # fetching отменяет и задачи запросов).
+            fetching.cancel()
+            consumer.cancel()
+            await asyncio.gather(fetching, consumer, return_exceptions=True)
+
+    def process_station_response(
+        self,
+        station: Station,
+        period: str,
+        window: FetchWindow,
+        resp: list[dict] | Exception | None
+    ):
+        """
+        Отфильтровать, преобразовать и сохранить в БД ответ станции,
+        сохранить отчет по результату запроса к станции.
+        Отчеты вне периода window(в том числе не позже отметки станции)
+        отбрасываются до преобразования.
+        """
+        try:
+            status = StationRequestResult.Status.SUCCESS
+            error_message = None
+            earliest_report_time, latest_report_time, reports_count = (
+                None, None, None
+            )
+            # Проверить ответ станции JSON -> list[dict].
+            resp = self.check_station_response(resp=resp)
+
+            # Преобразовать в колонки формата БД отчеты за указанный период времени.
+            parsed_columns = self.parsing_service.get_parsed_weather_columns(
+                station=station,
+                eismo_reports=resp,
+                start=window.start,
+                end=window.end
+            )
+            # Проверка, что хотя бы один отчет за указанный период есть.
+            if not parsed_columns['unix']:
+                raise WeatherDataException(
+                    error='out_of_timerange_error',
+                    message=f"The station's reports don't belong to {period}.")
+
+            #  Если станция в списке станций, от которых получены неизвестные парсинговым моделям значения.
+            if station.eismo_station_id in self.parsing_service.stations_to_refetch:
+                raise WeatherDataException(
+                    error='unknown_parsing_values'
                 )
-                logger.info(
-                    f'Station {station.eismo_station_id}: reports saved to db amount: '
-                    f'{len(parsed_reports)}.'
+
+            # Сохранить преобразованные погодные отчеты в БД.
+            write_result = self.weatherdata_writer.write_columns(parsed_columns)
+            self.watermarks.advance(station, max(parsed_columns['unix']))
+            # Пересчитать агрегаты интервалов с новыми отчетами.
+            if write_result.inserted:
+                self.rollup_service.update(
+                    start=min(parsed_columns['UTC']),
+                    end=max(parsed_columns['UTC']),
+                    station_pks=[station.pk]
                 )
-                earliest_report_time, latest_report_time, reports_count = self.get_earl_latest_reptime(parsed_reports)
-
-            # requests.py
-            except JSONDecodeError as de:
-                logger.error(f'Station {station}: JSON decode error.')
-                status = StationRequestResult.Status.JSON_DECODE_ERROR,
-                error_message = de.message
-
-            # parsing.py: отсутствует ожидаемый ключ в ответе станции,
-            # ошибка при преобразовании данных.
-            except (KeyError, TypeError, ValueError) as err:
-                logger.error(f'Station {station}: parsing error.')
-                status = StationRequestResult.Status.PARSING_ERROR
-                error_message = err
-
-            # Методы self.get_station_reports()
-            # и self.get_timely_filtered_reports()
-            except WeatherDataException as e:
-                logger.error(
-                    f'Station {station.eismo_station_id}: {e.error}: message: {e.message}.'
+            logger.info(
+                f'Station {station.eismo_station_id}: reports saved to db amount: '
+                f'{write_result.inserted}, already in db: {write_result.skipped}.'
+            )
+            earliest_report_time, latest_report_time, _ = self.get_earl_latest_reptime(parsed_columns)
+            reports_count = write_result.inserted
+
+        # requests.py
+        except JSONDecodeError as de:
+            logger.error(f'Station {station}: JSON decode error.')
+            status = StationRequestResult.Status.JSON_DECODE_ERROR
+            error_message = de.msg
+
+        # parsing.py: отсутствует ожидаемый ключ в ответе станции,
+        # ошибка при преобразовании данных.
+        except (KeyError, TypeError, ValueError) as err:
+            logger.error(f'Station {station}: parsing error.')
+            status = StationRequestResult.Status.PARSING_ERROR
+            error_message = err
+
+        # Метод self.check_station_response(), нет отчетов за период.
+        except WeatherDataException as e:
+            logger.error(
+                f'Station {station.eismo_station_id}: {e.error}: message: {e.message}.'
+            )
+            error = e.error
+            error_message = e.message
+            match error:
+                # Превышено количество попыток получить ответ.
+                # (или ни разу не получен 200)
+                case 'http_request_error':
+                    status = StationRequestResult.Status.HTTP_REQUEST_ERROR
+
+                # Пустой массив в ответе от станции.
+                case 'empty_report_array':
+                    status = StationRequestResult.Status.EMPTY_REPORT_ERROR
+
+                # Ни один из погодных отчетов станции не попал
+                # в диапазон предыдущих суток по Литве.
+                case 'out_of_timerange':
+                    status = StationRequestResult.Status.OUT_OF_TIMERANGE_ERROR
+
+                # Получены значения, отстуствующие с парсинговых моделях.
+                case 'unknown_parsing_values':
+                    status = StationRequestResult.Status.UNKNOWN_PARSING_VALUES_ERROR
+
+        # weather_data_writer.py: значения отчета не соответствуют
+        # типам полей модели. Дубликаты(station, unix) ошибкой не считаются
+        # и пропускаются при записи.
+        except WeatherDataWriteException as e:
+            logger.error(
+                f'Station {station.eismo_station_id}: '
+                f'validation error: {e.message}'
                 )
-                error = e.error
-                error_message = e.message
-                match error:
-                    # Превышено количество попыток получить ответ.
-                    # (или ни разу не получен 200)
-                    case 'http_request_error':
-                        status = StationRequestResult.Status.HTTP_REQUEST_ERROR
-
-                    # Пустой массив в ответе от станции.
-                    case 'empty_report_array':
-                        status = StationRequestResult.Status.EMPTY_REPORT_ERROR
-
-                    # Ни один из погодных отчетов станции не попал
-                    # в диапазон предыдущих суток по Литве.
-                    case 'out_of_timerange':
-                        status = StationRequestResult.Status.OUT_OF_TIMERANGE_ERROR
-
-                    # Получены значения, отстуствующие с парсинговых моделях.
-                    case 'unknown_parsing_values':
-                        status = StationRequestResult.Status.UNKNOWN_PARSING_VALUES_ERROR
-
-            # serializers.py, наиболее вероятно по
-            # причине нарушения UniqueConstraint полей station и unix,
-            # поскольку на данном этапе сами погодные данные уже
-            # преобразованы в нужные типы данных без ошибок.
-            except ValidationError as e:
-                logger.error(
-                    f'Station {station.eismo_station_id}: '
-                    f'validation error: station_unix_unique_constraint failed.'
-                    )
-                status = StationRequestResult.Status.VALIDATION_ERROR
-                error_message = str(e.detail)[:200]
+            status = StationRequestResult.Status.VALIDATION_ERROR
+            error_message = e.message[:200]
+
+        finally:
+            # Сохранить отчет по результатам запроса.
+            StationRequestResult.objects.create(
+                station=station,
+                status=status,
+                error_message=error_message,
+                earliest_report_time=earliest_report_time,
+                latest_report_time=latest_report_time,
+                reports_count=reports_count
+            )
 
+    def backfill_weather_data(
+        self,
+        start: dt.datetime,
+        end: dt.datetime,
+        station_ids: list[int] = None,
+        source: str = None
+    ) -> BackfillResult:
+        """
+        Загрузить погодные данные станций за период [start, end) из API
+        или из JSON файла с отчетами(source). Отчеты передаются во временную
+        таблицу через COPY и переносятся в основную таблицу одним запросом,
+        уже имеющиеся в БД отчеты пропускаются.
+        """
+        started = time.perf_counter()
+        stations = self.get_stations()
+        if station_ids:
+            stations = [
+                station for station in stations
+                if station.eismo_station_id in station_ids
+            ]
+
+        if source:
+            reports_by_station = self.read_source_reports(source=source)
+            copy_writer = self.weatherdata_copy_writer
+            copy_writer.create_staging_table()
+            try:
+                copied = sum(
+                    self.copy_station_reports(
+                        station=station,
+                        reports=reports_by_station.get(station.eismo_station_id, []),
+                        start=start,
+                        end=end
+                    )
+                    for station in stations
+                )
+                inserted = copy_writer.merge_staging_table()
             finally:
-                # Сохранить отчет по результатам запроса.
-                StationRequestResult.objects.create(
-                    station=station,
-                    status=status,
-                    error_message=error_message,
-                    earliest_report_time=earliest_report_time,
-                    latest_report_time=latest_report_time,
-                    reports_count=reports_count
+                copy_writer.drop_staging_table()
+        else:
+            # Количество отчетов, покрывающее период с его начала до текущего момента.
+            number_of_reports = math.ceil(
+                (dt.datetime.now(dt.timezone.utc) - start) / self.REPORT_INTERVAL
+            ) + 1
+            copied, inserted = self.weatherdata_http_client.run(
+                self.backfill_from_api(
+                    stations=stations,
+                    start=start,
+                    end=end,
+                    number_of_reports=number_of_reports
                 )
+            )
 
-        logger.info(
-            'Stations to request again(respose contains unknown parsing values): '
-            f'{self.parsing_service.stations_to_refetch}.'
-        )
+        # Отметки станций сверятся с загруженными отчетами при следующем опросе.
+        self.watermarks.forget(stations)
+        if inserted:
+            self.rollup_service.update(
+                start=start,
+                end=end - dt.timedelta(microseconds=1),
+                station_pks=[station.pk for station in stations]
+            )
         # Добавить новые литовские значения в базу.
         self.parsing_service.update_parsing_models()
+        return BackfillResult(
+            stations=len(stations),
+            copied=copied,
+            inserted=inserted,
+            seconds=time.perf_counter() - started
+        )
+
+    async def backfill_from_api(
+        self,
+        stations: list[Station],
+        start: dt.datetime,
+        end: dt.datetime,
+        number_of_reports: int
+    ) -> tuple[int, int]:
+        """
+        Опросить станции и передавать их отчеты во временную таблицу
+        по мере получения ответов. Вернуть количество переданных
+        и вставленных в основную таблицу строк.
+        """
+        # Временная таблица существует только в соединении потока,
+        # в котором создана, поэтому вся работа с БД - в одном потоке.
+        copy_writer = self.weatherdata_copy_writer
+        await sync_to_async(copy_writer.create_staging_table, thread_sensitive=True)()
+        copy_station_reports = sync_to_async(self.copy_station_reports, thread_sensitive=True)
+        copied = 0
+
+        async def consume(station: Station, resp: list[dict] | Exception | None):
+            nonlocal copied
+            try:
+                resp = self.check_station_response(resp=resp)
+            except (JSONDecodeError, WeatherDataException) as e:
+                logger.error(f'Station {station.eismo_station_id}: backfill skipped: {e!r}.')
+                return
+            copied += await copy_station_reports(
+                station=station, reports=resp, start=start, end=end
+            )
 
-    def get_stations(self) -> list[Station]:
-        """Получить все станции из БД."""
+        try:
+            await self.run_stations_pipeline(
+                stations=stations,
+                number_of_reports=number_of_reports,
+                concurrency=self.concurrency,
+                consume=consume
+            )
+            inserted = await sync_to_async(copy_writer.merge_staging_table, thread_sensitive=True)()
+        finally:
+            await sync_to_async(copy_writer.drop_staging_table, thread_sensitive=True)()
+        return copied, inserted
+
+    def copy_station_reports(
+        self,
+        station: Station,
+        reports: list[dict],
+        start: dt.datetime,
+        end: dt.datetime
+    ) -> int:
+        """
+        Отфильтровать по времени, преобразовать и передать отчеты станции
+        во временную таблицу. Вернуть количество переданных строк.
+        """
+        try:
+            parsed_columns = self.parsing_service.get_parsed_weather_columns(
+                station=station,
+                eismo_reports=reports,
+                start=start,
+                end=end
+            )
+            #  Отчеты с неизвестными парсинговым моделям значениями не загружаются.
+            if station.eismo_station_id in self.parsing_service.stations_to_refetch:
+                raise WeatherDataException(error='unknown_parsing_values')
+            copied = self.weatherdata_copy_writer.copy_columns(parsed_columns)
+        except (KeyError, TypeError, ValueError, WeatherDataException, WeatherDataWriteException) as e:
+            logger.error(f'Station {station.eismo_station_id}: backfill skipped: {e!r}.')
+            return 0
+        logger.info(f'Station {station.eismo_station_id}: reports copied for backfill: {copied}.')
+        return copied
+
+    def read_source_reports(self, source: str) -> dict[int, list[dict]]:
+        """
+        Прочитать отчеты из JSON файла и сгруппировать их по id станции.
+        Файл может содержать JSON массив или отчеты, перечисленные через
+        запятую без скобок(как api_scraper/data/src_1000_reports.json).
+        """
+        with open(source, encoding='utf-8') as file:
+            text = file.read().strip()
+        if not text.startswith('['):
+            text = f'[{text}]'
+        reports_by_station = defaultdict(list)
+        for report in json.loads(text):
+            reports_by_station[int(report['id'])].append(report)
+        return reports_by_station
+
+    def get_stations(self, station_pks: list[int] = None) -> list[Station]:
+        """Получить все станции из БД или станции с pk из station_pks."""
         stations = self.station_query_service.get_stations_from_db()
+        if station_pks is not None:
+            station_pks = set(station_pks)
+            stations = [station for station in stations if station.pk in station_pks]
         stations.sort(key=lambda x: x.eismo_station_id)
         return stations
 
@@ -225,17 +697,30 @@ class WeatherDataService:
         self,
         station: Station,
         number_of_reports: int
-    ) -> Response | None:
+    ) -> list[dict]:
         """
         Получить архивные погодные данные от указанной станции
         на заданное количество отчетов с момента выполнения запроса.
         """
         # Выполнить запрос к стации в синхронном режиме.
-        resp = asyncio.run(self.weatherdata_http_client.get_retrospective_weather(
-            station_id=station.eismo_station_id,
-            number_of_reports=number_of_reports
+        resp = self.weatherdata_http_client.run(
+            self.weatherdata_http_client.get_retrospective_weather(
+                station_id=station.eismo_station_id,
+                number_of_reports=number_of_reports
             )
         )
+        return self.check_station_response(resp=resp)
+
+    def check_station_response(
+        self,
+        resp: list[dict] | Exception | None
+    ) -> list[dict]:
+        """
+        Проверить ответ станции: пробросить исключение, полученное
+        при запросе, пустой массив или отсутствие ответа.
+        """
+        if isinstance(resp, Exception):
+            raise resp
         if resp == []:
             raise WeatherDataException(error='empty_report_array')
         elif resp is None:
@@ -245,13 +730,9 @@ class WeatherDataService:
                 )
         return resp
 
-    def get_timely_filtered_reports(
-        self,
-        resp: list[dict],
-        period: str
-    ) -> list[dict] | None:
+    def get_period_bounds(self, period: str) -> tuple[dt.datetime, dt.datetime]:
         """
-        Отфильтровать отчеты за указанный период.
+        Вернуть границы [start, end) указанного периода по Литве.
         """
         # Текущее время в UTC.
         utc_now = dt.datetime.now(dt.timezone.utc)
@@ -274,54 +755,44 @@ class WeatherDataService:
 
             # 00:00 сегодня по Литве.
             end = lithuanian_now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # Отфильтровать отчеты за указанный период.
-        timely_filtered_reports: list[dict] = [
-            weather_report
-            for weather_report
-            in resp
-            if dt.datetime.strptime(
-                weather_report['surinkimo_data'], "%Y-%m-%d %H:%M").replace(
-                    tzinfo=lithuanian_timezone) >= start
-            and dt.datetime.strptime(
-                weather_report['surinkimo_data'], "%Y-%m-%d %H:%M").replace(
-                    tzinfo=lithuanian_timezone) < end
-        ]
-        # Проверка, что хотя бы один отчет за указанный период есть.
-        if timely_filtered_reports:
-            return timely_filtered_reports
-        raise WeatherDataException(
-            error='out_of_timerange_error',
-            message=f"The station's reports don't belong to {period}.")
+        return start, end
 
     def save_weather_data(
         self,
         parsed_reports: list[dict]
-    ):
+    ) -> WriteResult:
         """
-        Десериализовать массив словарей погодных данных
-        и сохранить в базу.
+        Проверить типы и сохранить массив словарей погодных данных
+        в базу одним пакетом, пересчитать агрегаты интервалов с новыми
+        отчетами. Вернуть количество вставленных отчетов и пропущенных,
+        уже имеющихся в базе.
         """
-        serializer = ApiScraperWeatherDataSerializer(
-            data=parsed_reports, many=True
-        )
-
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        write_result = self.weatherdata_writer.write(parsed_reports)
+        if write_result.inserted:
+            utc = [report['UTC'] for report in parsed_reports]
+            self.rollup_service.update(
+                start=min(utc),
+                end=max(utc),
+                station_pks=list({
+                    getattr(report['station'], 'pk', report['station'])
+                    for report in parsed_reports
+                })
+            )
+        return write_result
 
     def get_earl_latest_reptime(
-            self, parsed_reports: list[dict]) -> tuple[dt.datetime, int]:
+            self, parsed_columns: dict[str, list]) -> tuple[dt.datetime, int]:
         """
         Вернуть время самого раннего и самого позднего отчета станции,
         а также количество отчетов сохраняемых в базу.
         """
+        local = parsed_columns['local']
         # Местное время самого раннего отчета.
-        earliest_report_time = parsed_reports[
-                len(parsed_reports) - 1]['local']
+        earliest_report_time = local[len(local) - 1]
 
         # Местное время самого позднего отчета.
-        latest_report_time = parsed_reports[0]['local']
+        latest_report_time = local[0]
 
         # Количество отчетов.
-        reports_count = len(parsed_reports)
+        reports_count = len(local)
         return earliest_report_time, latest_report_time, reports_count
@@ -0,0 +1,261 @@
+import datetime as dt
+import time
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+from typing import NamedTuple
+
+from .models import Station, WeatherData
+from .instrumentation import db_write_duration, db_write_rows
+from .loggers import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class WriteResult(NamedTuple):
+    """Результат записи пакета погодных отчетов в БД."""
+    inserted: int
+    skipped: int
+
+
+class WeatherDataWriteException(Exception):
+    """Погодный отчет не соответствует типам полей модели."""
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class WeatherDataBulkWriter:
+    """
+    Класс для пакетной записи преобразованных погодных отчетов в БД.
+    Типы значений проверяются в Python, а строки вставляются одним
+    INSERT ... ON CONFLICT DO NOTHING на пакет: отчеты, уже имеющиеся
+    в БД(station, unix), пропускаются и не прерывают запись остальных.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, model=WeatherData, batch_size: int = None):
+        self.model = model
+        self.batch_size = batch_size or self.BATCH_SIZE
+        # Все поля таблицы, кроме автоинкрементного id.
+        self.fields: list[models.Field] = [
+            field for field in model._meta.concrete_fields
+            if not isinstance(field, models.AutoField)
+        ]
+        self.sql_head = 'INSERT INTO {table} ({columns}) VALUES '.format(
+            table=connection.ops.quote_name(model._meta.db_table),
+            columns=', '.join(
+                connection.ops.quote_name(field.column) for field in self.fields
+            )
+        )
+        self.sql_row = '({})'.format(', '.join(['%s'] * len(self.fields)))
+        self.sql_tail = ' ON CONFLICT DO NOTHING RETURNING 1'
+
+    def get_expected_types(self, field: models.Field) -> tuple[type, ...]:
+        """Вернуть типы Python, допустимые для значения поля."""
+        if isinstance(field, models.ForeignKey):
+            return (int, Station)
+        if isinstance(field, models.DateTimeField):
+            return (dt.datetime,)
+        if isinstance(field, models.FloatField):
+            return (float, int)
+        if isinstance(field, models.IntegerField):
+            return (int,)
+        return (object,)
+
+    def check_value(self, field: models.Field, value):
+        """
+        Проверить тип значения поля и вернуть его в формате БД.
+        """
+        if value is None:
+            if not field.null:
+                raise WeatherDataWriteException(f'{field.name}: null value is not allowed.')
+            return None
+        expected_types = self.get_expected_types(field)
+        if isinstance(value, bool) or not isinstance(value, expected_types):
+            raise WeatherDataWriteException(
+                f'{field.name}: {value!r} is not of type '
+                f'{", ".join(t.__name__ for t in expected_types)}.'
+            )
+        if isinstance(field, models.ForeignKey) and isinstance(value, Station):
+            value = value.pk
+        elif isinstance(value, dt.datetime) and timezone.is_naive(value):
+            # Как и сериализатор, считаем наивное время заданным в текущем часовом поясе.
+            value = timezone.make_aware(value, timezone.get_current_timezone())
+        if isinstance(field, models.PositiveIntegerField) and value < 0:
+            raise WeatherDataWriteException(f'{field.name}: {value} is negative.')
+        return field.get_db_prep_save(value, connection)
+
+    def get_row(self, parsed_report: dict, created: dt.datetime) -> list:
+        """
+        Преобразовать словарь погодного отчета в строку таблицы.
+        """
+        row = []
+        for field in self.fields:
+            if field.name == 'created':
+                value = created
+            else:
+                value = parsed_report.get(field.name, parsed_report.get(field.attname))
+            row.append(self.check_value(field, value))
+        return row
+
+    def get_rows_from_columns(self, columns: dict[str, list], created: dt.datetime) -> list[tuple]:
+        """
+        Преобразовать колонки погодных отчетов(db_fieldname -> список значений)
+        в строки таблицы. Типы проверяются по колонкам.
+        """
+        length = len(columns['unix'])
+        check_value = self.check_value
+        checked_columns = []
+        for field in self.fields:
+            if field.name == 'created':
+                column = [created] * length
+            else:
+                column = columns.get(field.name, columns.get(field.attname))
+                if column is None:
+                    column = [None] * length
+            checked_columns.append([check_value(field, value) for value in column])
+        return list(zip(*checked_columns))
+
+    def write(self, parsed_reports: list[dict]) -> WriteResult:
+        """
+        Проверить типы и записать погодные отчеты в БД.
+        Вернуть количество вставленных и пропущенных(дубликатов) отчетов.
+        """
+        created = timezone.now()
+        # Проверка типов до записи: некорректный отчет не оставит в БД часть пакета.
+        rows = [self.get_row(report, created) for report in parsed_reports]
+        return self.insert_rows(rows)
+
+    def write_columns(self, columns: dict[str, list]) -> WriteResult:
+        """
+        Проверить типы и записать в БД погодные отчеты, преобразованные
+        парсером в колонки. Вернуть количество вставленных и пропущенных отчетов.
+        """
+        return self.insert_rows(self.get_rows_from_columns(columns, timezone.now()))
+
+    def insert_rows(self, rows: list) -> WriteResult:
+        """Вставить проверенные строки пакетами, пропуская дубликаты."""
+        inserted = 0
+        write_start = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                sql = self.sql_head + ', '.join([self.sql_row] * len(batch)) + self.sql_tail
+                cursor.execute(sql, [value for row in batch for value in row])
+                inserted += len(cursor.fetchall())
+        db_write_duration.labels(writer='insert').observe(time.perf_counter() - write_start)
+        db_write_rows.labels(writer='insert').observe(len(rows))
+        return WriteResult(inserted=inserted, skipped=len(rows) - inserted)
+
+
+class RowStream:
+    """
+    Файлоподобный объект для COPY FROM STDIN: отдает строки CSV
+    по мере чтения, не собирая весь пакет в памяти.
+    """
+    def __init__(self, rows):
+        self.lines = (self.format_row(row) for row in rows)
+        self.buffer = ''
+
+    @staticmethod
+    def format_value(value) -> str:
+        if value is None:
+            return ''
+        if isinstance(value, dt.datetime):
+            return value.isoformat()
+        return str(value)
+
+    def format_row(self, row: list) -> str:
+        return ','.join(self.format_value(value) for value in row) + '\n'
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += next(self.lines)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+
+class WeatherDataCopyWriter(WeatherDataBulkWriter):
+    """
+    Класс для загрузки больших объемов погодных данных(бэкфилл):
+    строки передаются в промежуточную временную таблицу через
+    COPY FROM STDIN, затем переносятся в основную таблицу одним
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING. Только PostgreSQL.
+    Временная таблица живет в рамках соединения, поэтому все методы
+    должны вызываться из одного потока.
+    """
+
+    STAGING_TABLE = 'api_scraper_weatherdata_staging'
+
+    def __init__(self, model=WeatherData, batch_size: int = None):
+        super().__init__(model=model, batch_size=batch_size)
+        quote_name = connection.ops.quote_name
+        self.table = quote_name(model._meta.db_table)
+        self.staging_table = quote_name(self.STAGING_TABLE)
+        self.columns = ', '.join(quote_name(field.column) for field in self.fields)
+
+    def create_staging_table(self):
+        """Создать пустую временную таблицу с колонками основной таблицы."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.staging_table}')
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {self.staging_table} AS '
+                f'SELECT {self.columns} FROM {self.table} WITH NO DATA'
+            )
+
+    def copy(self, parsed_reports: list[dict]) -> int:
+        """
+        Проверить типы и передать отчеты во временную таблицу через COPY.
+        Вернуть количество переданных строк.
+        """
+        created = timezone.now()
+        return self.copy_rows([self.get_row(report, created) for report in parsed_reports])
+
+    def copy_columns(self, columns: dict[str, list]) -> int:
+        """
+        Проверить типы и передать во временную таблицу отчеты,
+        преобразованные парсером в колонки. Вернуть количество переданных строк.
+        """
+        return self.copy_rows(self.get_rows_from_columns(columns, timezone.now()))
+
+    def copy_rows(self, rows: list) -> int:
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {self.staging_table} ({self.columns}) '
+                f"FROM STDIN WITH (FORMAT csv, NULL '')",
+                RowStream(rows)
+            )
+        db_write_duration.labels(writer='copy').observe(time.perf_counter() - start)
+        db_write_rows.labels(writer='copy').observe(len(rows))
+        return len(rows)
+
+    def merge_staging_table(self) -> int:
+        """
+        Перенести строки временной таблицы в основную, пропуская
+        уже имеющиеся в ней отчеты(station, unix). Вернуть количество
+        вставленных строк.
+        """
+        start = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.table} ({self.columns}) '
+                f'SELECT {self.columns} FROM {self.staging_table} '
+                f'ON CONFLICT DO NOTHING'
+            )
+            inserted = cursor.rowcount
+        db_write_duration.labels(writer='merge').observe(time.perf_counter() - start)
+        db_write_rows.labels(writer='merge').observe(inserted)
+        return inserted
+
+    def drop_staging_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.staging_table}')
@@ -29,6 +29,14 @@ app.conf.beat_schedule = {
         'task': 'api_scraper.tasks.update_station_heights',
         'schedule': crontab(hour=14, minute=30)
     },
+    'maintain_weather_data_partitions': {
+        'task': 'api_scraper.tasks.maintain_weather_data_partitions',
+        'schedule': crontab(hour=3, minute=20)
+    },
+    'downsample_weather_data': {
+        'task': 'api_scraper.tasks.downsample_weather_data',
+        'schedule': crontab(hour=3, minute=40)
+    },
     'save_data_last_day': {
         'task': 'api_scraper.tasks.save_weather_data_last_day',
         'schedule': crontab(minute=10)
@@ -40,5 +48,9 @@ app.conf.beat_schedule = {
     'save_current_data': {
         'task': 'api_scraper.tasks.save_current_weather_data',
         'schedule': crontab(minute=0),
+    },
+    'refresh_current_weather_snapshot': {
+        'task': 'weatherdata_api.tasks.refresh_current_weather_snapshot',
+        'schedule': crontab(minute='*/5'),
     }
 }
@@ -155,6 +155,33 @@ REDIS_HOST = 'redis'
 REDIS_PORT = '6379'
 REDIS_DB = '0'
 
+# Общий кэш процессов приложения и Celery.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/1',
+    }
+}
+
+# Архивные погодные данные: размер страницы по умолчанию и максимальный
+# при курсорной пагинации, размер пакета чтения из БД при потоковой выдаче.
+WEATHER_DATA_PAGE_SIZE = env.int('WEATHER_DATA_PAGE_SIZE', default=1000)
+WEATHER_DATA_MAX_PAGE_SIZE = env.int('WEATHER_DATA_MAX_PAGE_SIZE', default=10000)
+WEATHER_DATA_STREAM_CHUNK_SIZE = env.int('WEATHER_DATA_STREAM_CHUNK_SIZE', default=2000)
+# Количество строк в группе строк(row group) выгрузки Parquet/Arrow.
+WEATHER_DATA_EXPORT_ROW_GROUP_SIZE = env.int('WEATHER_DATA_EXPORT_ROW_GROUP_SIZE', default=50000)
+
+# Период сверки счетчиков результатов опроса станций за сутки с БД [сек].
+STATION_REQUEST_COUNTER_SEED_TIMEOUT = env.int('STATION_REQUEST_COUNTER_SEED_TIMEOUT', default=600)
+
+# Снимок текущей погоды в кэше [сек]: время хранения, возраст,
+# после которого снимок обновляется в фоне, максимальное время обновления
+# и время ожидания снимка, обновляемого другим процессом.
+CURRENT_WEATHER_SNAPSHOT_TTL = env.int('CURRENT_WEATHER_SNAPSHOT_TTL', default=3600)
+CURRENT_WEATHER_SNAPSHOT_FRESH_FOR = env.int('CURRENT_WEATHER_SNAPSHOT_FRESH_FOR', default=600)
+CURRENT_WEATHER_SNAPSHOT_LOCK_TIMEOUT = env.int('CURRENT_WEATHER_SNAPSHOT_LOCK_TIMEOUT', default=120)
+CURRENT_WEATHER_SNAPSHOT_WAIT_TIMEOUT = env.float('CURRENT_WEATHER_SNAPSHOT_WAIT_TIMEOUT', default=10)
+
 # Celery variables.
 CELERY_RESULT_BACKEND = f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}'
 CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}'
@@ -166,6 +193,46 @@ CELERY_TIMEZONE = 'UTC'
 
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Порт HTTP сервера метрик Prometheus воркера Celery.
+WORKER_METRICS_PORT = env.int('WORKER_METRICS_PORT', default=9808)
+
+# Максимальное количество одновременных запросов к станциям
+# при получении архивных погодных данных.
+WEATHER_FETCH_CONCURRENCY = env.int('WEATHER_FETCH_CONCURRENCY', default=20)
+# Максимальное количество полученных ответов станций, ожидающих
+# преобразования и записи в БД(при заполнении очереди запросы приостанавливаются).
+WEATHER_PIPELINE_QUEUE_SIZE = env.int('WEATHER_PIPELINE_QUEUE_SIZE', default=20)
+
+# Количество станций в группе(шарде), опрашиваемой отдельной задачей Celery
+# при получении архивных погодных данных. 0 - все станции опрашиваются одной задачей.
+WEATHER_SHARD_SIZE = env.int('WEATHER_SHARD_SIZE', default=0)
+# Очередь Celery для задач опроса шардов.
+WEATHER_SHARD_QUEUE = env.str('WEATHER_SHARD_QUEUE', default='celery')
+
+# Время хранения в кэше отметки станции(максимального unix времени
+# сохраненного отчета), после которого она сверяется с БД [сек].
+WEATHER_DATA_WATERMARK_TIMEOUT = env.int('WEATHER_DATA_WATERMARK_TIMEOUT', default=86400)
+
+# Количество месяцев после текущего, для которых заранее
+# создаются секции таблицы погодных данных.
+WEATHER_DATA_PARTITIONS_AHEAD = env.int('WEATHER_DATA_PARTITIONS_AHEAD', default=3)
+# Срок хранения погодных данных в месяцах(секции старше удаляются),
+# 0 - данные хранятся бессрочно.
+WEATHER_DATA_RETENTION_MONTHS = env.int('WEATHER_DATA_RETENTION_MONTHS', default=0)
+# Срок хранения сырых отчетов в днях, более старые сжимаются
+# в почасовой архив, 0 - отчеты не сжимаются.
+WEATHER_DATA_RAW_RETENTION_DAYS = env.int('WEATHER_DATA_RAW_RETENTION_DAYS', default=0)
+
+# Максимальное количество одновременных запросов к сервису высот.
+ELEVATION_FETCH_CONCURRENCY = env.int('ELEVATION_FETCH_CONCURRENCY', default=10)
+
+# Пул соединений HTTP клиента: общий лимит соединений, лимит на один хост,
+# время жизни простаивающего keep-alive соединения и кэша DNS [сек].
+HTTP_CLIENT_LIMIT = env.int('HTTP_CLIENT_LIMIT', default=100)
+HTTP_CLIENT_LIMIT_PER_HOST = env.int('HTTP_CLIENT_LIMIT_PER_HOST', default=20)
+HTTP_CLIENT_KEEPALIVE_TIMEOUT = env.float('HTTP_CLIENT_KEEPALIVE_TIMEOUT', default=30)
+HTTP_CLIENT_DNS_CACHE_TTL = env.int('HTTP_CLIENT_DNS_CACHE_TTL', default=300)
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated', 
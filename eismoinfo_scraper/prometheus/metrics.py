@@ -1,10 +1,11 @@
 import requests
 
+from django.utils import timezone
 from prometheus_client import Gauge
 from api_scraper.models import StationRequestResult
-import datetime as dt
+from api_scraper.station_request_result import StationRequestResultCounter
 
-last_reset_date = dt.datetime.today().date()
+last_reset_date = timezone.localdate()
 
 today_request_counter = Gauge(
         'today_request_counter',
@@ -12,6 +13,18 @@ today_request_counter = Gauge(
         ['status']
     )
 
+# Метки today_request_counter для статусов результатов опроса станций.
+STATUS_LABELS = {
+    StationRequestResult.Status.SUCCESS: 'SUCCESS',
+    StationRequestResult.Status.UNKNOWN_PARSING_VALUES_ERROR: 'UNKNOWN_PARSING_VALUE_ERROR',
+    StationRequestResult.Status.HTTP_REQUEST_ERROR: 'HTTP_REQUEST_ERROR',
+    StationRequestResult.Status.EMPTY_REPORT_ERROR: 'EMPTY_REPORT_ERROR',
+    StationRequestResult.Status.JSON_DECODE_ERROR: 'JSON_DECODE_ERROR',
+    StationRequestResult.Status.OUT_OF_TIMERANGE_ERROR: 'OUT_OF_TIMERANGE_ERROR',
+    StationRequestResult.Status.PARSING_ERROR: 'PARSING_ERROR',
+    StationRequestResult.Status.VALIDATION_ERROR: 'VALIDATION_ERROR',
+}
+
 health_status = Gauge(
     'health_status',
     "1 if the service is healthy, 0 if it's unhealthy"
@@ -32,77 +45,16 @@ def record_health_status():
 def record_today_request_counter():
     global last_reset_date
     global today_request_counter
-    today = dt.datetime.today().date()
+    today = timezone.localdate()
 
     if today != last_reset_date:
         today_request_counter.clear()
         last_reset_date = today
 
-    today_request_counter.labels(status='SUCCESS').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status__icontains='SUCCESS'
-        ).count()
-    )
-
-    today_request_counter.labels(status='TOTAL').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date()
-        ).count()
-    )
-
+    counts = StationRequestResultCounter().get_counts(today)
+    today_request_counter.labels(status='TOTAL').set(sum(counts.values()))
     today_request_counter.labels(status='FAILED').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status__icontains='ERROR'
-        ).count()
-    )
-
-    today_request_counter.labels(status='UNKNOWN_PARSING_VALUE_ERROR').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status='UNKN_PARSING_ERROR'
-        ).count()
-    )
-
-    today_request_counter.labels(status='HTTP_REQUEST_ERROR').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status='HTTP_REQUEST_ERROR'
-        ).count()
-    )
-
-    today_request_counter.labels(status='EMPTY_REPORT_ERROR').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status='EMPTY_REPORT_ERROR'
-        ).count()
-    )
-
-    today_request_counter.labels(status='JSON_DECODE_ERROR').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status='JSON_DECODE_ERROR'
-        ).count()
-    )
-
-    today_request_counter.labels(status='OUT_OF_TIMERANGE_ERROR').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status='OUT_OF_TIMERANGE_ERROR'
-        ).count()
-    )
-
-    today_request_counter.labels(status='PARSING_ERROR').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status='PARSING_ERROR'
-        ).count()
-    )
-
-    today_request_counter.labels(status='VALIDATION_ERROR').set(
-        StationRequestResult.objects.filter(
-            request_time__date=dt.datetime.today().date(),
-            status='VALIDATION_ERROR'
-        ).count()
+        sum(count for status, count in counts.items() if 'ERROR' in status)
     )
+    for status, label in STATUS_LABELS.items():
+        today_request_counter.labels(status=label).set(counts.get(status, 0))
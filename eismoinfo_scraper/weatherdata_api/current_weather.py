@@ -0,0 +1,143 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+from api_scraper.loggers import get_logger
+from api_scraper.weather_data_service import WeatherDataService
+
+from .serializers import CurrentWeatherDataReadSerializer
+
+
+logger = get_logger(__name__)
+
+
+class CurrentWeatherSnapshotService:
+    """
+    Класс для работы со снимком текущей погоды всех станций в общем кэше.
+    Снимок обновляется периодической задачей и отдается API без обращения
+    к eismoinfo.lt. Устаревший снимок отдается, пока в фоне готовится
+    новый(stale-while-revalidate); обновлять снимок одновременно может
+    только один процесс(single-flight).
+    """
+
+    SNAPSHOT_KEY = 'current_weather_snapshot'
+    LOCK_KEY = 'current_weather_snapshot_lock'
+    REFRESH_REQUESTED_KEY = 'current_weather_snapshot_refresh_requested'
+
+    # Отчеты последнего прочитанного снимка по eismo_station_id в памяти процесса.
+    _station_reports: tuple[float | None, dict[int, dict]] = (None, {})
+
+    def __init__(
+        self,
+        weather_data_service=WeatherDataService,
+        ttl: int = None,
+        fresh_for: int = None,
+        lock_timeout: int = None,
+        wait_timeout: float = None
+    ):
+        self.weather_data_service = weather_data_service
+        # Время хранения снимка в кэше [сек].
+        self.ttl = settings.CURRENT_WEATHER_SNAPSHOT_TTL if ttl is None else ttl
+        # Возраст снимка, после которого он считается устаревшим [сек].
+        self.fresh_for = (
+            settings.CURRENT_WEATHER_SNAPSHOT_FRESH_FOR if fresh_for is None else fresh_for
+        )
+        # Максимальное время обновления снимка одним процессом [сек].
+        self.lock_timeout = (
+            settings.CURRENT_WEATHER_SNAPSHOT_LOCK_TIMEOUT if lock_timeout is None else lock_timeout
+        )
+        # Время ожидания снимка, который обновляет другой процесс [сек].
+        self.wait_timeout = (
+            settings.CURRENT_WEATHER_SNAPSHOT_WAIT_TIMEOUT if wait_timeout is None else wait_timeout
+        )
+
+    def get_snapshot(self) -> dict | None:
+        return cache.get(self.SNAPSHOT_KEY)
+
+    def is_fresh(self, snapshot: dict) -> bool:
+        return time.time() - snapshot['created'] < self.fresh_for
+
+    def refresh(self) -> dict | None:
+        """
+        Получить текущую погоду от API, сериализовать и сохранить снимок
+        в кэш. Вернуть новый снимок или None, если снимок уже обновляет
+        другой процесс или обновление не удалось(прежний снимок остается).
+        """
+        if not cache.add(self.LOCK_KEY, True, timeout=self.lock_timeout):
+            return None
+        try:
+            service = self.weather_data_service(mode='current_weather_parsing')
+            parsed_reports = service.fetch_current_weather()
+            parsed_reports.sort(key=lambda x: x['eismo_station_id'])
+            serializer = CurrentWeatherDataReadSerializer(data=parsed_reports, many=True)
+            serializer.is_valid(raise_exception=True)
+            snapshot = {
+                'result': list(serializer.data),
+                'count': len(serializer.data),
+                'status': 'success',
+                'created': time.time()
+            }
+            cache.set(self.SNAPSHOT_KEY, snapshot, timeout=self.ttl)
+            logger.info(f'Current weather snapshot refreshed, stations: {snapshot["count"]}.')
+            return snapshot
+        except (
+            ValidationError, ObjectDoesNotExist,
+            AttributeError, KeyError, TypeError, ValueError
+        ) as e:
+            logger.error(f'Current weather snapshot refresh failed: {e!r}.')
+            return None
+        finally:
+            cache.delete(self.LOCK_KEY)
+            cache.delete(self.REFRESH_REQUESTED_KEY)
+
+    def request_refresh(self):
+        """Поставить фоновое обновление снимка, если оно еще не поставлено."""
+        from .tasks import refresh_current_weather_snapshot
+
+        if cache.add(self.REFRESH_REQUESTED_KEY, True, timeout=self.lock_timeout):
+            refresh_current_weather_snapshot.delay()
+
+    def get_or_refresh(self) -> dict | None:
+        """
+        Вернуть снимок для API: свежий или устаревший(с постановкой
+        фонового обновления). Если снимка нет, обновить его в текущем
+        процессе или дождаться обновления другим процессом.
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is not None:
+            if not self.is_fresh(snapshot):
+                self.request_refresh()
+            return snapshot
+
+        snapshot = self.refresh()
+        # Снимок обновляет другой процесс: дождаться результата.
+        deadline = time.monotonic() + self.wait_timeout
+        while (
+            snapshot is None
+            and cache.get(self.LOCK_KEY)
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.1)
+            snapshot = self.get_snapshot()
+        return snapshot
+
+    def get_without_waiting(self) -> dict | None:
+        """
+        Вернуть снимок из кэша без ожидания: устаревший или
+        отсутствующий снимок обновляется в фоне.
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is None or not self.is_fresh(snapshot):
+            self.request_refresh()
+        return snapshot
+
+    def get_station_reports(self, snapshot: dict) -> dict[int, dict]:
+        """Вернуть отчеты снимка по eismo_station_id, индекс строится один раз на снимок."""
+        created, reports = CurrentWeatherSnapshotService._station_reports
+        if created != snapshot['created']:
+            reports = {report['eismo_station_id']: report for report in snapshot['result']}
+            CurrentWeatherSnapshotService._station_reports = (snapshot['created'], reports)
+        return reports
@@ -0,0 +1,149 @@
+import itertools
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+from .readers import ValuesRowReader
+
+
+class ChunkSink:
+    """
+    Файлоподобный приемник записи pyarrow: записанные байты копятся
+    до вызова drain() и отдаются клиенту частями.
+    """
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class WeatherDataExport:
+    """
+    Класс для выгрузки погодных данных в колоночных форматах: Parquet
+    и Arrow IPC stream. Строки читаются из БД серверным курсором пакетами
+    по chunk_size(ValuesRowReader.iter_values) и записываются группами
+    по row_group_size строк, поэтому память процесса ограничена одной
+    группой. Типы колонок берутся из полей модели и аннотаций выборки:
+    коды явлений - целые, показатели - дробные, даты - timestamp UTC.
+    """
+
+    FORMATS = {
+        'parquet': 'application/vnd.apache.parquet',
+        'arrow': 'application/vnd.apache.arrow.stream',
+    }
+    EXTENSIONS = {
+        'parquet': 'parquet',
+        'arrow': 'arrows',
+    }
+    FIELD_TYPES = {
+        'IntegerField': pa.int32(),
+        'PositiveIntegerField': pa.int32(),
+        'BigIntegerField': pa.int64(),
+        'FloatField': pa.float64(),
+        'DateTimeField': pa.timestamp('us', tz='UTC'),
+        'CharField': pa.string(),
+        'BooleanField': pa.bool_(),
+    }
+
+    def __init__(self, reader: ValuesRowReader, row_group_size: int = None, chunk_size: int = None):
+        self.reader = reader
+        self.row_group_size = row_group_size or settings.WEATHER_DATA_EXPORT_ROW_GROUP_SIZE
+        self.chunk_size = chunk_size or settings.WEATHER_DATA_STREAM_CHUNK_SIZE
+
+    def get_field_type(self, queryset: QuerySet, column: str) -> pa.DataType:
+        annotation = queryset.query.annotations.get(column)
+        if annotation is not None:
+            field = annotation.output_field
+        else:
+            field = queryset.model._meta.get_field(column)
+        return self.FIELD_TYPES[field.get_internal_type()]
+
+    def get_schema(self, queryset: QuerySet | list[QuerySet]) -> pa.Schema:
+        """
+        Схема выгрузки в порядке полей сериализатора. Колонка, тип
+        которой различается в уровнях хранения(среднее целого показателя
+        в почасовом архиве), выгружается как float64.
+        """
+        querysets = [queryset] if isinstance(queryset, QuerySet) else queryset
+        fields = []
+        for name, column in zip(self.reader.names, self.reader.columns):
+            field_types = {self.get_field_type(part, column) for part in querysets}
+            field_type = field_types.pop() if len(field_types) == 1 else pa.float64()
+            fields.append(pa.field(name, field_type))
+        return pa.schema(fields)
+
+    def iter_batches(self, queryset: QuerySet | list[QuerySet], schema: pa.Schema):
+        """Вернуть генератор групп строк выборки в виде pyarrow.RecordBatch."""
+        values = self.reader.iter_values(queryset, chunk_size=self.chunk_size)
+        while True:
+            rows = list(itertools.islice(values, self.row_group_size))
+            if not rows:
+                return
+            yield pa.RecordBatch.from_arrays(
+                [
+                    pa.array(column, type=field.type)
+                    for column, field in zip(zip(*rows), schema)
+                ],
+                schema=schema
+            )
+
+    def write(self, queryset: QuerySet | list[QuerySet], file_format: str, sink):
+        """
+        Записать выборку в sink(путь или файлоподобный объект).
+        Генератор: после записи каждой группы строк возвращает ее размер.
+        """
+        schema = self.get_schema(queryset)
+        if file_format == 'parquet':
+            writer = pq.ParquetWriter(sink, schema)
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+        with writer:
+            for batch in self.iter_batches(queryset, schema):
+                writer.write_batch(batch)
+                yield batch.num_rows
+
+    def iter_bytes(self, queryset: QuerySet | list[QuerySet], file_format: str):
+        sink = ChunkSink()
+        for _ in self.write(queryset, file_format, sink):
+            yield sink.drain()
+        # Завершение файла: метаданные Parquet или маркер конца потока Arrow.
+        yield sink.drain()
+
+    def get_response(
+        self,
+        queryset: QuerySet | list[QuerySet],
+        file_format: str,
+        filename: str
+    ) -> StreamingHttpResponse:
+        response = StreamingHttpResponse(
+            self.iter_bytes(queryset, file_format),
+            content_type=self.FORMATS[file_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}.{self.EXTENSIONS[file_format]}"'
+        )
+        return response
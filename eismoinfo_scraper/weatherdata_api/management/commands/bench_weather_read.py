@@ -0,0 +1,90 @@
+import datetime as dt
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api_scraper.models import WeatherData
+from weatherdata_api.readers import ValuesRowReader
+from weatherdata_api.serializers import WeatherDataReadSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark get-weather-data encoding on synthetic rows: '
+        'WeatherDataReadSerializer vs the values_list() fast read path. '
+        'The database is not used.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Number of synthetic rows')
+
+    def handle(self, *args, **options):
+        reader = ValuesRowReader(WeatherDataReadSerializer)
+        values = self.get_synthetic_values(reader.columns, options['rows'])
+        renderer = JSONRenderer()
+
+        def serializer_path():
+            # Как ORM: экземпляры модели с аннотациями станции.
+            instances = []
+            for row in values:
+                instance = WeatherData()
+                for column, value in zip(reader.columns, row):
+                    setattr(instance, column, value)
+                instances.append(instance)
+            result = WeatherDataReadSerializer(instances, many=True).data
+            return renderer.render({'result': result, 'count': len(result), 'status': 'success'})
+
+        def fast_path():
+            result = list(reader.convert_rows(values))
+            return renderer.render({'result': result, 'count': len(result), 'status': 'success'})
+
+        outputs = {}
+        for name, path in (('serializer', serializer_path), ('values_list', fast_path)):
+            start = time.perf_counter()
+            outputs[name] = path()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{name:>12}: {len(values)} rows in {elapsed:.3f} s '
+                f'({len(values) / elapsed:.0f} rows/s), {len(outputs[name])} bytes'
+            )
+        if outputs['serializer'] == outputs['values_list']:
+            self.stdout.write(self.style.SUCCESS('Outputs are byte-identical.'))
+        else:
+            self.stdout.write(self.style.ERROR('Outputs differ.'))
+
+    def get_synthetic_values(self, columns: tuple[str, ...], rows: int) -> list[tuple]:
+        """Сгенерировать строки values_list() для 100 станций с шагом 10 минут."""
+        random.seed(0)
+        now = int(time.time()) // 600 * 600
+        values = []
+        for index in range(rows):
+            station_id, step = divmod(index, rows // 100 or 1)
+            unix = now - 600 * step
+            utc = dt.datetime.fromtimestamp(unix, dt.timezone.utc)
+            row = {
+                'eismo_station_id': station_id,
+                'latitude': 54 + station_id / 100,
+                'longitude': 25 + station_id / 100,
+                'height': random.choice((None, round(random.uniform(50, 300), 1))),
+                'position_change_counter': 0,
+                'position_change_time': None,
+                'unix': unix,
+                'local': utc,
+                'UTC': utc,
+                'time_zone_offset': 180,
+                'surface_cond': random.randint(1, 10),
+                'temperature_air': round(random.uniform(-20, 30), 1),
+                'surface_temp': round(random.uniform(-20, 30), 1),
+                'visibility': random.randint(0, 2000),
+                'wind_degree': random.randint(1, 16),
+                'wind_m_s_avg': round(random.uniform(0, 20), 1),
+                'wind_m_s_max': round(random.uniform(0, 30), 1),
+                'precipitation_type': random.choice((None, random.randint(1, 5))),
+                'precipitation_amount': random.choice((None, round(random.uniform(0, 5), 2))),
+                'dew_point': round(random.uniform(-20, 20), 1),
+                'frost_point': round(random.uniform(-20, 20), 1),
+            }
+            values.append(tuple(row[column] for column in columns))
+        return values
@@ -0,0 +1,55 @@
+import datetime as dt
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from weatherdata_api.exports import WeatherDataExport
+from weatherdata_api.views import WeatherDataView
+
+
+class Command(BaseCommand):
+    help = (
+        'Export weather data for a time range(UTC) to a Parquet or Arrow IPC stream file. '
+        'Columns are the get-weather-data fields; rows are read with a server-side cursor '
+        'and written in row groups of WEATHER_DATA_EXPORT_ROW_GROUP_SIZE rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', type=str, help='Start of the range, format: 2024-12-23T00:00')
+        parser.add_argument('end', type=str, help='End of the range(inclusive), format: 2024-12-24T00:00')
+        parser.add_argument('output', type=str, help='Path of the output file')
+        parser.add_argument(
+            '--stations', type=int, nargs='+', default=None,
+            help='eismo_station_id of the stations to export, all stations by default'
+        )
+        parser.add_argument(
+            '--format', choices=list(WeatherDataExport.FORMATS), default='parquet',
+            help='Output file format, parquet by default'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            params = {
+                'UTC__gte': dt.datetime.strptime(options['start'], '%Y-%m-%dT%H:%M').replace(tzinfo=dt.timezone.utc),
+                'UTC__lte': dt.datetime.strptime(options['end'], '%Y-%m-%dT%H:%M').replace(tzinfo=dt.timezone.utc),
+            }
+        except ValueError:
+            raise CommandError('Required date format: 2024-12-23T00:00')
+        if params['UTC__gte'] > params['UTC__lte']:
+            raise CommandError('start is later than end.')
+        if options['stations']:
+            params['station__eismo_station_id__in'] = options['stations']
+
+        view = WeatherDataView()
+        querysets = list(view.get_tiers(params).values())
+        export = WeatherDataExport(view.reader)
+        started = time.perf_counter()
+        rows = sum(export.write(
+            querysets[0] if len(querysets) == 1 else querysets,
+            options['format'],
+            options['output']
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rows exported: {rows}, file: {options["output"]}, '
+            f'time: {time.perf_counter() - started:.2f} s.'
+        ))
@@ -0,0 +1,96 @@
+import base64
+import datetime as dt
+import json
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from .readers import ValuesRowReader
+
+
+class CursorException(Exception):
+    """Некорректный курсор или размер страницы."""
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class WeatherDataCursorPaginator:
+    """
+    Класс для keyset(курсорной) пагинации архивных погодных данных.
+    Порядок выдачи: eismo_station_id по возрастанию, local и unix по
+    убыванию(unix уникален в рамках станции). Курсор хранит ключ
+    последней отданной строки, поэтому следующая страница выбирается
+    условием по индексу, а не OFFSET, и не зависит от ширины периода.
+    """
+
+    ORDERING = ('eismo_station_id', '-local', '-unix')
+
+    def __init__(self, page_size: int = None, max_page_size: int = None):
+        self.page_size = page_size or settings.WEATHER_DATA_PAGE_SIZE
+        self.max_page_size = max_page_size or settings.WEATHER_DATA_MAX_PAGE_SIZE
+
+    def get_limit(self, limit: str | None) -> int:
+        """Преобразовать query parameter limit в размер страницы."""
+        if limit is None:
+            return self.page_size
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise CursorException(f'Параметр limit должен быть целым числом: {limit}.')
+        if limit <= 0:
+            raise CursorException('Параметр limit должен быть больше 0.')
+        return min(limit, self.max_page_size)
+
+    def encode_cursor(self, row: dict) -> str:
+        """Закодировать ключ строки(станция, local, unix) в курсор."""
+        key = [row['eismo_station_id'], row['local'], row['unix']]
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> tuple[int, dt.datetime, int]:
+        """Раскодировать курсор в ключ строки(станция, local, unix)."""
+        try:
+            station_id, local, unix = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            # local в формате сериализатора оканчивается на Z,
+            # fromisoformat принимает его только с Python 3.11.
+            if local.endswith('Z'):
+                local = f'{local[:-1]}+00:00'
+            return int(station_id), dt.datetime.fromisoformat(local), int(unix)
+        except (AttributeError, TypeError, ValueError):
+            raise CursorException(f'Некорректный курсор: {cursor}.')
+
+    def filter_after_cursor(self, queryset: QuerySet, cursor: str) -> QuerySet:
+        """Оставить строки, следующие за строкой курсора в порядке выдачи."""
+        station_id, local, unix = self.decode_cursor(cursor)
+        return queryset.filter(
+            Q(eismo_station_id__gt=station_id)
+            | Q(eismo_station_id=station_id, local__lt=local)
+            | Q(eismo_station_id=station_id, local=local, unix__lt=unix)
+        )
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet | list[QuerySet],
+        limit: str | None,
+        cursor: str | None,
+        reader: ValuesRowReader
+    ) -> tuple[list[dict], str | None]:
+        """
+        Вернуть строки страницы и курсор следующей страницы
+        (None, если страница последняя). Страница нескольких выборок
+        (уровней хранения) сливается из первых строк каждой из них.
+        """
+        limit = self.get_limit(limit)
+        querysets = [queryset] if isinstance(queryset, QuerySet) else queryset
+        pages = []
+        for part in querysets:
+            part = part.order_by(*self.ORDERING)
+            if cursor:
+                part = self.filter_after_cursor(part, cursor)
+            # Лишняя строка показывает, есть ли следующая страница.
+            pages.append(part[:limit + 1])
+        rows = reader.read(pages[0] if len(pages) == 1 else pages)[:limit + 1]
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, self.encode_cursor(rows[-1])
+        return rows, None
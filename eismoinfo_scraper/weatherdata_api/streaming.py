@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .readers import ValuesRowReader
+
+
+class WeatherDataStream:
+    """
+    Класс для потоковой выдачи погодных данных. Строки читаются из БД
+    пакетами через QuerySet.iterator() и отдаются клиенту по мере
+    преобразования, поэтому память процесса не зависит от объема выборки.
+    Форматы: ndjson(одна строка JSON на отчет) и json(конверт
+    result/count/status, передаваемый частями). Несколько выборок
+    (уровни хранения) читаются одним потоком, см. ValuesRowReader.
+    """
+
+    FORMATS = {
+        'ndjson': 'application/x-ndjson',
+        'json': 'application/json',
+    }
+
+    def __init__(self, reader: ValuesRowReader, chunk_size: int = None):
+        self.reader = reader
+        self.chunk_size = chunk_size or settings.WEATHER_DATA_STREAM_CHUNK_SIZE
+        self.encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def iter_rows(self, queryset: QuerySet | list[QuerySet]):
+        for row in self.reader.iter_rows(queryset, chunk_size=self.chunk_size):
+            yield self.encoder.encode(row)
+
+    def iter_ndjson(self, queryset: QuerySet | list[QuerySet]):
+        for row in self.iter_rows(queryset):
+            yield row + '\n'
+
+    def iter_json(self, queryset: QuerySet | list[QuerySet]):
+        yield '{"result":['
+        count = 0
+        for row in self.iter_rows(queryset):
+            yield row if count == 0 else ',' + row
+            count += 1
+        yield '],"count":%d,"status":"success"}' % count
+
+    def get_response(self, queryset: QuerySet | list[QuerySet], stream_format: str) -> StreamingHttpResponse:
+        iterator = self.iter_ndjson if stream_format == 'ndjson' else self.iter_json
+        return StreamingHttpResponse(
+            iterator(queryset),
+            content_type=self.FORMATS[stream_format]
+        )
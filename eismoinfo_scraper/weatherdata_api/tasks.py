@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .current_weather import CurrentWeatherSnapshotService
+
+
+@shared_task
+def refresh_current_weather_snapshot():
+    CurrentWeatherSnapshotService().refresh()
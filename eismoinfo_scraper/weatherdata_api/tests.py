@@ -1,3 +1,512 @@
+import datetime as dt
+import io
+import unittest
+
+import pyarrow.parquet as pq
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api_scraper.archive import WeatherDataArchiveService
+from api_scraper.lookups import ParsingModelLookup, StationSpatialIndex
+from api_scraper.models import Station, StationRequestResult, SurfaceCondition, WeatherData, WeatherDataArchive
+from api_scraper.parsing import ParsingModelTuple, WeatherDictParser
+from api_scraper.partitions import WeatherDataPartitionService
+from api_scraper.rollups import WeatherDataRollupService
+from .exports import ChunkSink, WeatherDataExport
+from .views import StationRequestResultView, WeatherDataView
+
+
+def get_value(value, index: int):
+    """Значение поля фикстуры: вызываемое значение вычисляется по номеру объекта."""
+    return value(index) if callable(value) else value
+
+
+def create_stations(*eismo_station_ids: int, **fields) -> list[Station]:
+    """Создать станции, поля по умолчанию заменяются fields(значения или функции eismo_station_id)."""
+    defaults = {
+        'city_name': 'city', 'road_name': 'road', 'road_number': 'A1',
+        'latitude': 54.0, 'longitude': 25.0,
+    }
+    return Station.objects.bulk_create([
+        Station(
+            eismo_station_id=eismo_station_id,
+            **{name: get_value(value, eismo_station_id) for name, value in {**defaults, **fields}.items()}
+        )
+        for eismo_station_id in eismo_station_ids
+    ])
+
+
+def create_station(eismo_station_id: int = 1, **fields) -> Station:
+    return create_stations(eismo_station_id, **fields)[0]
+
+
+def create_weather_data(
+    station: Station,
+    start: dt.datetime,
+    count: int,
+    step: dt.timedelta = dt.timedelta(minutes=10),
+    local_offset: dt.timedelta = dt.timedelta(),
+    **fields
+) -> list[WeatherData]:
+    """
+    Создать count отчетов станции с шагом step начиная со start.
+    fields - значения показателей или функции номера отчета.
+    """
+    weather_data = []
+    for index in range(count):
+        moment = start + step * index
+        weather_data.append(WeatherData(
+            station=station, unix=int(moment.timestamp()),
+            local=moment + local_offset, UTC=moment, time_zone_offset=120,
+            **{name: get_value(value, index) for name, value in fields.items()}
+        ))
+    return WeatherData.objects.bulk_create(weather_data)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plans are checked on PostgreSQL only.')
+class QueryPlanTests(TestCase):
+    """
+    Регрессионные тесты планов запросов: выборки API должны
+    использовать индексы, а не полное сканирование таблиц.
+    """
+
+    start = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    end = dt.datetime(2025, 1, 1, 2, tzinfo=dt.timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        request_results = []
+        for station in create_stations(*range(1, 11)):
+            for weather_data in create_weather_data(station, cls.start, 1000):
+                request_results.append(StationRequestResult(
+                    station=station, request_time_unix=weather_data.unix,
+                    status=StationRequestResult.Status.SUCCESS
+                ))
+        StationRequestResult.objects.bulk_create(request_results)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        # Маленькие тестовые таблицы планировщик читает целиком,
+        # поэтому последовательное сканирование отключается.
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, *index_names):
+        plan = queryset.explain()
+        self.assertTrue(
+            any(index_name in plan for index_name in index_names),
+            f'None of {index_names} is used:\n{plan}'
+        )
+
+    def test_weather_data_by_station(self):
+        queryset = WeatherDataView().get_queryset({
+            'station__eismo_station_id': 5,
+            'UTC__gte': self.start,
+            'UTC__lte': self.end
+        })
+        self.assertUsesIndex(queryset, 'api_scraper_wd_station_utc_idx')
+
+    def test_weather_data_all_stations(self):
+        queryset = WeatherDataView().get_queryset({
+            'UTC__gte': self.start,
+            'UTC__lte': self.end
+        })
+        self.assertUsesIndex(queryset, 'api_scraper_wd_utc_brin_idx', 'api_scraper_wd_station_utc_idx')
+
+    def test_station_request_results_by_status(self):
+        queryset = StationRequestResultView().get_queryset({
+            'start': self.start,
+            'end': self.end,
+            'request_status': StationRequestResult.Status.HTTP_REQUEST_ERROR
+        })
+        self.assertUsesIndex(queryset, 'api_scraper_srr_time_stat_idx')
+
+    def test_station_request_results_errors(self):
+        queryset = StationRequestResultView().get_queryset({
+            'start': self.start,
+            'end': self.end,
+            'request_status': 'ERROR'
+        })
+        self.assertUsesIndex(queryset, 'api_scraper_srr_time_stat_idx')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Table partitioning is checked on PostgreSQL only.')
+class PartitionPruningTests(TestCase):
+    """
+    Выборка get-weather-data из секционированной таблицы
+    должна читать только секции запрошенного периода.
+    """
+
+    now = dt.datetime(2025, 3, 15, tzinfo=dt.timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        create_weather_data(
+            create_station(), dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc),
+            90 * 24, step=dt.timedelta(hours=1)
+        )
+        cls.service = WeatherDataPartitionService(months_ahead=1, retention_months=0)
+        cls.service.convert(now=cls.now)
+
+    def test_partitions_created(self):
+        self.assertEqual(
+            [partition.name for partition in self.service.get_partitions()],
+            [f'api_scraper_weatherdata_p2025_{month:02}' for month in range(1, 5)]
+        )
+        self.assertEqual(WeatherData.objects.count(), 90 * 24)
+
+    def test_weather_data_by_station_pruned(self):
+        queryset = WeatherDataView().get_queryset({
+            'station__eismo_station_id': 1,
+            'UTC__gte': dt.datetime(2025, 2, 10, tzinfo=dt.timezone.utc),
+            'UTC__lte': dt.datetime(2025, 2, 12, tzinfo=dt.timezone.utc)
+        })
+        plan = queryset.explain()
+        self.assertIn('api_scraper_weatherdata_p2025_02', plan)
+        for partition in ('p2025_01', 'p2025_03', 'p2025_04', 'default'):
+            self.assertNotIn(f'api_scraper_weatherdata_{partition}', plan)
+        self.assertEqual(queryset.count(), 49)
+
+
+class ParsingColumnTests(TestCase):
+    """
+    Колонка кодов явлений должна разбираться так же, как parse_value:
+    зарегистрированное значение без кода сохраняется как null,
+    повторный опрос станции нужен только для неизвестных значений.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = create_station()
+        SurfaceCondition.objects.bulk_create([
+            SurfaceCondition(value_api='Sausa', code=1),
+            SurfaceCondition(value_api='Drégna', code=None),
+        ])
+
+    def setUp(self):
+        lookup = ParsingModelLookup(SurfaceCondition)
+        lookup.load()
+        self.parser = WeatherDictParser(
+            mode='retrospective',
+            parsing_models_dict={
+                'surface_cond': ParsingModelTuple(
+                    model=SurfaceCondition, lookup=lookup, unregistered_values=set()
+                )
+            }
+        )
+
+    def test_registered_value_without_code(self):
+        self.assertIsNone(self.parser.parse_value('surface_cond', None, 'Drégna', self.station))
+        column = self.parser.parse_column(
+            'surface_cond', None, ('Sausa', 'Drégna', None), [self.station.eismo_station_id] * 3
+        )
+        self.assertEqual(column, [1, None, None])
+        self.assertEqual(self.parser.stations_to_refetch, set())
+        self.assertEqual(self.parser.parsing_models_dict['surface_cond'].unregistered_values, set())
+
+    def test_unknown_value(self):
+        column = self.parser.parse_column(
+            'surface_cond', None, ('Apledėjusi',), [self.station.eismo_station_id]
+        )
+        self.assertEqual(column, [None])
+        self.assertEqual(self.parser.stations_to_refetch, {self.station.eismo_station_id})
+        self.assertEqual(
+            self.parser.parsing_models_dict['surface_cond'].unregistered_values, {'Apledėjusi'}
+        )
+
+
+class WeatherDataPaginationTests(TestCase):
+    """
+    Курсор из поля next должен возвращать следующую страницу
+    get-weather-data без пропусков и повторов строк.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        create_weather_data(create_station(), dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc), 15)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_page(self, **params) -> dict:
+        response = self.client.get(
+            reverse('get-weather-data'),
+            {'start': '2025-01-01T00:00', 'end': '2025-01-02T00:00', 'limit': 10, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'success')
+        return response.data
+
+    def test_next_page_by_cursor(self):
+        first = self.get_page()
+        self.assertEqual(first['count'], 10)
+        self.assertIsNotNone(first['next'])
+        second = self.get_page(cursor=first['next'])
+        self.assertEqual(second['count'], 5)
+        self.assertIsNone(second['next'])
+        self.assertEqual(
+            [row['unix'] for row in first['result'] + second['result']],
+            list(WeatherData.objects.order_by('-unix').values_list('unix', flat=True))
+        )
+
+
+class WeatherAggregateTests(TestCase):
+    """
+    Агрегаты из таблицы WeatherDataRollup и рассчитанные из WeatherData
+    для интервалов до начала покрытия станции должны совпадать, в том
+    числе после сжатия части отчетов в почасовой архив.
+    """
+
+    start = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    end = dt.datetime(2025, 1, 2, 23, 59, tzinfo=dt.timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = create_station()
+        create_weather_data(
+            cls.station, cls.start, 2 * 144,
+            temperature_air=lambda step: step % 13 - 6.5,
+            surface_temp=lambda step: None if step % 5 == 0 else step % 7 * 1.5,
+            wind_m_s_max=lambda step: step % 11 * 0.5,
+            precipitation_amount=0.0
+        )
+
+    def test_rollups_match_raw_aggregates(self):
+        service = WeatherDataRollupService()
+        buckets = ('hour', 'day')
+        raw_aggregates = {
+            bucket: service.get_aggregates(bucket=bucket, start=self.start, end=self.end)
+            for bucket in buckets
+        }
+        # Агрегаты ведутся со второго дня, первый рассчитывается из WeatherData.
+        service.update(start=self.start + dt.timedelta(days=1), end=self.end)
+        for bucket in buckets:
+            with self.subTest(bucket=bucket):
+                mixed = service.get_aggregates(bucket=bucket, start=self.start, end=self.end)
+                self.assertEqual(len(mixed), {'hour': 48, 'day': 2}[bucket])
+                self.assertAggregatesEqual(mixed, raw_aggregates[bucket])
+
+    def test_rollups_of_updated_stations_only(self):
+        other = create_station(2)
+        create_weather_data(other, self.start, 2 * 144, temperature_air=lambda step: step % 5)
+        service = WeatherDataRollupService()
+        raw = service.get_aggregates(bucket='hour', start=self.start, end=self.end)
+        self.assertEqual(len(raw), 2 * 48)
+        # Новые отчеты пришли только от первой станции.
+        coverage_start = self.start + dt.timedelta(days=1, hours=2)
+        service.update(start=coverage_start, end=self.end, station_pks=[self.station.pk])
+        self.assertEqual(service.get_coverage('hour'), {self.station.pk: coverage_start})
+        self.assertAggregatesEqual(
+            service.get_aggregates(bucket='hour', start=self.start, end=self.end), raw
+        )
+        # Бэкфилл старых дат не сдвигает покрытие: между периодами нет агрегатов.
+        service.update(start=self.start, end=self.start + dt.timedelta(hours=3), station_pks=[self.station.pk])
+        self.assertEqual(service.get_coverage('hour'), {self.station.pk: coverage_start})
+        self.assertAggregatesEqual(
+            service.get_aggregates(bucket='hour', start=self.start, end=self.end), raw
+        )
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'Weather data downsampling is checked on PostgreSQL only.')
+    def test_rollups_match_after_downsampling(self):
+        service = WeatherDataRollupService()
+        buckets = ('hour', 'day')
+        raw_aggregates = {
+            bucket: service.get_aggregates(bucket=bucket, start=self.start, end=self.end)
+            for bucket in buckets
+        }
+        # Граница архива приходится на середину второго дня.
+        WeatherDataArchiveService(raw_retention_days=1).downsample(
+            now=dt.datetime(2025, 1, 3, 12, 30, tzinfo=dt.timezone.utc)
+        )
+        for bucket in buckets:
+            with self.subTest(bucket=bucket, source='archive'):
+                archived = service.get_aggregates(bucket=bucket, start=self.start, end=self.end)
+                self.assertAggregatesEqual(archived, raw_aggregates[bucket])
+        service.update(start=self.start, end=self.end)
+        for bucket in buckets:
+            with self.subTest(bucket=bucket, source='rollups'):
+                rollups = service.get_aggregates(bucket=bucket, start=self.start, end=self.end)
+                self.assertAggregatesEqual(rollups, raw_aggregates[bucket])
+
+    def assertAggregatesEqual(self, rows: list[dict], expected: list[dict]):
+        self.assertEqual(len(rows), len(expected))
+        for row, expected_row in zip(rows, expected):
+            self.assertEqual(row.keys(), expected_row.keys())
+            for key, value in expected_row.items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(row[key], value)
+                else:
+                    self.assertEqual(row[key], value)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Weather data downsampling is checked on PostgreSQL only.')
+class WeatherDataArchiveTests(TestCase):
+    """
+    Отчеты старше срока хранения сжимаются в почасовой архив,
+    get-weather-data читает период по обе стороны границы архива.
+    """
+
+    start = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    now = dt.datetime(2025, 1, 3, 12, 30, tzinfo=dt.timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        create_weather_data(
+            create_station(), cls.start, 3 * 144, local_offset=dt.timedelta(hours=2),
+            temperature_air=lambda step: None if step % 6 == 5 else float(step % 6),
+            surface_cond=lambda step: 1 if step % 6 < 4 else 2
+        )
+        cls.service = WeatherDataArchiveService(raw_retention_days=1)
+        cls.report = cls.service.downsample(now=cls.now)
+
+    def test_reports_downsampled(self):
+        self.assertEqual(self.report.archived, 36)
+        self.assertEqual(self.report.deleted, 36 * 6)
+        self.assertEqual(self.report.merged, 0)
+        self.assertEqual(self.service.get_horizon(), dt.datetime(2025, 1, 2, 12, tzinfo=dt.timezone.utc))
+        archive = WeatherDataArchive.objects.get(UTC=dt.datetime(2025, 1, 1, 5, tzinfo=dt.timezone.utc))
+        self.assertEqual(archive.reports_count, 6)
+        self.assertEqual(archive.unix, int(archive.UTC.timestamp()))
+        self.assertEqual(archive.local, dt.datetime(2025, 1, 1, 7, tzinfo=dt.timezone.utc))
+        self.assertAlmostEqual(archive.temperature_air, 2.0)
+        self.assertEqual(archive.temperature_air_min, 0.0)
+        self.assertEqual(archive.temperature_air_max, 4.0)
+        self.assertEqual(archive.temperature_air_last, 4.0)
+        self.assertEqual(archive.temperature_air_count, 5)
+        self.assertEqual(archive.surface_cond, 1)
+
+    def test_late_reports_merged(self):
+        hour = dt.datetime(2025, 1, 1, 5, tzinfo=dt.timezone.utc)
+        late = create_weather_data(
+            Station.objects.get(), hour + dt.timedelta(minutes=5), 1,
+            local_offset=dt.timedelta(hours=2), temperature_air=30.0
+        )[0]
+        # До следующего сжатия отчет читается вместе с архивом.
+        view = WeatherDataView()
+        tiers = view.get_tiers({
+            'UTC__gte': dt.datetime(2025, 1, 1, 4),
+            'UTC__lte': dt.datetime(2025, 1, 1, 6)
+        })
+        self.assertEqual(list(tiers), ['raw', 'archive'])
+        self.assertEqual(
+            [row['UTC'] for row in view.reader.read(list(tiers.values()))],
+            ['2025-01-01T06:00:00Z', '2025-01-01T05:05:00Z', '2025-01-01T05:00:00Z', '2025-01-01T04:00:00Z']
+        )
+        [aggregates] = WeatherDataRollupService().get_aggregates(bucket='hour', start=hour, end=hour)
+        self.assertEqual(aggregates['reports_count'], 7)
+        self.assertEqual(aggregates['temperature_air_max'], 30.0)
+
+        report = self.service.downsample(now=self.now)
+        self.assertEqual(report, (0, 1, 1))
+        self.assertFalse(WeatherData.objects.filter(pk=late.pk).exists())
+        archive = WeatherDataArchive.objects.get(UTC=hour)
+        self.assertEqual(archive.reports_count, 7)
+        self.assertEqual(archive.temperature_air_count, 6)
+        self.assertAlmostEqual(archive.temperature_air, (2.0 * 5 + 30.0) / 6)
+        self.assertEqual(archive.temperature_air_min, 0.0)
+        self.assertEqual(archive.temperature_air_max, 30.0)
+        self.assertEqual(archive.temperature_air_last, 4.0)
+        self.assertEqual(archive.surface_cond, 1)
+
+    def test_weather_data_routed_by_tier(self):
+        view = WeatherDataView()
+        tiers = view.get_tiers({
+            'UTC__gte': dt.datetime(2025, 1, 2, 10),
+            'UTC__lte': dt.datetime(2025, 1, 2, 13)
+        })
+        self.assertEqual(list(tiers), ['raw', 'archive'])
+        rows = view.reader.read(list(tiers.values()))
+        self.assertEqual(
+            [row['UTC'] for row in rows],
+            ['2025-01-02T13:00:00Z', *(f'2025-01-02T12:{minute}0:00Z' for minute in range(5, -1, -1)),
+             '2025-01-02T11:00:00Z', '2025-01-02T10:00:00Z']
+        )
+        tiers = view.get_tiers({
+            'UTC__gte': dt.datetime(2025, 1, 1, 10),
+            'UTC__lte': dt.datetime(2025, 1, 1, 13)
+        })
+        self.assertEqual(list(tiers), ['archive'])
+        self.assertEqual(tiers['archive'].count(), 4)
+
+
+class StationSpatialIndexTests(TestCase):
+    """
+    Ближайшие станции и станции в прямоугольнике из индекса
+    должны совпадать с полным перебором станций.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        create_stations(
+            *range(1, 78),
+            latitude=lambda number: 54.0 + number % 7 * 0.37,
+            longitude=lambda number: 21.0 + number % 11 * 0.53
+        )
+
+    def setUp(self):
+        self.index = StationSpatialIndex(Station)
+        self.index.refresh(force=True)
+
+    def test_nearest_matches_brute_force(self):
+        stations = list(Station.objects.all())
+        for latitude, longitude in ((54.68, 25.28), (55.9, 21.1), (60.0, 30.0)):
+            with self.subTest(latitude=latitude, longitude=longitude):
+                expected = sorted(
+                    stations,
+                    key=lambda station: (
+                        StationSpatialIndex.get_distance(latitude, longitude, station),
+                        station.eismo_station_id
+                    )
+                )[:10]
+                nearest = self.index.get_nearest(latitude, longitude, 10)
+                self.assertEqual([station for station, _ in nearest], expected)
+
+    def test_stations_in_bbox(self):
+        stations = self.index.get_in_bbox(54.3, 22.0, 55.2, 24.0)
+        expected = Station.objects.filter(
+            latitude__range=(54.3, 55.2), longitude__range=(22.0, 24.0)
+        ).order_by('eismo_station_id')
+        self.assertEqual(stations, list(expected))
+        self.assertTrue(stations)
+
+
+class WeatherDataExportTests(TestCase):
+    """
+    Выгрузка Parquet должна содержать строки get-weather-data
+    группами по row_group_size строк с типами полей модели.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        create_weather_data(
+            create_station(), dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc), 25,
+            surface_cond=lambda step: step % 3,
+            temperature_air=lambda step: step / 2
+        )
+
+    def test_parquet_row_groups(self):
+        view = WeatherDataView()
+        queryset = view.get_queryset({
+            'UTC__gte': dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc),
+            'UTC__lte': dt.datetime(2025, 1, 2, tzinfo=dt.timezone.utc)
+        })
+        sink = ChunkSink()
+        row_groups = list(WeatherDataExport(view.reader, row_group_size=10).write(queryset, 'parquet', sink))
+        self.assertEqual(row_groups, [10, 10, 5])
 
-# Create your tests here.
+        parquet_file = pq.ParquetFile(io.BytesIO(sink.drain()))
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        table = parquet_file.read()
+        self.assertEqual(table.schema.names, list(view.reader.names))
+        self.assertEqual(str(table.schema.field('surface_cond').type), 'int32')
+        self.assertEqual(str(table.schema.field('UTC').type), 'timestamp[us, tz=UTC]')
+        rows = table.to_pylist()
+        expected = list(queryset.values_list(*view.reader.columns))
+        self.assertEqual([tuple(row.values()) for row in rows], expected)
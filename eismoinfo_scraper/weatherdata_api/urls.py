@@ -1,8 +1,9 @@
 from django.urls import path
 from .views import (
-     WeatherDataView, StationView, ParsingModelRetrieveUpdateView,
+     WeatherDataView, WeatherDataExportView, WeatherAggregateView, StationView, ParsingModelRetrieveUpdateView,
      ParsingModelCombinedReadView, ParsingModelListCreateView,
      CurrentWeatherDataView, StationRequestResultView,
+     NearestStationView, StationBoundingBoxView,
      health_view
      )
 from rest_framework.authtoken import views
@@ -11,9 +12,17 @@ urlpatterns = [
      path('health/', health_view, name='application-healthcheck'),
      path('get-weather-data/', WeatherDataView.as_view(),
           name='get-weather-data'),
+     path('export-weather-data/', WeatherDataExportView.as_view(),
+          name='export-weather-data'),
+     path('get-weather-aggregates/', WeatherAggregateView.as_view(),
+          name='get-weather-aggregates'),
      path('get-current-weather/', CurrentWeatherDataView.as_view(),
           name='get-current-weather'),
      path('get-stations/', StationView.as_view(), name='get-stations'),
+     path('get-nearest-stations/', NearestStationView.as_view(),
+          name='get-nearest-stations'),
+     path('get-stations-in-bbox/', StationBoundingBoxView.as_view(),
+          name='get-stations-in-bbox'),
      path('api-token-auth/', views.obtain_auth_token, name='get-token'),
      path('parsing-models/show-all/', ParsingModelCombinedReadView.as_view(),
           name='parsing-models-show-all'),
@@ -1,7 +1,9 @@
 import datetime as dt
+import math
 
-from django.db.models import F
+from django.db.models import F, QuerySet
 from django.db import IntegrityError
+from django.utils import timezone
 
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
@@ -11,15 +13,22 @@ from rest_framework.exceptions import ValidationError
 from api_scraper.models import (
     WeatherData, Station, PrecipitationType,
     WindDegree, SurfaceCondition,
-    StationRequestResult
+    StationRequestResult, WeatherDataRollup, WeatherDataArchive
 )
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
+from api_scraper.archive import WeatherDataArchiveService
 from api_scraper.loggers import get_logger
-from api_scraper.weather_data_service import WeatherDataService
+from api_scraper.lookups import StationSpatialIndex
+from api_scraper.rollups import WeatherDataRollupService
 from api_scraper.station_request_result import StationRequestResultQueryService
 
+from .current_weather import CurrentWeatherSnapshotService
+from .exports import WeatherDataExport
+from .pagination import CursorException, WeatherDataCursorPaginator
+from .readers import ValuesRowReader
+from .streaming import WeatherDataStream
 from .serializers import (
     WeatherDataReadSerializer,
     StationSerializer,
@@ -45,28 +54,57 @@ class WeatherDataView(generics.GenericAPIView):
     """
     Класс для просмотра архивных погодных данных.
     Обязательные query parameters: start, end.
+    Период раньше границы почасового архива читается из WeatherDataArchive,
+    отчеты WeatherData - за весь период(в том числе загруженные за уже
+    сжатые часы до следующего сжатия); уровни хранения ответа
+    в заголовке X-Weather-Data-Tier.
     """
 
     serializer_class = WeatherDataReadSerializer
     timezone = 'Europe/Vilnius'
     permission_classes = [IsAuthenticated,]
-
-    def get_queryset(self, params):
-        queryset = WeatherData.objects.filter(**params).select_related(
-            'station').annotate(
+    # Чтение строк без сериализатора, поля и форматы как у serializer_class.
+    # Строки уровней хранения сливаются в порядке выдачи.
+    reader = ValuesRowReader(WeatherDataReadSerializer, merge_ordering=WeatherDataCursorPaginator.ORDERING)
+    archive_service = WeatherDataArchiveService()
+    TIER_HEADER = 'X-Weather-Data-Tier'
+
+    def get_tiers(self, params) -> dict[str, QuerySet]:
+        """
+        Вернуть выборки уровней хранения, покрывающие запрошенный период:
+        raw - отчеты WeatherData за весь период, archive - строки архива
+        раньше границы архива. Период целиком раньше границы читается
+        из WeatherData, только если за него есть отчеты.
+        """
+        horizon = self.archive_service.get_horizon()
+        start, end = (
+            timezone.make_aware(params[key]) if timezone.is_naive(params[key]) else params[key]
+            for key in ('UTC__gte', 'UTC__lte')
+        )
+        if horizon is None or start >= horizon:
+            return {'raw': self.get_queryset(params)}
+        raw = self.get_queryset(params)
+        archive = self.get_queryset({**params, 'UTC__lt': horizon}, model=WeatherDataArchive)
+        if end < horizon and not raw.exists():
+            return {'archive': archive}
+        return {'raw': raw, 'archive': archive}
+
+    def get_queryset(self, params, model=WeatherData):
+        queryset = model.objects.filter(**params).annotate(
                 eismo_station_id=F('station__eismo_station_id'),
                 latitude=F('station__latitude'),
                 longitude=F('station__longitude'),
                 height=F('station__height'),
                 position_change_counter=F('station__position_change_counter'),
                 position_change_time=F('station__position_change_time')
-            ).order_by('eismo_station_id', '-local')
+            ).order_by(*WeatherDataCursorPaginator.ORDERING)
         return queryset
 
     @swagger_auto_schema(
         operation_description=('Посмотеть архивные погодные данные '
                                'по заданным параметрам.\nОбязательные query parameters: '
-                               'start, end. Опционально: id(станции) '),
+                               'start, end. Опционально: id(станции), '
+                               'limit и cursor(постраничная выдача), stream(потоковая выдача)'),
         responses={
             400: 'Ошибка: Параметр start позже end. \nОшибка: Неверный формат введенных значений'
         },
@@ -80,7 +118,17 @@ class WeatherDataView(generics.GenericAPIView):
                               type=openapi.TYPE_STRING, required=True),
             openapi.Parameter('end', openapi.IN_QUERY,
                               description="Конец запращиваемого периода по UTC, формат: 2024-11-21Т23:00",
-                              type=openapi.TYPE_STRING, required=True)
+                              type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('limit', openapi.IN_QUERY,
+                              description="Размер страницы(включает постраничную выдачу)",
+                              type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('cursor', openapi.IN_QUERY,
+                              description="Курсор следующей страницы из поля next предыдущего ответа",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('stream', openapi.IN_QUERY,
+                              description="Потоковая выдача всех данных периода: ndjson или json",
+                              type=openapi.TYPE_STRING, required=False,
+                              enum=list(WeatherDataStream.FORMATS))
         ])
     def get(self, request):
         #  Получить значение переданные в query params.
@@ -130,16 +178,60 @@ class WeatherDataView(generics.GenericAPIView):
                 status=status.HTTP_200_OK
             )
 
-        # Сделать запрос к базе.
-        queryset = self.get_queryset(params)
-        if queryset.exists():
-            serializer = WeatherDataReadSerializer(queryset, many=True)
+        # Сделать запрос к базе: одна выборка или выборки уровней хранения.
+        tiers = self.get_tiers(params)
+        querysets = list(tiers.values())
+        queryset = querysets[0] if len(querysets) == 1 else querysets
+        tier_header = {self.TIER_HEADER: ','.join(tiers)}
+
+        # Потоковая выдача: строки читаются из БД пакетами.
+        stream_format = self.request.query_params.get('stream', None)
+        if stream_format is not None:
+            if stream_format not in WeatherDataStream.FORMATS:
+                response_data = {
+                    'result': [],
+                    'count': 0,
+                    'status': (f'Неизвестный формат потоковой выдачи: {stream_format}. '
+                               f'Допустимые значения: {", ".join(WeatherDataStream.FORMATS)}')
+                }
+                return Response(response_data, status=status.HTTP_200_OK)
+            response = WeatherDataStream(self.reader).get_response(
+                queryset, stream_format
+            )
+            response[self.TIER_HEADER] = tier_header[self.TIER_HEADER]
+            return response
+
+        # Постраничная выдача по курсору.
+        limit = self.request.query_params.get('limit', None)
+        cursor = self.request.query_params.get('cursor', None)
+        if limit is not None or cursor is not None:
+            try:
+                rows, next_cursor = WeatherDataCursorPaginator().paginate_queryset(
+                    queryset, limit, cursor, self.reader
+                )
+            except CursorException as e:
+                response_data = {
+                    'result': [],
+                    'count': 0,
+                    'status': e.message
+                }
+                return Response(response_data, status=status.HTTP_200_OK)
+            response_data = {
+                'result': rows,
+                'count': len(rows),
+                'status': 'success',
+                'next': next_cursor
+            }
+            return Response(response_data, status=status.HTTP_200_OK, headers=tier_header)
+
+        result = self.reader.read(queryset)
+        if result:
             response_data = {
-                'result': serializer.data,
-                'count': len(serializer.data),
+                'result': result,
+                'count': len(result),
                 'status': 'success'
             }
-            return Response(response_data, status=status.HTTP_200_OK)
+            return Response(response_data, status=status.HTTP_200_OK, headers=tier_header)
         return Response(
                 {'Ошибка': 'В базе данных отстутвуют данные '
                  'удовлетворяющие указанным параметам.'},
@@ -147,6 +239,191 @@ class WeatherDataView(generics.GenericAPIView):
         )
 
 
+class WeatherDataExportView(WeatherDataView):
+    """
+    Класс для выгрузки архивных погодных данных станций за период
+    в Parquet или Arrow IPC stream. Колонки - поля get-weather-data.
+    Обязательные query parameters: start, end.
+    """
+
+    PARAMS_FORMAT = ('Требуемый формат параметров: /?start=2024-11-21T10:00&end=2024-12-21T10:00'
+                     '&id=71,72(опционально)&file_format=parquet(опционально)')
+
+    def get_error_response(self, message: str) -> Response:
+        response_data = {
+            'result': [],
+            'count': 0,
+            'status': f'{message} {self.PARAMS_FORMAT}'
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_description=('Выгрузить архивные погодные данные станций за период '
+                               'файлом Parquet или Arrow IPC stream.\n'
+                               'Обязательные query parameters: start, end. '
+                               'Опционально: id(станций), file_format.'),
+        manual_parameters=[
+            openapi.Parameter('start', openapi.IN_QUERY,
+                              description="Начало запрашиваемого периода по UTC,  формат: 2024-11-21Т10:00",
+                              type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('end', openapi.IN_QUERY,
+                              description="Конец запращиваемого периода по UTC, формат: 2024-11-21Т23:00",
+                              type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('id', openapi.IN_QUERY,
+                              description="ID станций через запятую, по умолчанию все станции",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('file_format', openapi.IN_QUERY,
+                              description="Формат файла, по умолчанию parquet",
+                              type=openapi.TYPE_STRING, required=False,
+                              enum=list(WeatherDataExport.FORMATS)),
+        ])
+    def get(self, request):
+        file_format = self.request.query_params.get('file_format', 'parquet')
+        if file_format not in WeatherDataExport.FORMATS:
+            return self.get_error_response(
+                f'Неизвестный формат файла: {file_format}. '
+                f'Допустимые значения: {", ".join(WeatherDataExport.FORMATS)}.'
+            )
+        params = {}
+        try:
+            params['UTC__gte'] = WeatherAggregateView.parse_datetime_param(
+                self.request.query_params.get('start', None)
+            )
+            params['UTC__lte'] = WeatherAggregateView.parse_datetime_param(
+                self.request.query_params.get('end', None)
+            )
+            station_ids = self.request.query_params.get('id', None)
+            if station_ids is not None:
+                params['station__eismo_station_id__in'] = [
+                    int(station_id) for station_id in station_ids.split(',')
+                ]
+        except (AttributeError, TypeError, ValueError):
+            return self.get_error_response('Ошибка при конвертации введенных значений.')
+        if params['UTC__gte'] > params['UTC__lte']:
+            return self.get_error_response('Параметр start позже end.')
+
+        tiers = self.get_tiers(params)
+        querysets = list(tiers.values())
+        response = WeatherDataExport(self.reader).get_response(
+            querysets[0] if len(querysets) == 1 else querysets,
+            file_format,
+            filename=f'weather_data_{params["UTC__gte"]:%Y%m%dT%H%M}_{params["UTC__lte"]:%Y%m%dT%H%M}'
+        )
+        response[self.TIER_HEADER] = ','.join(tiers)
+        return response
+
+
+class WeatherAggregateView(generics.GenericAPIView):
+    """
+    Класс для просмотра агрегатов архивных погодных данных(min, max, среднее)
+    по часам или суткам. Обязательные query parameters: bucket, start, end.
+    """
+
+    permission_classes = [IsAuthenticated,]
+    PARAMS_FORMAT = ('Требуемый формат параметров: /?bucket=hour&start=2024-11-21T10:00'
+                     '&end=2024-11-22T10:00&metrics=temperature_air,surface_temp(опционально)'
+                     '&id=71,72(опционально)')
+
+    def get_error_response(self, message: str) -> Response:
+        response_data = {
+            'result': [],
+            'count': 0,
+            'status': f'{message} {self.PARAMS_FORMAT}'
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def parse_datetime_param(value: str) -> dt.datetime:
+        """Преобразовать время по UTC формата 2024-11-21T10:00."""
+        date_param, time_param = value.split('T')
+        return dt.datetime.combine(
+            dt.datetime.strptime(date_param, "%Y-%m-%d"),
+            dt.datetime.strptime(time_param, "%H:%M").time(),
+            tzinfo=dt.timezone.utc
+        )
+
+    @swagger_auto_schema(
+        operation_description=('Посмотреть агрегаты архивных погодных данных станций '
+                               '(min, max, среднее) по часам или суткам по UTC.\n'
+                               'Обязательные query parameters: bucket, start, end. '
+                               'Опционально: metrics, id(станций).'),
+        manual_parameters=[
+            openapi.Parameter('bucket', openapi.IN_QUERY,
+                              description="Интервал агрегации",
+                              type=openapi.TYPE_STRING, required=True,
+                              enum=list(WeatherDataRollup.Bucket.values)),
+            openapi.Parameter('start', openapi.IN_QUERY,
+                              description="Начало запрашиваемого периода по UTC,  формат: 2024-11-21Т10:00",
+                              type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('end', openapi.IN_QUERY,
+                              description="Конец запращиваемого периода по UTC, формат: 2024-11-21Т23:00",
+                              type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('metrics', openapi.IN_QUERY,
+                              description=("Показатели через запятую, по умолчанию все: "
+                                           f"{', '.join(WeatherDataRollupService.METRICS)}"),
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('id', openapi.IN_QUERY,
+                              description="ID станций через запятую, по умолчанию все станции",
+                              type=openapi.TYPE_STRING, required=False),
+        ])
+    def get(self, request):
+        bucket = self.request.query_params.get('bucket', None)
+        if bucket not in WeatherDataRollup.Bucket.values:
+            return self.get_error_response(
+                f'Неизвестный интервал агрегации: {bucket}. '
+                f'Допустимые значения: {", ".join(WeatherDataRollup.Bucket.values)}.'
+            )
+        try:
+            start = self.parse_datetime_param(self.request.query_params.get('start', None))
+            end = self.parse_datetime_param(self.request.query_params.get('end', None))
+            station_ids = self.request.query_params.get('id', None)
+            if station_ids is not None:
+                station_ids = [int(station_id) for station_id in station_ids.split(',')]
+        except (AttributeError, TypeError, ValueError):
+            return self.get_error_response('Ошибка при конвертации введенных значений.')
+        if start > end:
+            return self.get_error_response('Параметр start позже end.')
+
+        metrics = self.request.query_params.get('metrics', None)
+        if metrics is not None:
+            metrics = metrics.split(',')
+            unknown_metrics = set(metrics) - set(WeatherDataRollupService.METRICS)
+            if unknown_metrics:
+                return self.get_error_response(
+                    f'Неизвестные показатели: {", ".join(sorted(unknown_metrics))}.'
+                )
+
+        # eismo_station_id станций по pk.
+        stations = Station.objects.all()
+        if station_ids is not None:
+            stations = stations.filter(eismo_station_id__in=station_ids)
+        eismo_station_ids = dict(stations.values_list('pk', 'eismo_station_id'))
+
+        rows = WeatherDataRollupService().get_aggregates(
+            bucket=bucket,
+            start=start,
+            end=end,
+            metrics=metrics,
+            station_pks=None if station_ids is None else list(eismo_station_ids)
+        )
+        result = [
+            {
+                'eismo_station_id': eismo_station_ids[row.pop('station')],
+                'bucket_start': ValuesRowReader.format_datetime(
+                    row.pop('bucket_start'), dt.timezone.utc
+                ),
+                **row
+            }
+            for row in rows
+        ]
+        response_data = {
+            'result': result,
+            'count': len(result),
+            'status': 'success'
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
 class CurrentWeatherDataView(generics.GenericAPIView):
     """
     Класс для просмотра фактических погодных данных.
@@ -158,28 +435,24 @@ class CurrentWeatherDataView(generics.GenericAPIView):
             operation_description='Посмотреть текущие погодные данные всех функционирующих на данный момент станций.'
     )
     def get(self, request):
-        # Получить текущие отчеты погоды от всех станций.
-        weather_data_service = WeatherDataService(mode='current_weather_parsing')
-        parsed_reports = weather_data_service.fetch_current_weather()
-        parsed_reports.sort(key=lambda x: x['eismo_station_id'])
-
-        # Сериализовать данные и вернуть ответ.
-        serializer = self.get_serializer(data=parsed_reports, many=True)
-        try:
-            serializer.is_valid(raise_exception=True)
-        except ValidationError as e:
+        # Получить снимок текущих отчетов погоды от всех станций из кэша.
+        snapshot = CurrentWeatherSnapshotService().get_or_refresh()
+        if snapshot is None:
             response_data = {
                 'result': [],
                 'count': 0,
-                'status': e
+                'status': 'Текущие погодные данные временно недоступны.'
             }
         else:
             response_data = {
-                'result': serializer.data,
-                'count': len(serializer.data),
-                'status': 'success'
+                'result': snapshot['result'],
+                'count': snapshot['count'],
+                'status': snapshot['status'],
+                'snapshot_time': dt.datetime.fromtimestamp(
+                    snapshot['created'], dt.timezone.utc
+                ).isoformat()
             }
-        return Response(response_data, status=status.HTTP_200_OK)  # serializer.data - сериализованные данные в формате БД.
+        return Response(response_data, status=status.HTTP_200_OK)
 
 
 class StationView(generics.GenericAPIView):
@@ -199,6 +472,161 @@ class StationView(generics.GenericAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class StationSpatialView(generics.GenericAPIView):
+    """
+    Базовый класс поиска станций по координатам через индекс
+    StationSpatialIndex в памяти процесса. С параметром weather=true
+    к станции добавляется ее отчет из снимка текущей погоды(current_weather,
+    None - станции нет в снимке или снимок недоступен).
+    """
+    serializer_class = StationSerializer
+    permission_classes = [IsAuthenticated]
+    PARAMS_FORMAT = ''
+
+    def get_error_response(self, message: str) -> Response:
+        response_data = {
+            'result': [],
+            'count': 0,
+            'status': f'{message} {self.PARAMS_FORMAT}'
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    def get_float_param(self, name: str, required: bool = True) -> float | None:
+        """ValueError, если параметр отсутствует(и обязателен) или не является числом."""
+        value = self.request.query_params.get(name, None)
+        if value is None:
+            if required:
+                raise ValueError(f'{name} is required.')
+            return None
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError(f'{name} is not finite.')
+        return value
+
+    def get_spatial_index(self) -> StationSpatialIndex:
+        spatial_index = StationSpatialIndex.for_model(Station)
+        spatial_index.refresh()
+        return spatial_index
+
+    def get_response(self, stations: list[Station], distances: list[float] = None) -> Response:
+        result = list(self.get_serializer(stations, many=True).data)
+        if distances is not None:
+            for row, distance in zip(result, distances):
+                row['distance'] = round(distance, 3)
+        response_data = {}
+        if self.request.query_params.get('weather', 'false') == 'true':
+            snapshot_service = CurrentWeatherSnapshotService()
+            snapshot = snapshot_service.get_without_waiting()
+            reports = {} if snapshot is None else snapshot_service.get_station_reports(snapshot)
+            for row in result:
+                row['current_weather'] = reports.get(row['eismo_station_id'])
+            response_data['snapshot_time'] = None if snapshot is None else dt.datetime.fromtimestamp(
+                snapshot['created'], dt.timezone.utc
+            ).isoformat()
+        response_data = {
+            'result': result,
+            'count': len(result),
+            'status': 'success',
+            **response_data
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+class NearestStationView(StationSpatialView):
+    """
+    Класс для поиска ближайших к точке станций.
+    Обязательные query parameters: latitude, longitude.
+    """
+
+    DEFAULT_COUNT = 5
+    MAX_COUNT = 50
+    PARAMS_FORMAT = ('Требуемый формат параметров: /?latitude=54.68&longitude=25.28'
+                     '&count=5(опционально)&max_distance=30(опционально)&weather=true(опционально)')
+
+    @swagger_auto_schema(
+        operation_description=('Найти ближайшие к точке станции в порядке удаления, '
+                               'расстояние по большому кругу в поле distance [км].\n'
+                               'Обязательные query parameters: latitude, longitude. '
+                               'Опционально: count, max_distance, weather(текущая погода станций).'),
+        manual_parameters=[
+            openapi.Parameter('latitude', openapi.IN_QUERY, description="Широта точки",
+                              type=openapi.TYPE_NUMBER, required=True),
+            openapi.Parameter('longitude', openapi.IN_QUERY, description="Долгота точки",
+                              type=openapi.TYPE_NUMBER, required=True),
+            openapi.Parameter('count', openapi.IN_QUERY,
+                              description=f"Количество станций, по умолчанию {DEFAULT_COUNT}, не более {MAX_COUNT}",
+                              type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('max_distance', openapi.IN_QUERY,
+                              description="Максимальное расстояние до станции [км]",
+                              type=openapi.TYPE_NUMBER, required=False),
+            openapi.Parameter('weather', openapi.IN_QUERY,
+                              description="Добавить текущую погоду станций: true или false",
+                              type=openapi.TYPE_BOOLEAN, required=False),
+        ])
+    def get(self, request):
+        try:
+            latitude = self.get_float_param('latitude')
+            longitude = self.get_float_param('longitude')
+            max_distance = self.get_float_param('max_distance', required=False)
+            count = int(self.request.query_params.get('count', self.DEFAULT_COUNT))
+        except (TypeError, ValueError):
+            return self.get_error_response('Ошибка при конвертации введенных значений.')
+        if count <= 0:
+            return self.get_error_response('Параметр count должен быть больше 0.')
+
+        nearest = self.get_spatial_index().get_nearest(
+            latitude, longitude, min(count, self.MAX_COUNT), max_distance
+        )
+        return self.get_response(
+            [station for station, _ in nearest],
+            [distance for _, distance in nearest]
+        )
+
+
+class StationBoundingBoxView(StationSpatialView):
+    """
+    Класс для поиска станций внутри прямоугольника координат.
+    Обязательные query parameters: min_latitude, min_longitude, max_latitude, max_longitude.
+    """
+
+    PARAMS_FORMAT = ('Требуемый формат параметров: /?min_latitude=54.5&min_longitude=25.0'
+                     '&max_latitude=54.8&max_longitude=25.5&weather=true(опционально)')
+
+    @swagger_auto_schema(
+        operation_description=('Найти станции внутри прямоугольника координат '
+                               'в порядке eismo_station_id.\nОбязательные query parameters: '
+                               'min_latitude, min_longitude, max_latitude, max_longitude. '
+                               'Опционально: weather(текущая погода станций).'),
+        manual_parameters=[
+            *(openapi.Parameter(name, openapi.IN_QUERY, description=description,
+                                type=openapi.TYPE_NUMBER, required=True)
+              for name, description in (
+                  ('min_latitude', 'Минимальная широта'),
+                  ('min_longitude', 'Минимальная долгота'),
+                  ('max_latitude', 'Максимальная широта'),
+                  ('max_longitude', 'Максимальная долгота'),
+              )),
+            openapi.Parameter('weather', openapi.IN_QUERY,
+                              description="Добавить текущую погоду станций: true или false",
+                              type=openapi.TYPE_BOOLEAN, required=False),
+        ])
+    def get(self, request):
+        try:
+            min_latitude = self.get_float_param('min_latitude')
+            min_longitude = self.get_float_param('min_longitude')
+            max_latitude = self.get_float_param('max_latitude')
+            max_longitude = self.get_float_param('max_longitude')
+        except (TypeError, ValueError):
+            return self.get_error_response('Ошибка при конвертации введенных значений.')
+        if min_latitude > max_latitude or min_longitude > max_longitude:
+            return self.get_error_response('Минимальные координаты больше максимальных.')
+
+        stations = self.get_spatial_index().get_in_bbox(
+            min_latitude, min_longitude, max_latitude, max_longitude
+        )
+        return self.get_response(stations)
+
+
 class ParsingModelCombinedReadView(generics.GenericAPIView):
     """Класс для просмотра данных всех парсинговых моделей одновременно."""
 
@@ -28,5 +28,9 @@ app.conf.beat_schedule = {
     'save_weather_data': {
         'task': 'webscraper.tasks.save_weather_data',
         'schedule': crontab(minute=10)
+    },
+    'maintain_weather_data_partitions': {
+        'task': 'webscraper.tasks.maintain_weather_data_partitions',
+        'schedule': crontab(hour=3, minute=20)
     }
 }
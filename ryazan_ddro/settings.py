@@ -161,6 +161,27 @@ CELERY_TIMEZONE = 'UTC'
 
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Общий кэш веб-приложения и воркеров Celery.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/1',
+    }
+}
+
+# Страница ddro.ru/meteo/: время, в течение которого задачи используют
+# общий снимок страницы без повторного запроса к сайту [сек], и время
+# хранения снимка и валидаторов ETag/Last-Modified в кэше [сек].
+DDRO_PAGE_SNAPSHOT_WINDOW = env.int('DDRO_PAGE_SNAPSHOT_WINDOW', default=600)
+DDRO_PAGE_SNAPSHOT_TTL = env.int('DDRO_PAGE_SNAPSHOT_TTL', default=86400)
+
+# Количество месяцев после текущего, для которых заранее
+# создаются секции таблицы погодных данных.
+WEATHER_DATA_PARTITIONS_AHEAD = env.int('WEATHER_DATA_PARTITIONS_AHEAD', default=3)
+# Срок хранения погодных данных в месяцах(секции старше удаляются),
+# 0 - данные хранятся бессрочно.
+WEATHER_DATA_RETENTION_MONTHS = env.int('WEATHER_DATA_RETENTION_MONTHS', default=0)
+
 # Для избежания глюка со входом в админку после деплоя.
 CSRF_TRUSTED_ORIGINS = ['http://localhost', 'http://127.0.0.1', f'http://{env("HARVESTER_SERVER_IP")}']
 
@@ -168,6 +189,8 @@ CORS_ALLOWED_ORIGINS = ['http://localhost', 'http://127.0.0.1', f'http://{env("H
 
 # Prometheus.
 PROMETHEUS_EXPORT_MIGRATIONS = True
+# Порт HTTP сервера метрик Prometheus воркера Celery.
+WORKER_METRICS_PORT = env.int('WORKER_METRICS_PORT', default=9808)
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
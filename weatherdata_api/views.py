@@ -2,8 +2,10 @@ from datetime import datetime
 
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from webscraper.models import Station, WeatherData
+from .readers import ValuesRowReader
 from .serializers import StationSerializer, WeatherDataSerializer
 
 
@@ -22,6 +24,8 @@ class StationDetailView(generics.RetrieveAPIView):
 class WeatherDataListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = WeatherDataSerializer
+    # Чтение строк без сериализатора, поля и форматы как у serializer_class.
+    reader = ValuesRowReader(WeatherDataSerializer)
 
     def get_queryset(self):
         queryset = WeatherData.objects.all()
@@ -42,3 +46,7 @@ class WeatherDataListView(generics.ListAPIView):
             pass
 
         return queryset.order_by('-local')
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(self.reader.read(queryset))
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WebscraperConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'webscraper'
+
+    def ready(self):
+        import webscraper.instrumentation
@@ -0,0 +1,147 @@
+import re
+from typing import NamedTuple
+
+from bs4.dammit import UnicodeDammit
+from lxml import html as lxml_html
+
+from .logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class FieldPattern(NamedTuple):
+    """
+    A tuple that represents the weather report key filled by a station
+    block label and the pattern extracting the value from the rest of the line.
+    """
+    report_key: str
+    value_pattern: re.Pattern | None
+
+
+# Подпись в блоке станции -> поле отчета и шаблон значения(без единиц измерения).
+FIELD_PATTERNS: dict[str, FieldPattern] = {
+    'Время снятия показаний': FieldPattern(
+        'local', re.compile(r'(\d{1,}[./-]\d{1,}[./-]\d{2,4}\s\d{1,2}:\d{1,2}:\d{1,2})')
+    ),
+    'Осадки': FieldPattern('precipitation_type', None),
+    'Поверхность': FieldPattern('surface_cond', None),
+    'Коэфициент трения': FieldPattern('friction_coeff', None),
+    'Относительная влажность': FieldPattern('humidity', re.compile(r'(.*)%')),
+    'Атмосферное давление': FieldPattern('pressure', re.compile(r'(.*)\sгПа')),
+    'Температура воздуха': FieldPattern('temperature_air', re.compile(r'(.*)°C')),
+    'Точка росы': FieldPattern('dew_point', re.compile(r'(.*)°C')),
+    'Температура поверхности дороги': FieldPattern('surface_temp', re.compile(r'(.*)°C')),
+    'Высота слоя воды': FieldPattern('water_layer_thickness', re.compile(r'(.*)мм')),
+    'Высота слоя снега': FieldPattern('snow_layer_thickness', re.compile(r'(.*)мм')),
+    'Высота слоя льда': FieldPattern('ice_layer_thickness', re.compile(r'(.*)мм')),
+    'Процент льда': FieldPattern('ice_percentage', re.compile(r'(.*)мм')),
+    'Скорость ветра': FieldPattern('wind_m_s_avg', re.compile(r'(\d+.*\d*)')),
+    'Направление ветра': FieldPattern('wind_degree', re.compile(r'(.*)°')),
+    'Интенсивность осадков': FieldPattern('precipitation_amount', re.compile(r'(.*)мм/ч')),
+    'Прибавление количества осадков по сравнению с предыдущим измерением': FieldPattern(
+        'precipitation_delta', re.compile(r'(.*)мм')
+    ),
+}
+
+# Первая строка блока: "<4 цифры id> <название станции>".
+HEADER_PATTERN = re.compile(r'\n(.*)\n')
+STATION_ID_PATTERN = re.compile(r'\n(\d{4})\s+')
+# Один проход по блоку: координаты станции или строка "<подпись>: <значение>".
+TOKEN_PATTERN = re.compile(
+    r'(?P<latitude>[0-9.]{2,}),\s+(?P<longitude>[0-9.]{6,})'
+    r'|(?P<label>' + '|'.join(re.escape(label) for label in FIELD_PATTERNS) + r'):[^\S\n](?P<value>.*)'
+)
+
+
+class MalformedBlockException(Exception):
+    """The station block lacks the header, the coordinates or the measurement time."""
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class WeatherPageExtractor:
+    """
+    A class to extract raw weather reports from the ddro.ru weather page.
+    The page is parsed by lxml, the text of every station block is read once
+    and tokenized by a single precompiled pattern that fills all report fields.
+    A malformed station block is skipped without losing the others.
+    """
+
+    DEFAULT_ENCODING = 'utf-8'
+
+    def decode(self, page: bytes) -> str:
+        """Decode the page using its declared or detected encoding."""
+        return UnicodeDammit(page, [self.DEFAULT_ENCODING], is_html=True).unicode_markup
+
+    def extract_block(self, data_string: str) -> dict:
+        """
+        Extract a raw weather report(string values) from the text of a station block.
+        """
+        header = HEADER_PATTERN.match(data_string)
+        if header is None:
+            raise MalformedBlockException('no station name line.')
+
+        # Первые 4 цифры в строке названия или '0000'.
+        station_id = STATION_ID_PATTERN.match(data_string)
+        weather_report = {
+            'ddro_station_id': station_id.group(1) if station_id else '0000',
+            'ddro_station_name': header.group(1)
+        }
+        values = {}
+        for token in TOKEN_PATTERN.finditer(data_string, header.end()):
+            if token.lastgroup == 'value':
+                # Учитывается первое вхождение подписи, как при поиске re.search.
+                values.setdefault(token.group('label'), token.group('value'))
+            elif 'latitude' not in weather_report:
+                weather_report['latitude'] = token.group('latitude')
+                weather_report['longitude'] = token.group('longitude')
+
+        if 'latitude' not in weather_report:
+            raise MalformedBlockException('no station coordinates.')
+
+        missing_labels = []
+        for label, field_pattern in FIELD_PATTERNS.items():
+            value = values.get(label)
+            if value is not None and field_pattern.value_pattern is not None:
+                value_match = field_pattern.value_pattern.fullmatch(value)
+                value = value_match.group(1) if value_match else None
+            if value is None:
+                missing_labels.append(label)
+            weather_report[field_pattern.report_key] = value
+
+        if weather_report['local'] is None:
+            raise MalformedBlockException('no measurement time.')
+        if missing_labels:
+            logger.warning(
+                f'Station {weather_report["ddro_station_name"]}: '
+                f'no values for {", ".join(missing_labels)}.'
+            )
+        return weather_report
+
+    def extract(self, page: bytes | str) -> list[dict]:
+        """
+        Extract raw weather reports from all station blocks of the page.
+        Reports with zero pressure are not returned.
+        """
+        if isinstance(page, bytes):
+            page = self.decode(page)
+        main_tag = lxml_html.fromstring(page).find('.//main')
+        weather_report_arr = []
+        if main_tag is None:
+            return weather_report_arr
+
+        for child in main_tag.iterchildren('div'):
+            data_string = child.text_content()
+            try:
+                weather_report = self.extract_block(data_string)
+            except MalformedBlockException as e:
+                logger.warning(f'Station block skipped, {e.message} Block: {data_string[:100]!r}')
+                continue
+
+            # Проверка давления. Если давление = 0,
+            # все данные этого отчета неактульны.
+            if weather_report['pressure'] != '0':
+                weather_report_arr.append(weather_report)
+        return weather_report_arr
@@ -0,0 +1,89 @@
+import os
+import time
+
+from celery.signals import task_postrun, task_prerun, worker_ready
+from django.conf import settings
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Histogram,
+    multiprocess, start_http_server
+)
+
+from .logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Границы корзин гистограмм: задержки HTTP, разбора страницы и БД [сек],
+# разбор пакета отчетов [сек], количество строк в пакете записи,
+# длительность задачи Celery [сек].
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BATCH_PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+ROWS_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000)
+TASK_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+http_request_duration = Histogram(
+    'ddro_http_request_duration_seconds',
+    'Duration of an HTTP request to an upstream, including reading the body.',
+    ['upstream', 'outcome'],
+    buckets=LATENCY_BUCKETS
+)
+html_parse_duration = Histogram(
+    'ddro_html_parse_duration_seconds',
+    'Duration of extracting weather reports from the ddro.ru page.',
+    buckets=LATENCY_BUCKETS
+)
+batch_parse_duration = Histogram(
+    'ddro_batch_parse_duration_seconds',
+    'Duration of parsing a batch of weather reports into columns by WeatherDictParser.',
+    buckets=BATCH_PARSE_BUCKETS
+)
+db_write_duration = Histogram(
+    'ddro_db_write_duration_seconds',
+    'Duration of writing a batch of weather reports to the database.',
+    buckets=LATENCY_BUCKETS
+)
+db_write_rows = Histogram(
+    'ddro_db_write_rows',
+    'Number of rows in a batch of weather reports written to the database.',
+    buckets=ROWS_BUCKETS
+)
+celery_task_duration = Histogram(
+    'ddro_celery_task_duration_seconds',
+    'Total duration of a Celery task.',
+    ['task', 'state'],
+    buckets=TASK_BUCKETS
+)
+
+# Время начала выполняемых задач по task_id.
+task_start_times: dict[str, float] = {}
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, **kwargs):
+    task_start_times[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    start = task_start_times.pop(task_id, None)
+    if start is not None:
+        celery_task_duration.labels(task=task.name, state=state or 'UNKNOWN').observe(
+            time.perf_counter() - start
+        )
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    """
+    Запустить HTTP сервер метрик в главном процессе воркера Celery.
+    Задачи выполняются в дочерних процессах, поэтому при заданной
+    PROMETHEUS_MULTIPROC_DIR метрики собираются из файлов всех процессов.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    start_http_server(settings.WORKER_METRICS_PORT, registry=registry)
+    logger.info(f'Celery metrics server started on port {settings.WORKER_METRICS_PORT}.')
@@ -0,0 +1,88 @@
+import re
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+
+from webscraper.extraction import WeatherPageExtractor
+
+
+FIXTURE_PATH = Path(__file__).resolve().parents[2] / 'data' / 'ddro_meteo.html'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark extraction of weather reports from a saved ddro.ru page: '
+        'the previous html.parser + re.search path vs WeatherPageExtractor. '
+        'The network and the database are not used.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=Path, default=FIXTURE_PATH, help='Saved ddro.ru/meteo/ page')
+        parser.add_argument('--repeat', type=int, default=50, help='Number of extractions per path')
+
+    def handle(self, *args, **options):
+        page = options['page'].read_bytes()
+        extractor = WeatherPageExtractor()
+
+        outputs = {}
+        for name, path in (('html.parser', self.legacy_extract), ('lxml', extractor.extract)):
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                outputs[name] = path(page)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{name:>12}: {options["repeat"]} pages in {elapsed:.3f} s '
+                f'({elapsed / options["repeat"] * 1000:.2f} ms/page), '
+                f'{len(outputs[name])} reports'
+            )
+        if outputs['html.parser'] == outputs['lxml']:
+            self.stdout.write(self.style.SUCCESS('Reports are identical.'))
+        else:
+            self.stdout.write(self.style.ERROR('Reports differ.'))
+
+    def legacy_extract(self, page: bytes) -> list[dict]:
+        """
+        Прежний разбор страницы. Блок без какого-либо поля пропускается
+        (раньше AttributeError прерывал разбор всей страницы).
+        """
+        bs = BeautifulSoup(page, 'html.parser')
+        main_tag = bs.find('main')
+        weather_report_arr = []
+        if main_tag:
+            for child in main_tag.children:
+                if child.name != 'div':
+                    continue
+                weather_report = {}
+                data_string = child.get_text()
+                try:
+                    try:
+                        weather_report['ddro_station_id'] = re.match(r'^\n(\d{4})\s+', data_string).group(1)
+                    except AttributeError:
+                        weather_report['ddro_station_id'] = '0000'
+                    weather_report['ddro_station_name'] = re.match(r'^\n(.*)\n', data_string).group(1)
+                    weather_report['latitude'] = re.search(r'([0-9.]{2,}),\s+([0-9.]{6,})', data_string).group(1)
+                    weather_report['longitude'] = re.search(r'([0-9.]{2,}),\s+([0-9.]{6,})', data_string).group(2)
+                    weather_report['local'] = re.search(r'Время снятия показаний:\s(\d{1,}[./-]\d{1,}[./-]\d{2,4}\s\d{1,2}:\d{1,2}:\d{1,2})', child.get_text()).group(1)
+                    weather_report['precipitation_type'] = re.search(r'Осадки:\s(.*)\n', data_string).group(1)
+                    weather_report['surface_cond'] = re.search(r'Поверхность:\s(.*)\n', data_string).group(1)
+                    weather_report['friction_coeff'] = re.search(r'Коэфициент трения:\s(.*)\n', data_string).group(1)
+                    weather_report['humidity'] = re.search(r'Относительная влажность:\s(.*)%\n', data_string).group(1)
+                    weather_report['pressure'] = re.search(r'Атмосферное давление:\s(.*)\sгПа\n', data_string).group(1)
+                    weather_report['temperature_air'] = re.search(r'Температура воздуха:\s(.*)°C\n', data_string).group(1)
+                    weather_report['dew_point'] = re.search(r'Точка росы:\s(.*)°C\n', data_string).group(1)
+                    weather_report['surface_temp'] = re.search(r'Температура поверхности дороги:\s(.*)°C\n', data_string).group(1)
+                    weather_report['water_layer_thickness'] = re.search(r'Высота слоя воды:\s(.*)мм\n', data_string).group(1)
+                    weather_report['snow_layer_thickness'] = re.search(r'Высота слоя снега:\s(.*)мм\n', data_string).group(1)
+                    weather_report['ice_layer_thickness'] = re.search(r'Высота слоя льда:\s(.*)мм\n', data_string).group(1)
+                    weather_report['ice_percentage'] = re.search(r'Процент льда:\s(.*)мм\n', data_string).group(1)
+                    weather_report['wind_m_s_avg'] = re.search(r'Скорость ветра:\s(\d+.*\d*)\n', data_string).group(1)
+                    weather_report['wind_degree'] = re.search(r'Направление ветра:\s(.*)°\n', data_string).group(1)
+                    weather_report['precipitation_amount'] = re.search(r'Интенсивность осадков:\s(.*)мм/ч\n', data_string).group(1)
+                    weather_report['precipitation_delta'] = re.search(r'Прибавление количества осадков по сравнению с предыдущим измерением:\s(.*)мм\n', data_string).group(1)
+                except AttributeError:
+                    continue
+                if weather_report['pressure'] != '0':
+                    weather_report_arr.append(weather_report)
+        return weather_report_arr
@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.db.models import UniqueConstraint
 
@@ -14,7 +15,10 @@ class Station(models.Model):
 
 
 class WeatherData(models.Model):
-    station = models.ForeignKey(Station, on_delete=models.DO_NOTHING)
+    station = models.ForeignKey(
+        Station, on_delete=models.DO_NOTHING,
+        db_index=False  # Покрывается индексом (station, UTC).
+    )
     created = models.DateTimeField(auto_now_add=True)
     local = models.DateTimeField()  # Время снятия показаний по местному времени(Рязань(пояс UTC +3)).
     UTC = models.DateTimeField()  # Время снятия показаний по UTC.
@@ -38,8 +42,10 @@ class WeatherData(models.Model):
 
     class Meta:
         constraints = [
+            # UTC определяется local, но входит в ограничение: уникальные
+            # ограничения секционированной таблицы содержат ключ секционирования.
             UniqueConstraint(
-                fields=['station', 'local'],
+                fields=['station', 'local', 'UTC'],
                 name='station_localtime_unique_constraint',
                 violation_error_message=(
                     'There should be only one weather report from '
@@ -47,3 +53,9 @@ class WeatherData(models.Model):
                 )
             )
         ]
+        indexes = [
+            # Выборка weather/ по станции за период.
+            models.Index(fields=['station', 'UTC'], name='webscraper_wd_station_utc_idx'),
+            # Выборка всех станций за период по таблице, пополняемой по времени.
+            BrinIndex(fields=['UTC'], name='webscraper_wd_utc_brin_idx'),
+        ]
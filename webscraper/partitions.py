@@ -0,0 +1,265 @@
+import datetime as dt
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from typing import NamedTuple
+
+from .models import WeatherData
+from .logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class PartitionException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class Partition(NamedTuple):
+    """Помесячная секция таблицы погодных данных: UTC в [start, end)."""
+    name: str
+    start: dt.datetime
+    end: dt.datetime
+
+
+class PartitionReport(NamedTuple):
+    """Результат обслуживания секций таблицы погодных данных."""
+    created: list[str]  # Созданные секции.
+    moved: int  # Количество строк, перенесенных в созданные секции.
+    dropped: list[str]  # Удаленные секции с истекшим сроком хранения.
+
+
+class WeatherDataPartitionService:
+    """
+    Класс для ведения помесячных секций таблицы погодных данных
+    (PostgreSQL, PARTITION BY RANGE ("UTC")). Секции создаются заранее
+    на months_ahead месяцев вперед, строки вне существующих секций
+    попадают в секцию по умолчанию и переносятся в секцию своего месяца
+    при ее создании. Секции старше retention_months месяцев отсоединяются
+    и удаляются. Запросы ORM к модели не меняются: фильтр по UTC
+    отсекает лишние секции при планировании запроса.
+    """
+
+    PARTITION_KEY = 'UTC'
+
+    def __init__(self, model=WeatherData, months_ahead: int = None, retention_months: int = None):
+        self.model = model
+        self.table = model._meta.db_table
+        self.default_partition = f'{self.table}_default'
+        self.partition_pattern = re.compile(rf'^{re.escape(self.table)}_p(\d{{4}})_(\d{{2}})$')
+        # Количество месяцев после текущего, для которых создаются секции.
+        if months_ahead is None:
+            months_ahead = settings.WEATHER_DATA_PARTITIONS_AHEAD
+        self.months_ahead = months_ahead
+        # Срок хранения данных в месяцах, 0 - данные хранятся бессрочно.
+        if retention_months is None:
+            retention_months = settings.WEATHER_DATA_RETENTION_MONTHS
+        self.retention_months = retention_months
+
+    @staticmethod
+    def quote(name: str) -> str:
+        return connection.ops.quote_name(name)
+
+    @staticmethod
+    def get_month_start(moment: dt.datetime) -> dt.datetime:
+        return moment.astimezone(dt.timezone.utc).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+
+    @staticmethod
+    def add_months(month: dt.datetime, months: int) -> dt.datetime:
+        index = month.year * 12 + month.month - 1 + months
+        return month.replace(year=index // 12, month=index % 12 + 1)
+
+    def get_partition_name(self, month: dt.datetime) -> str:
+        return f'{self.table}_p{month:%Y_%m}'
+
+    def check_database(self):
+        if connection.vendor != 'postgresql':
+            raise PartitionException('Table partitioning is supported on PostgreSQL only.')
+
+    def is_partitioned(self) -> bool:
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)',
+                [self.quote(self.table)]
+            )
+            row = cursor.fetchone()
+        return row is not None and row[0] == 'p'
+
+    def get_partitions(self) -> list[Partition]:
+        """Вернуть помесячные секции таблицы в порядке времени."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT child.relname FROM pg_inherits '
+                'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+                'WHERE pg_inherits.inhparent = to_regclass(%s)',
+                [self.quote(self.table)]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        partitions = []
+        for name in names:
+            match = self.partition_pattern.match(name)
+            if match:
+                start = dt.datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt.timezone.utc)
+                partitions.append(Partition(name=name, start=start, end=self.add_months(start, 1)))
+        return sorted(partitions, key=lambda partition: partition.start)
+
+    def create_partition(self, month: dt.datetime) -> int:
+        """
+        Создать секцию месяца и перенести в нее строки этого месяца
+        из секции по умолчанию. Вернуть количество перенесенных строк.
+        """
+        start, end = month, self.add_months(month, 1)
+        name = self.quote(self.get_partition_name(month))
+        table = self.quote(self.table)
+        key = self.quote(self.PARTITION_KEY)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            )
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {self.quote(self.default_partition)} '
+                f'WHERE {key} >= %s AND {key} < %s RETURNING *) '
+                f'INSERT INTO {name} SELECT * FROM moved',
+                [start, end]
+            )
+            moved = cursor.rowcount
+            cursor.execute(
+                f'ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+                [start, end]
+            )
+        logger.info(f'Partition {self.get_partition_name(month)} created, rows moved: {moved}.')
+        return moved
+
+    def create_partitions(self, first_month: dt.datetime, last_month: dt.datetime) -> tuple[list[str], int]:
+        """
+        Создать отсутствующие секции месяцев с first_month по last_month.
+        Вернуть имена созданных секций и количество перенесенных строк.
+        """
+        existing = {partition.name for partition in self.get_partitions()}
+        created, moved = [], 0
+        month = first_month
+        while month <= last_month:
+            if self.get_partition_name(month) not in existing:
+                moved += self.create_partition(month)
+                created.append(self.get_partition_name(month))
+            month = self.add_months(month, 1)
+        return created, moved
+
+    def drop_expired_partitions(self, now: dt.datetime) -> list[str]:
+        """
+        Отсоединить и удалить секции, все строки которых старше срока
+        хранения, удалить такие строки из секции по умолчанию.
+        """
+        if not self.retention_months:
+            return []
+        cutoff = self.add_months(self.get_month_start(now), -self.retention_months)
+        table = self.quote(self.table)
+        dropped = []
+        for partition in self.get_partitions():
+            if partition.end > cutoff:
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {self.quote(partition.name)}')
+                cursor.execute(f'DROP TABLE {self.quote(partition.name)}')
+            logger.info(f'Partition {partition.name} dropped(retention {self.retention_months} months).')
+            dropped.append(partition.name)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.quote(self.default_partition)} '
+                f'WHERE {self.quote(self.PARTITION_KEY)} < %s',
+                [cutoff]
+            )
+        return dropped
+
+    def maintain(self, now: dt.datetime = None) -> PartitionReport:
+        """
+        Создать секции текущего и следующих months_ahead месяцев,
+        удалить секции с истекшим сроком хранения.
+        """
+        self.check_database()
+        if not self.is_partitioned():
+            raise PartitionException(
+                f'{self.table} is not partitioned, run manage_weather_partitions --convert.'
+            )
+        now = now or dt.datetime.now(dt.timezone.utc)
+        month = self.get_month_start(now)
+        created, moved = self.create_partitions(month, self.add_months(month, self.months_ahead))
+        dropped = self.drop_expired_partitions(now)
+        return PartitionReport(created=created, moved=moved, dropped=dropped)
+
+    def convert(self, now: dt.datetime = None) -> PartitionReport:
+        """
+        Преобразовать обычную таблицу в секционированную: создать
+        секционированную таблицу с теми же колонками, секцию по умолчанию
+        и секции всех месяцев с данными, скопировать строки и удалить
+        прежнюю таблицу. Первичный ключ - (id, UTC): ограничения
+        уникальности секционированной таблицы включают ключ секционирования.
+        Выполняется в одной транзакции, таблица блокируется на все время.
+        """
+        self.check_database()
+        if self.is_partitioned():
+            raise PartitionException(f'{self.table} is already partitioned.')
+        now = now or dt.datetime.now(dt.timezone.utc)
+        table = self.quote(self.table)
+        unpartitioned = self.quote(f'{self.table}_unpartitioned')
+        sequence = self.quote(f'{self.table}_id_seq')
+        key = self.quote(self.PARTITION_KEY)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Отложенные проверки внешних ключей строк, вставленных в этой
+                # транзакции, не дают удалить прежнюю таблицу.
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+                cursor.execute(f'SELECT min({key}) FROM {table}')
+                first = cursor.fetchone()[0] or now
+                # Внешние ключи воссоздаются по определению из прежней таблицы.
+                cursor.execute(
+                    "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                    "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+                    [table]
+                )
+                foreign_keys = cursor.fetchall()
+
+                cursor.execute(f'ALTER TABLE {table} RENAME TO {unpartitioned}')
+                cursor.execute(
+                    f'CREATE TABLE {table} (LIKE {unpartitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                    f'PARTITION BY RANGE ({key})'
+                )
+                cursor.execute(
+                    f'CREATE TABLE {self.quote(self.default_partition)} PARTITION OF {table} DEFAULT'
+                )
+            month = self.get_month_start(now)
+            created, _ = self.create_partitions(
+                self.get_month_start(first), self.add_months(month, self.months_ahead)
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f'INSERT INTO {table} SELECT * FROM {unpartitioned}')
+                moved = cursor.rowcount
+                cursor.execute(f'DROP TABLE {unpartitioned}')
+
+                # Вместо identity(не поддерживается секционированными таблицами до PostgreSQL 17).
+                cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {table}.id')
+                cursor.execute(
+                    f'SELECT setval(%s, COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)',
+                    [sequence]
+                )
+                cursor.execute(f'ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)', [sequence])
+                cursor.execute(
+                    f'ALTER TABLE {table} ADD CONSTRAINT {self.quote(self.table + "_pkey")} '
+                    f'PRIMARY KEY (id, {key})'
+                )
+                for name, definition in foreign_keys:
+                    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {self.quote(name)} {definition}')
+            with connection.schema_editor() as schema_editor:
+                for constraint in self.model._meta.constraints:
+                    schema_editor.add_constraint(self.model, constraint)
+                for index in self.model._meta.indexes:
+                    schema_editor.add_index(self.model, index)
+        logger.info(f'{self.table} converted to {len(created)} monthly partitions, rows copied: {moved}.')
+        return PartitionReport(created=created, moved=moved, dropped=[])
@@ -1,56 +1,140 @@
 import datetime as dt
-import re
 import csv
+import hashlib
+import time
 
-from bs4 import BeautifulSoup
-from urllib.request import urlopen
+from django.conf import settings
+from django.core.cache import cache
+from typing import NamedTuple
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from .extraction import WeatherPageExtractor
+from .instrumentation import html_parse_duration, http_request_duration
+from .logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class PageSnapshot(NamedTuple):
+    """Снимок страницы ddro.ru/meteo/, общий для задач в пределах окна."""
+    body_hash: str  # sha256 тела страницы.
+    etag: str | None
+    last_modified: str | None
+    checked: float  # time.time() последней проверки страницы на сайте.
+    weather_reports: list[dict]  # Погодные отчеты, извлеченные из страницы.
 
 
 class WebsiteScraper:
+    """
+    Класс для получения погодных отчетов со страницы ddro.ru/meteo/.
+    Страница запрашивается условным GET(If-None-Match/If-Modified-Since),
+    а извлеченные отчеты хранятся в общем кэше вместе с хэшем тела:
+    в пределах окна задачи используют снимок без запроса к сайту,
+    неизменившаяся страница повторно не разбирается.
+    """
+
+    URL = 'https://ddro.ru/meteo/'
+    SNAPSHOT_KEY = 'ddro_page_snapshot'
+    PROCESSED_HASH_KEY = 'ddro_page_processed_hash:{consumer}'
+
+    def __init__(
+        self,
+        extractor=WeatherPageExtractor,
+        snapshot_window: int = None,
+        snapshot_ttl: int = None
+    ):
+        self.extractor = extractor()
+        # Время использования снимка без запроса к сайту [сек].
+        self.snapshot_window = (
+            settings.DDRO_PAGE_SNAPSHOT_WINDOW if snapshot_window is None else snapshot_window
+        )
+        # Время хранения снимка и обработанных хэшей в кэше [сек].
+        self.snapshot_ttl = settings.DDRO_PAGE_SNAPSHOT_TTL if snapshot_ttl is None else snapshot_ttl
+
+    def fetch_page(self, snapshot: PageSnapshot | None) -> tuple[bytes | None, dict]:
+        """
+        Запросить страницу с валидаторами прежнего снимка.
+        Вернуть тело страницы(None, если страница не изменилась) и заголовки ответа.
+        """
+        request = Request(self.URL)
+        if snapshot is not None:
+            if snapshot.etag:
+                request.add_header('If-None-Match', snapshot.etag)
+            if snapshot.last_modified:
+                request.add_header('If-Modified-Since', snapshot.last_modified)
+
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            with urlopen(request) as response:
+                body, headers = response.read(), response.headers
+            outcome = 'success'
+        except HTTPError as e:
+            if e.code != 304:
+                raise
+            body, headers = None, e.headers
+            outcome = 'not_modified'
+        finally:
+            http_request_duration.labels(upstream='ddro', outcome=outcome).observe(
+                time.perf_counter() - start
+            )
+        return body, headers
+
+    def get_page_snapshot(self) -> PageSnapshot:
+        """
+        Вернуть снимок страницы из кэша, если он проверен в пределах окна,
+        иначе проверить страницу на сайте и разобрать ее, только если
+        тело страницы изменилось.
+        """
+        snapshot: PageSnapshot | None = cache.get(self.SNAPSHOT_KEY)
+        if snapshot is not None and time.time() - snapshot.checked < self.snapshot_window:
+            return snapshot
+
+        body, headers = self.fetch_page(snapshot)
+        checked = time.time()
+        if body is None:
+            logger.info('ddro.ru page not modified(304).')
+            snapshot = snapshot._replace(checked=checked)
+        else:
+            body_hash = hashlib.sha256(body).hexdigest()
+            etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+            if snapshot is not None and snapshot.body_hash == body_hash:
+                logger.info('ddro.ru page body has not changed, parsing skipped.')
+                snapshot = snapshot._replace(
+                    etag=etag, last_modified=last_modified, checked=checked
+                )
+            else:
+                start = time.perf_counter()
+                weather_reports = self.extractor.extract(body)
+                html_parse_duration.observe(time.perf_counter() - start)
+                snapshot = PageSnapshot(
+                    body_hash=body_hash, etag=etag, last_modified=last_modified,
+                    checked=checked, weather_reports=weather_reports
+                )
+        cache.set(self.SNAPSHOT_KEY, snapshot, timeout=self.snapshot_ttl)
+        return snapshot
+
+    def get_new_page_snapshot(self, consumer: str) -> PageSnapshot | None:
+        """
+        Вернуть снимок страницы или None, если потребитель(задача)
+        уже обработал страницу с таким же содержимым.
+        """
+        snapshot = self.get_page_snapshot()
+        if cache.get(self.PROCESSED_HASH_KEY.format(consumer=consumer)) == snapshot.body_hash:
+            return None
+        return snapshot
+
+    def mark_processed(self, consumer: str, snapshot: PageSnapshot):
+        """Запомнить, что потребитель обработал снимок страницы."""
+        cache.set(
+            self.PROCESSED_HASH_KEY.format(consumer=consumer),
+            snapshot.body_hash, timeout=self.snapshot_ttl
+        )
+
     def scrape_weather_data(self) -> list[dict]:
-        html = urlopen('https://ddro.ru/meteo/')
-        bs = BeautifulSoup(html.read(), 'html.parser')
-        main_tag = bs.find('main')
-        weather_report_arr = []
-        if main_tag:
-            for child in main_tag.children:
-                if child.name == 'div':
-                    weather_report = {}
-                    data_string = child.get_text()
-                    try:
-                        # Попробовать взять первые 4 цифры в строке.
-                        weather_report['ddro_station_id'] = re.match(r'^\n(\d{4})\s+', data_string).group(1)
-                    except AttributeError:
-                        weather_report['ddro_station_id'] = '0000'
-                    weather_report['ddro_station_name'] = re.match(r'^\n(.*)\n', data_string).group(1)
-                    weather_report['latitude'] = re.search(r'([0-9.]{2,}),\s+([0-9.]{6,})', data_string).group(1) 
-                    weather_report['longitude'] = re.search(r'([0-9.]{2,}),\s+([0-9.]{6,})', data_string).group(2)
-                    weather_report['local'] = re.search(r'Время снятия показаний:\s(\d{1,}[./-]\d{1,}[./-]\d{2,4}\s\d{1,2}:\d{1,2}:\d{1,2})', child.get_text()).group(1)
-                    weather_report['precipitation_type'] = re.search(r'Осадки:\s(.*)\n', data_string).group(1)
-                    weather_report['surface_cond'] = re.search(r'Поверхность:\s(.*)\n', data_string).group(1)
-                    weather_report['friction_coeff'] = re.search(r'Коэфициент трения:\s(.*)\n', data_string).group(1)
-                    weather_report['humidity'] = re.search(r'Относительная влажность:\s(.*)%\n', data_string).group(1)
-                    weather_report['pressure'] = re.search(r'Атмосферное давление:\s(.*)\sгПа\n', data_string).group(1)
-                    weather_report['temperature_air'] = re.search(r'Температура воздуха:\s(.*)°C\n', data_string).group(1)
-                    weather_report['dew_point'] = re.search(r'Точка росы:\s(.*)°C\n', data_string).group(1)
-                    weather_report['surface_temp'] = re.search(r'Температура поверхности дороги:\s(.*)°C\n', data_string).group(1)
-                    weather_report['water_layer_thickness'] = re.search(r'Высота слоя воды:\s(.*)мм\n', data_string).group(1)
-                    weather_report['snow_layer_thickness'] = re.search(r'Высота слоя снега:\s(.*)мм\n', data_string).group(1)
-                    weather_report['ice_layer_thickness'] = re.search(r'Высота слоя льда:\s(.*)мм\n', data_string).group(1)
-                    weather_report['ice_percentage'] = re.search(r'Процент льда:\s(.*)мм\n', data_string).group(1)
-                    weather_report['wind_m_s_avg'] = re.search(r'Скорость ветра:\s(\d+.*\d*)\n', data_string).group(1)
-                    weather_report['wind_degree'] = re.search(r'Направление ветра:\s(.*)°\n', data_string).group(1)
-                    weather_report['precipitation_amount'] = re.search(r'Интенсивность осадков:\s(.*)мм/ч\n', data_string).group(1)
-                    weather_report['precipitation_delta'] = re.search(r'Прибавление количества осадков по сравнению с предыдущим измерением:\s(.*)мм\n', data_string).group(1)
-
-                else:
-                    continue
-
-                # Проверка давления. Если давление = 0,
-                # все данные этого отчета неактульны.
-                if weather_report['pressure'] != '0':
-                    weather_report_arr.append(weather_report)
-        return weather_report_arr
+        return self.get_page_snapshot().weather_reports
 
     def write_station_data_csv(self) -> None:
         weather_report_arr = self.scrape_weather_data()
@@ -1,6 +1,8 @@
 import datetime as dt
 import django
 import os
+from django.db import transaction
+from typing import NamedTuple
 from .logging import get_logger
 
 logger = get_logger('__name__')
@@ -32,7 +34,21 @@ class StationHttpService:
         return stations_data
 
 
+class StationChangeReport(NamedTuple):
+    """Результат сверки станций БД со станциями сайта."""
+    added: list[str]  # ddro_station_name добавленных станций.
+    moved: list[str]  # ddro_station_name станций с обновленными координатами.
+    unchanged: int  # Количество станций без изменений.
+    absent: list[str]  # ddro_station_name станций БД, отсутствующих на сайте.
+
+
 class StationQueryService:
+    # Поля, обновляемые при смещении станции.
+    STATION_UPDATE_FIELDS = [
+        'latitude', 'longitude', 'position_change_counter',
+        'position_change_time', 'updated'
+    ]
+
     def __init__(self, station_http_service=StationHttpService):
         self.station_http_service = station_http_service()
 
@@ -40,60 +56,65 @@ class StationQueryService:
         stations_db: list[Station] = [station for station in Station.objects.all()]
         return stations_db
 
-    def update_stations_db(self):
+    def update_stations_db(self) -> StationChangeReport:
         '''
         Данные станций в базе обновляются перед скрейпингом сайта.
         Идентификатором служит полное наименование станции. Если название
         совпало с базой, но координаты изменились - они обновляются в базе.
         Если же название отсутствует в базе, то новая станция в нее добавляется.
+        Все изменения записываются двумя пакетными запросами в одной транзакции.
         '''
-        stations_db: list[Station] = Station.objects.all()
-        stations_website: list[Station] = [
-            Station(**data)
-            for data
-            in self.station_http_service.get_staions_website()
-        ]
-        stations_db_set: set[str] = set(
-            station.ddro_station_name for station in stations_db
-        )
-        stations_website_set: set[str] = set(
-            station.ddro_station_name for station in stations_website
-        )
-        # Получить совпадающие станции.
-        intersection = stations_website_set.intersection(stations_db_set)
-
-        for name in intersection:
-            #  Получить объекты станций.
-            station_website: Station = next(station for station in stations_website if station.ddro_station_name == name)
-            station_db: Station = next(station for station in stations_db if station.ddro_station_name == name)
-
-            # Сравнить объекты и обновить в базе при несовпадении координат обновить в базе.
-            if (station_db.latitude != station_website.latitude or station_db.longitude != station_website.longitude):
-                # Увеличить счетчик изменения координат для данной станции.
-                station_db.position_change_counter += 1
-                # Сохранить Время изменения.
-                station_db.position_change_time = dt.datetime.now(dt.timezone.utc)
-                # Обновить широту и долготу.
-                station_db.latitude = station_website.latitude
-                station_db.longitude = station_website.longitude
-                station_db.save()
-            else:
+        # Станции из БД и с сайта по ddro_station_name.
+        stations_db: dict[str, Station] = {
+            station.ddro_station_name: station
+            for station in self.get_stations_db()
+        }
+        stations_website: dict[str, Station] = {
+            data['ddro_station_name']: Station(**data)
+            for data in self.station_http_service.get_staions_website()
+        }
+
+        now = dt.datetime.now(dt.timezone.utc)
+        stations_to_update: list[Station] = []
+        stations_to_add: list[Station] = []
+        for name, station_website in stations_website.items():
+            station_db = stations_db.get(name)
+            if station_db is None:
+                stations_to_add.append(station_website)
                 continue
-
-        # Получить станции, отстуствующие в БД.
-        difference: set[str] = stations_website_set.difference(stations_db_set)
+            # Сравнить объекты и при несовпадении координат обновить в базе.
+            if (
+                station_db.latitude == station_website.latitude
+                and station_db.longitude == station_website.longitude
+            ):
+                continue
+            # Увеличить счетчик изменения координат для данной станции.
+            station_db.position_change_counter += 1
+            # Сохранить Время изменения.
+            station_db.position_change_time = now
+            # Обновить широту и долготу.
+            station_db.latitude = station_website.latitude
+            station_db.longitude = station_website.longitude
+            # bulk_update не обновляет поля auto_now.
+            station_db.updated = now
+            stations_to_update.append(station_db)
+
+        with transaction.atomic():
+            Station.objects.bulk_update(
+                stations_to_update, fields=self.STATION_UPDATE_FIELDS
+            )
+            # IntegrityError, DatabaseError
+            Station.objects.bulk_create(stations_to_add)
+
+        report = StationChangeReport(
+            added=sorted(station.ddro_station_name for station in stations_to_add),
+            moved=sorted(station.ddro_station_name for station in stations_to_update),
+            unchanged=len(stations_website) - len(stations_to_add) - len(stations_to_update),
+            absent=sorted(stations_db.keys() - stations_website.keys())
+        )
         logger.info(
-            f'Stations abscent in database: {list(difference)}, '
-            f'amount: {len(difference)}'
+            f'Stations abscent in database: {report.added}, '
+            f'amount: {len(report.added)}'
             )
-
-        # Станции к добавлению в базу.
-        stations_difference: list[Station] = [
-            station for station
-            in stations_website
-            if station.ddro_station_name in difference
-        ]
-
-        # Добавить новые станции в базу.
-        Station.objects.bulk_create(stations_difference)  # IntegrityError, DatabaseError
-        logger.info('Updating station database completed.')
+        logger.info(f'Updating station database completed: {report}.')
+        return report
@@ -1,9 +1,14 @@
 from celery import shared_task
 
+from .logging import get_logger
+from .partitions import WeatherDataPartitionService
 from .stations import StationQueryService
 from .weatherdata_service import WeatherDataService
 
 
+logger = get_logger(__name__)
+
+
 @shared_task
 def update_stations():
     service = StationQueryService()
@@ -14,3 +19,21 @@ def update_stations():
 def save_weather_data():
     service = WeatherDataService()
     service.save_current_weather()
+
+
+@shared_task
+def maintain_weather_data_partitions():
+    service = WeatherDataPartitionService()
+    # До преобразования таблицы(manage_weather_partitions --convert)
+    # и на других СУБД обслуживать нечего.
+    if not service.is_partitioned():
+        logger.warning(
+            f'{service.table} is not partitioned, partition maintenance skipped. '
+            f'Run manage_weather_partitions --convert to enable it.'
+        )
+        return
+    report = service.maintain()
+    logger.info(
+        f'Weather data partitions maintained: created {report.created}, '
+        f'rows moved: {report.moved}, dropped {report.dropped}.'
+    )
@@ -1,5 +1,6 @@
 import django
 import os
+import time
 from django.db import IntegrityError as IntegrityError_1
 from django.db.utils import IntegrityError as IntegrityError_2
 
@@ -8,6 +9,7 @@ from .scraper import WebsiteScraper
 from .parsing import WeatherDictParser
 from .stations import StationQueryService
 from .models import WeatherData, Station
+from .instrumentation import db_write_duration, db_write_rows
 from .logging import get_logger
 
 # Логгирование.
@@ -19,6 +21,9 @@ django.setup()
 
 
 class WeatherDataService:
+    # Имя потребителя снимка страницы ddro.ru/meteo/.
+    PAGE_CONSUMER = 'save_weather_data'
+
     def __init__(
             self, website_scraper_service=WebsiteScraper,
             parsing_service=WeatherDictParser,
@@ -32,6 +37,7 @@ class WeatherDataService:
         self,
         parsed_reports_with_stat_pks: list[dict]
     ) -> bool:
+        start = time.perf_counter()
         for report in parsed_reports_with_stat_pks:
             object = WeatherData(**report)
             try:
@@ -44,6 +50,8 @@ class WeatherDataService:
                     f'Station pk={report["station"]} '
                     f'station_localtime_unique_constraint has been violated.'
                 )
+        db_write_duration.observe(time.perf_counter() - start)
+        db_write_rows.observe(len(parsed_reports_with_stat_pks))
 
     def indentify_stations(self, parsed_reports: list[dict]) -> list[dict]:
         stations_db: list[Station] = self.station_query_service.get_stations_db()
@@ -67,8 +75,13 @@ class WeatherDataService:
         return parsed_reports_with_stat_pks
 
     def save_current_weather(self):
+        # Страница с тем же содержимым уже сохранена: новых отчетов нет.
+        snapshot = self.website_scraper_sevice.get_new_page_snapshot(consumer=self.PAGE_CONSUMER)
+        if snapshot is None:
+            logger.info('ddro.ru page has not changed since the last save, skipped.')
+            return
         # Под некоторыми ключами словаря может оказаться None при ошибке при скрепинге сайта.
-        weather_reports_arr: list[dict] = self.website_scraper_sevice.scrape_weather_data()
+        weather_reports_arr: list[dict] = snapshot.weather_reports
         # print('WEATHER REPORT_ARR count', len(weather_reports_arr))
         # print('WEATHER REPORT_ARR =', weather_reports_arr)
 
@@ -83,3 +96,4 @@ class WeatherDataService:
         # "В базе может быть только один отчет от определенной стации за опред момент времени."
         parsed_reports_with_stat_pks = self.indentify_stations(parsed_reports=parsed_reports)
         self.save_weather_data(parsed_reports_with_stat_pks)
+        self.website_scraper_sevice.mark_processed(self.PAGE_CONSUMER, snapshot)